@@ -1,14 +1,142 @@
 import sys, os
 import abc
+import copy
+import queue
+import heapq
+import time
+import pickle
+import collections
+import select
+import signal
+import warnings
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+from statistics import NormalDist
 
 import numpy as np
 from matplotlib import axes, cm, colors
 from rebound.interruptible_pool import InterruptiblePool  # import throws `pkg_resources.declare_namespace` warning
 
-from .quadnode import QuadNode
+from .cache import EvaluationCache, fingerprint
+from .executors import EXECUTORS, ExecutorPool
+from .samplers import SAMPLERS, sample
+from .quadnode import QuadNode, PointList, quadrant_codes
 from .quadpoint import QuadPoint
 
 
+_worker_tree = None  # static copy of the quadtree installed in each worker process
+
+
+def _init_worker(tree: 'BaseTree') -> None:
+    """Initialize worker.
+
+    Install the static configuration of a quadtree (without any nodes or points) in a worker process,
+    so that tasks only need to carry the limits of a node and a random seed.
+
+    Args:
+        tree (BaseTree): Detached copy of the quadtree (see 'BaseTree._detached_copy').
+    """
+    global _worker_tree
+    _worker_tree = tree
+    _worker_tree._attach_worker()
+    
+    
+def _evaluate_point_task(bounds: tuple, rng_seed: int, tree: 'BaseTree' = None) -> QuadPoint:
+    """Evaluate point task.
+
+    Worker-side 'evaluate_point' for the quadtree installed by '_init_worker'.
+
+    Args:
+        bounds (tuple): Node limits (x_min, x_max, y_min, y_max, depth).
+        rng_seed (int): Random number generator seed.
+        tree (BaseTree, optional): Quadtree to use instead of the installed one. Defaults to None.
+
+    Returns:
+        QuadPoint: New point.
+    """
+    tree = _worker_tree if tree is None else tree
+    return tree._timed_evaluate_point(QuadNode(*bounds), rng_seed)
+
+
+def _evaluate_points_task(bounds: tuple, N_points: int, rng_seed: int, locations: tuple = None,
+                          tree: 'BaseTree' = None) -> tuple:
+    """Evaluate points task.
+
+    Worker-side 'evaluate_points' for the quadtree installed by '_init_worker'.
+
+    Args:
+        bounds (tuple): Node limits (x_min, x_max, y_min, y_max, depth).
+        N_points (int): Number of points to evaluate.
+        rng_seed (int): Random number generator seed.
+        locations (tuple, optional): Arrays of x and y coordinates to evaluate. Defaults to None.
+        tree (BaseTree, optional): Quadtree to use instead of the installed one. Defaults to None.
+
+    Returns:
+        tuple: Arrays of x values, y values, and point values.
+    """
+    tree = _worker_tree if tree is None else tree
+    return tree._timed_evaluate_points(QuadNode(*bounds), N_points, rng_seed, locations)
+
+
+def _call_with_timeout(func: callable, args: tuple, timeout: float) -> tuple:
+    """Call with timeout.
+
+    Call a function in a forked child process, and kill the child if it takes longer than 'timeout' seconds.
+    Unlike signals, this also stops long-running compiled code (e.g. a REBOUND integration).
+
+    Args:
+        func (callable): Function to call.
+        args (tuple): Positional arguments of the function.
+        timeout (float): Wall-clock time limit in seconds.
+
+    Returns:
+        tuple: (True, None) if the call timed out, else (False, result).
+    """
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    
+    if pid == 0:  # child: evaluate, send the pickled result, and exit without any cleanup
+        os.close(read_fd)
+        try:
+            try:
+                payload = pickle.dumps((True, func(*args)))
+            except BaseException as error:
+                try:
+                    payload = pickle.dumps((False, error))
+                except Exception:
+                    payload = pickle.dumps((False, RuntimeError(repr(error))))
+            with os.fdopen(write_fd, 'wb') as f:
+                f.write(payload)
+        finally:
+            os._exit(0)
+            
+    os.close(write_fd)
+    chunks = []
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                os.kill(pid, signal.SIGKILL)
+                return True, None
+            chunk = os.read(read_fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+        os.waitpid(pid, 0)
+        
+    if len(chunks) == 0:
+        raise RuntimeError('evaluation process exited unexpectedly.')
+    
+    success, result = pickle.loads(b''.join(chunks))
+    if not success:
+        raise result
+    
+    return False, result
+
+
 class BaseTree(abc.ABC):
     """Base quadtree.
 
@@ -29,7 +157,84 @@ class BaseTree(abc.ABC):
         filename_points (str, optional): Name of output file to save points. Defaults to 'points.txt'.
         filename_nodes (str, optional): Name of output file to save nodes. Defaults to 'nodes.txt'.
         overwrite (bool, optional): Option to automatically overwrite previously saved results. Defaults to False.
+        executor (str or :obj:`concurrent.futures.Executor`, optional): How points are evaluated in parallel ['serial',
+            'threads', 'fork', 'spawn', or an executor object]. Defaults to None, i.e. a pool of processes if `N_proc` > 1.
+        timeout (float, optional): Wall-clock time limit (in seconds) for evaluating one point. Defaults to None.
+        timeout_value (float, optional): Value of points that exceeded `timeout`. Defaults to nan.
+        timeout_resample (bool, optional): Option to try one replacement point before recording a timeout. Defaults to False.
+        cache (str, optional): Name of a database file in which to cache evaluations. Defaults to None.
+        cache_key (str, optional): Fingerprint of the evaluations, to use instead of the computed one. Defaults to None.
+        sampler (str, optional): How new points are placed within nodes ['uniform', 'sobol', 'halton', 'lhs', or 'jitter']. Defaults to 'uniform'.
+        N_min (int, optional): Initial number of points per node in adaptive mode. Defaults to None, i.e. always `N_points`.
+        adaptive_tolerance (float, optional): Confidence interval half-width, relative to `split_threshold`, at which nodes stop drawing points in adaptive mode. Defaults to 0.5.
+        split_confidence (float, optional): Confidence level at which differences between nodes must be significant to split them. Defaults to None, i.e. no test.
+        split_test (str, optional): Significance test for `split_confidence` ['stderr' or 'bootstrap']. Defaults to 'stderr'.
+        journal (bool, optional): Option to checkpoint by appending to a journal instead of rewriting the output files. Defaults to False.
+        checkpoint_file (str, optional): Name of a binary (.npz) file in which to checkpoint the exact quadtree instead. Defaults to None.
+        half_open (bool, optional): Option to hand points on a boundary between children to the child to their east or north when splitting nodes, instead of dropping them. Defaults to False.
+            
+    .. note::
+    
+        By default, points are evaluated by a pool of `N_proc` worker processes (using the default start method)
+        if `N_proc` > 1, and serially otherwise. The `executor` option selects another backend:
+        
+        - 'serial': evaluate every point in the main process.
+        - 'threads': a pool of `N_proc` threads, with no pickling or process start-up cost. Useful if the
+          evaluation releases the GIL, e.g. vectorized NumPy models.
+        - 'fork' or 'spawn': a pool of `N_proc` worker processes with the given start method.
+        - any object with a `submit(fn, *args, **kwargs)` method returning a :obj:`concurrent.futures.Future`,
+          e.g. a cluster executor (see 'distributed.Coordinator'). If it has a `set_initializer(initializer, initargs)`
+          method, its workers are initialized once with the static configuration of the quadtree; otherwise each task
+          carries a copy of the quadtree without nodes or points. Executors given this way are never shut down by
+          the quadtree.
+          
+        If `timeout` is given, each evaluation runs in a forked child process (requires a POSIX system, and
+        cannot be combined with a thread executor), which is killed once the time limit is exceeded. The point is then recorded at its sampled location with
+        `timeout_value` and flag 'QuadPoint.FLAG_TIMEOUT', so that a single stuck evaluation cannot hold up
+        a whole node. Locations are taken as the first uniform draws of x, then y, from the point's random
+        seed, as in all built-in quadtrees. Batched evaluations ('evaluate_points') get `timeout` per point.
+        Note that a nan `timeout_value` makes the mean of its node nan, which never triggers a split.
+        
+        If `cache` is given, evaluations are stored in an 'EvaluationCache' and reused by later runs, e.g. with
+        a different `split_threshold`, `max_depth`, or `node_statistic`. Random seeds are then derived from the
+        node limits and the index of each point within its node, so that every run draws the same samples in the
+        same nodes. Entries are keyed by a fingerprint of the quadtree class and its evaluation settings (e.g. the
+        simulation function and its code), unless `cache_key` is given. Timed out evaluations are not cached.
+        
+        By default, each point is drawn uniformly within its node. Other samplers spread the points of a node
+        more evenly, which makes node values less noisy for the same `N_points`: 'sobol' (scrambled Sobol
+        sequence), 'halton' (shifted Halton sequence), 'lhs' (Latin hypercube), or 'jitter' (one point per cell of
+        a grid). New points complete the design formed by the points a node already holds, e.g. those handed
+        down from its parent after a split (see 'samplers.sample'). 'evaluate_point' is then called with a node
+        spanning a single floating point step around the chosen location, and 'evaluate_points' with `locations`.
+        
+        If `N_min` is given, the number of points per node is adaptive: each new node first gets `N_min` points,
+        then further batches of `N_min` points until the confidence interval of its node statistic is narrower
+        than `adaptive_tolerance` times `split_threshold` (half-width at 'adaptive_z' standard errors), or until it
+        holds `N_points` points. Nodes are only compared once they are complete in this sense, so that clearly
+        uniform regions (e.g. all stable) are settled with few evaluations, while noisy regions get up to `N_points`.
+        
+        With stochastic evaluations, node values differ by chance, and each spurious split costs 4 x `N_points`
+        evaluations. If `split_confidence` is given, neighboring nodes are only split if their values differ by
+        at least `split_threshold` and the difference is also significant at that confidence level: either
+        compared with the standard errors of both node values ('stderr'), or with a bootstrap interval of the
+        difference from 'bootstrap_samples' resamples of each node's points ('bootstrap').
+        
+        By default, every checkpoint rewrites `filename_points` and `filename_nodes`. With `journal`, checkpoints
+        instead append new points and splits to `filename_points` + '.journal', and the output files are only
+        rewritten (compacted) once the journal holds as many entries as they do, and at the end of the run, so
+        checkpoint I/O grows linearly rather than quadratically with the size of the quadtree. Runs are resumed
+        from the output files plus the journal, so a journaled run must also be resumed with `journal`.
+        
+        The output files hold rounded coordinates, and resuming from them rebuilds the quadtree by redistributing
+        all points from the root. With `checkpoint_file`, checkpoints instead save the full-precision points
+        (with their flags) and the node topology in a NumPy .npz file (see 'save_tree'), from which runs resume
+        exactly (see 'load_tree'). The output files are then only written at the end of the run.
     """
+    
+    checkpoint_interval = 60.  # minimum number of seconds between checkpoints during event-driven refinement
+    adaptive_z = 1.96  # number of standard errors in the confidence interval of adaptive sampling (95%)
+    bootstrap_samples = 1000  # number of resamples for the 'bootstrap' split test
 
     def __init__(self,
         x_min: float,
@@ -46,6 +251,20 @@ class BaseTree(abc.ABC):
         filename_points: str = 'points.txt',
         filename_nodes: str = 'nodes.txt',
         overwrite: bool = False,
+        executor: object = None,
+        timeout: float = None,
+        timeout_value: float = np.nan,
+        timeout_resample: bool = False,
+        cache: str = None,
+        cache_key: str = None,
+        sampler: str = 'uniform',
+        N_min: int = None,
+        adaptive_tolerance: float = 0.5,
+        split_confidence: float = None,
+        split_test: str = 'stderr',
+        journal: bool = False,
+        checkpoint_file: str = None,
+        half_open: bool = False,
         ) -> None:
         """__init__
 
@@ -82,198 +301,1395 @@ class BaseTree(abc.ABC):
             raise ValueError('N_proc must be greater than zero.')
         else:
             self.N_proc = N_proc
+            
+        if isinstance(executor, str) and executor not in EXECUTORS:
+            raise ValueError('executor must be either "serial", "threads", "fork", "spawn", or an executor object.')
+        elif not isinstance(executor, str) and executor is not None and not callable(getattr(executor, 'submit', None)):
+            raise TypeError('executor must have a submit method.')
+        else:
+            self.executor = executor
+            
+        if timeout is not None and timeout <= 0:
+            raise ValueError('timeout must be greater than zero.')
+        elif timeout is not None and not hasattr(os, 'fork'):
+            raise ValueError('timeout requires a platform that supports os.fork.')
+        elif timeout is not None and (isinstance(executor, ThreadPoolExecutor) or executor == 'threads'):
+            raise ValueError('timeout cannot be used with a thread executor, since forking a multi-threaded process is unsafe.')
+        else:
+            self.timeout = timeout
+            self.timeout_value = timeout_value
+            self.timeout_resample = timeout_resample
+            
+        self.cache = cache
+        self.cache_key = cache_key
+        
+        if sampler not in SAMPLERS:
+            raise ValueError('sampler must be either "uniform", "sobol", "halton", "lhs", or "jitter".')
+        else:
+            self.sampler = sampler
+            
+        if N_min is not None and not 0 < N_min <= N_points:
+            raise ValueError('N_min must be greater than zero and at most N_points.')
+        elif N_min is not None and node_statistic == 'count':
+            raise ValueError('adaptive sampling (N_min) cannot be used with the "count" node_statistic.')
+        elif adaptive_tolerance <= 0:
+            raise ValueError('adaptive_tolerance must be greater than zero.')
+        else:
+            self.N_min = N_min
+            self.adaptive_tolerance = adaptive_tolerance
+            
+        if split_confidence is not None and not 0 < split_confidence < 1:
+            raise ValueError('split_confidence must be between zero and one.')
+        elif split_confidence is not None and node_statistic == 'count':
+            raise ValueError('split_confidence cannot be used with the "count" node_statistic.')
+        elif split_confidence is not None and N_points < 2:
+            raise ValueError('split_confidence requires N_points of at least 2.')
+        elif split_test not in ('stderr', 'bootstrap'):
+            raise ValueError('split_test must be either "stderr" or "bootstrap".')
+        else:
+            self.split_confidence = split_confidence
+            self.split_test = split_test
         
         # define other attributes
         self.verbose = verbose
         self.filename_points = filename_points
         self.filename_nodes = filename_nodes
         self.overwrite = overwrite
+        self.journal = journal
+        
+        if journal and checkpoint_file is not None:
+            raise ValueError('journal and checkpoint_file cannot be used together.')
+        else:
+            self.checkpoint_file = checkpoint_file
+        
+        self.half_open = half_open
         
         self.node_count = 1
         self.root = QuadNode(x_min, x_max, y_min, y_max, 1)
         self.min_node_value = np.inf  # for plotting limits
         self.max_node_value = -np.inf
         
+        self._pool = None  # worker pool, created lazily by '_get_pool'
+        self._cache = None  # evaluation cache, opened lazily by '_get_cache'
+        self._fill_splits = False  # fill nodes as soon as they are split, during a recursive pass (see '_pass')
+        self._compared = None  # neighbor pairs compared during the current sweep (see '_sweep')
+        self._parents = None  # parents of nodes split during the current sweep
+        self._deferred = None  # nodes split to reach min_depth during the current sweep
+        self._paths = None  # child indices leading from the root to each node during the current sweep
+        self._dirty = None  # nodes containing a leaf that changed since the previous step (see '_forward')
+        self._changed = None  # leaves created or evaluated since the start of the current step
+        self._unfilled = None  # leaves that still need points
+        self._neighbors = None  # neighboring leaves of every leaf during a run, kept up to date on splits (see '_index_neighbors')
+        self._leaf_paths = None  # child indices leading from the root to every leaf in the neighbor index
+        self._journal_pending = []  # journal lines not yet written (see '_save_checkpoint')
+        self._journal_entries = 0  # number of entries in the journal since the last compaction
+        self._snapshot_entries = 0  # number of points in the output files at the last compaction
+        
+    
+    def __enter__(self) -> 'BaseTree':
+        return self
+    
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(terminate=exc_type is not None)
+        
+    
+    def __getstate__(self) -> dict:
+        # the worker pool cannot be pickled (e.g. when sending bound methods to workers)
+        state = self.__dict__.copy()
+        state['_pool'] = None
+        state['_cache'] = None
+        return state
+    
+    
+    def _get_pool(self) -> InterruptiblePool:
+        """Get pool.
+
+        Return the worker pool owned by this quadtree, creating it on first use (see `executor`).
+        Worker processes receive the static configuration of the quadtree once, when they start
+        (see '_init_worker').
+
+        Returns:
+            InterruptiblePool: Pool of 'N_proc' worker processes, or an 'ExecutorPool'.
+        """
+        if self._pool is None:
+            if self.executor is None or self.executor in ('fork', 'spawn'):
+                context = None if self.executor is None else multiprocessing.get_context(self.executor)
+                self._pool = InterruptiblePool(processes=self.N_proc,
+                                               initializer=_init_worker,
+                                               initargs=(self._detached_copy(),),
+                                               context=context
+                                               )
+            elif self.executor == 'threads':
+                self._pool = ExecutorPool(ThreadPoolExecutor(max_workers=self.N_proc), tree=self)
+            elif callable(getattr(self.executor, 'set_initializer', None)):
+                self.executor.set_initializer(_init_worker, (self._detached_copy(),))
+                self._pool = ExecutorPool(self.executor, shutdown=False)
+            else:
+                self._pool = ExecutorPool(self.executor, tree=self._detached_copy(), shutdown=False)
+            
+        return self._pool
+    
+    
+    def _get_cache(self) -> EvaluationCache:
+        """Get cache.
+
+        Return the evaluation cache of this quadtree (if `cache` is given), opening it on first use.
+
+        Returns:
+            EvaluationCache: Evaluation cache, or None.
+        """
+        if self._cache is None and self.cache is not None:
+            key = self.cache_key if self.cache_key is not None else fingerprint(self._fingerprint_items())
+            self._cache = EvaluationCache(self.cache, key)
+            
+        return self._cache
+    
+    
+    def _fingerprint_items(self) -> list:
+        """Fingerprint items.
+
+        List everything that determines the outcome of evaluations, for the fingerprint of cached results.
+        Subclasses should extend this list with their evaluation settings (e.g. the simulation function).
+
+        Returns:
+            list: Items to hash (see 'cache.fingerprint').
+        """
+        return [type(self).__module__, type(self).__qualname__,
+                type(self).evaluate_point, type(self).evaluate_points, self.sampler]
+    
+    
+    def _new_seed(self, node: QuadNode, index: int) -> int:
+        """New seed.
+
+        Convenience function to get the random seed of a new point, which is reproducible if `cache` is given.
+
+        Args:
+            node (QuadNode): Node in which to evaluate the point.
+            index (int): Index of the point within the node.
+
+        Returns:
+            int: Random number generator seed.
+        """
+        if self.cache is None:
+            return np.random.randint(1, 1e8)
+        
+        return EvaluationCache.seed(self._bounds(node), index)
+    
+    
+    def _cache_lookup(self, tasks: list) -> list:
+        """Cache lookup.
+
+        Look up the points of several evaluations in the cache (if `cache` is given).
+
+        Args:
+            tasks (list): (node, N_points, seed) evaluations, with N_points = 0 for 'evaluate_point' calls.
+
+        Returns:
+            list: Cached points of each evaluation, or None if not cached.
+        """
+        if self._get_cache() is None:
+            return [None] * len(tasks)
+        
+        keys = [EvaluationCache.key(self._bounds(node), n, seed) for node, n, seed in tasks]
+        found = self._cache.get_many(keys)
+        
+        return [found.get(key) for key in keys]
+    
+    
+    def _cache_store(self, tasks: list, results: list) -> None:
+        """Cache store.
+
+        Store the points of several evaluations in the cache (if `cache` is given), except for timed out ones.
+
+        Args:
+            tasks (list): (node, N_points, seed) evaluations, with N_points = 0 for 'evaluate_point' calls.
+            results (list): Points of each evaluation.
+        """
+        if self._get_cache() is None:
+            return
+        
+        for (node, n, seed), points in zip(tasks, results):
+            if all(point.flag == 0 for point in points):
+                self._cache.put(EvaluationCache.key(self._bounds(node), n, seed), points)
+        self._cache.commit()
+        
+        
+    def _add_points(self, node: QuadNode, points: list) -> None:
+        """Add points.
+        
+        Convenience function to add newly evaluated points to a node, recording them for the journal.
+
+        Args:
+            node (QuadNode): Quadtree leaf.
+            points (list): New points.
+        """
+        node.node_points.extend(points)
+        if self.journal:
+            self._journal_pending.extend(f"{point.x!r}\t{point.y!r}\t{point.value!r}\t\n" for point in points)
+            
+            
+    def _is_parallel(self) -> bool:
+        """Is parallel.
+
+        Check whether points are evaluated by the worker pool rather than in the main process.
+
+        Returns:
+            bool: True if '_get_pool' should be used.
+        """
+        if self.executor is None:
+            return self.N_proc > 1
+        
+        return self.executor != 'serial'
+    
+    
+    def close(self, terminate: bool = False) -> None:
+        """Close.
+
+        Shut down the worker pool owned by this quadtree, if any. A new pool is
+        created automatically the next time points are evaluated in parallel.
+        
+        Args:
+            terminate (bool, optional): Option to stop the workers immediately, discarding any queued
+                evaluations, instead of waiting for them to finish. Defaults to False.
+        """
+        if self._pool is not None:
+            if terminate:
+                self._pool.terminate()
+            else:
+                self._pool.close()
+            self._pool.join()
+            self._pool = None
+            
+        if self._cache is not None:
+            self._cache.close()
+            self._cache = None
+        
     
-    def _compare_nodes(self, northwest: QuadNode, southeast: QuadNode, dir_northsouth: bool = False) -> None:
+    def _compare_nodes(self, northwest: QuadNode, southeast: QuadNode, dir_northsouth: bool = False) -> int:
         """Compare nodes.
 
-        Compare values of two nodes and split into 4 children if threshold is exceeded.
+        Compare values of two nodes and split into 4 children if threshold is exceeded. During a recursive
+        pass (see '_pass'), new children are filled right away; otherwise they are evaluated later, e.g.
+        together with the rest of the frontier (see '_forward').
 
         Args:
             northwest (QuadNode): First quadtree node.
             southeast (QuadNode): Second quadtree node.
             dir_northsouth (bool, optional): Whether the nodes being compared are aligned N-S. Defaults to False.
+            
+        Returns:
+            int: Number of nodes split.
         """
+        N_split = 0
+        
+        # skip regions in which nothing changed since the previous step (see '_forward')
+        if self._dirty is not None and northwest not in self._dirty and southeast not in self._dirty:
+            return N_split
         
         # if both northwest and southeast nodes are split
         if northwest._is_split() and southeast._is_split():
             if dir_northsouth:
-                self._compare_nodes(northwest.child_sw, southeast.child_nw, True)
-                self._compare_nodes(northwest.child_se, southeast.child_ne, True)
+                N_split += self._compare_nodes(northwest.child_sw, southeast.child_nw, True)
+                N_split += self._compare_nodes(northwest.child_se, southeast.child_ne, True)
             else:
-                self._compare_nodes(northwest.child_ne, southeast.child_nw, False)
-                self._compare_nodes(northwest.child_se, southeast.child_sw, False)
+                N_split += self._compare_nodes(northwest.child_ne, southeast.child_nw, False)
+                N_split += self._compare_nodes(northwest.child_se, southeast.child_sw, False)
                 
         # if northwest is split and southeast is NOT split
         elif northwest._is_split() and not southeast._is_split():
             if dir_northsouth:
-                self._compare_nodes(northwest.child_sw, southeast, True)
-                self._compare_nodes(northwest.child_se, southeast, True)
+                N_split += self._compare_nodes(northwest.child_sw, southeast, True)
+                N_split += self._compare_nodes(northwest.child_se, southeast, True)
             else:
-                self._compare_nodes(northwest.child_ne, southeast, False)
-                self._compare_nodes(northwest.child_se, southeast, False)
+                N_split += self._compare_nodes(northwest.child_ne, southeast, False)
+                N_split += self._compare_nodes(northwest.child_se, southeast, False)
             
         # if northwest is NOT split and southeast is split
         elif not northwest._is_split() and southeast._is_split():
             if dir_northsouth:
-                self._compare_nodes(northwest, southeast.child_nw, True)
-                self._compare_nodes(northwest, southeast.child_ne, True)
+                N_split += self._compare_nodes(northwest, southeast.child_nw, True)
+                N_split += self._compare_nodes(northwest, southeast.child_ne, True)
             else:
-                self._compare_nodes(northwest, southeast.child_nw, False)
-                self._compare_nodes(northwest, southeast.child_sw, False)
+                N_split += self._compare_nodes(northwest, southeast.child_nw, False)
+                N_split += self._compare_nodes(northwest, southeast.child_sw, False)
                 
-        # if neither node is split
-        else:
-            if abs(northwest.get_node_value(self.node_statistic) - southeast.get_node_value(self.node_statistic)) >= self.split_threshold:
-                if northwest.depth >= southeast.depth and southeast.depth < self.max_depth:
-                    southeast.split_node()
-                    self.fill(southeast, self.N_points)
-                    self._save_checkpoint()
-                    
-                if southeast.depth >= northwest.depth and northwest.depth < self.max_depth:
-                    northwest.split_node()
-                    self.fill(northwest, self.N_points)
-                    self._save_checkpoint()
-                    
+        # if neither node is split, during a recursive pass
+        elif self._fill_splits:
+            for split_node in self._compare_leaves(northwest, southeast):
+                self._fill_leaves(split_node)
+                self._save_checkpoint()
+                N_split += 1
+                
+        # if neither node is split (skip nodes that are still waiting to be filled)
+        elif self._is_filled(northwest) and self._is_filled(southeast) and \
+             not self._was_compared(northwest, southeast):
+            if self._compared is not None:
+                self._compared.add((northwest, southeast))
+                
+            N_split += len(self._compare_leaves(northwest, southeast))
                     
-    def fill(self, node: QuadNode, N_points: int) -> None:
-        """Fill.
-
-        Fill a given node with points.
-
-        Args:
-            node (QuadNode): The quadtree node to be filled.
-            N_points (int): Number of points to put inside this node.
-        """
-        if node._is_split():
-            self.fill(node.child_nw, N_points)
-            self.fill(node.child_ne, N_points)
-            self.fill(node.child_sw, N_points)
-            self.fill(node.child_se, N_points)
-            return
-        
-        if self.N_proc > 1:
-            self.evaluate_multiple_points(node, N_points)
-
-        else:
-            while len(node.node_points) < N_points:
-                point = self.evaluate_point(node, rng_seed=np.random.randint(1, 1e8))
-                node.node_points.append(point)
-     
-     
-    def evaluate_multiple_points(self, node: QuadNode, N_points: int) -> None:
-        """Evaulate multiple points.
+        return N_split
+    
+    
+    def _compare_leaves(self, node_a: QuadNode, node_b: QuadNode) -> list:
+        """Compare leaves.
 
-        Evaluate multiple points contained within a given node in parallel.
+        Compare values of two neighboring leaves and split the shallower one (or both, if they have
+        equal depth) when the threshold is exceeded.
 
         Args:
-            node (QuadNode): Node in which to evaulate points.
-            N_points (int): Maximum number of points to evaulate within this node.
+            node_a (QuadNode): First quadtree leaf.
+            node_b (QuadNode): Second quadtree leaf.
+            
+        Returns:
+            list: Nodes that were split.
         """
-        N_empty = int(N_points - len(node.node_points))
-        map_iters = [(node, np.random.randint(1, 1e8)) for _ in range(N_empty)]
+        split_nodes = []
         
-        with InterruptiblePool(processes=self.N_proc) as pool:
-            points = pool.starmap(self.evaluate_point, map_iters)
-            for point in points:
-                node.node_points.append(point)
+        if abs(node_a.get_node_value(self.node_statistic) - node_b.get_node_value(self.node_statistic)) >= self.split_threshold \
+           and self._is_significant(node_a, node_b):
+            if node_a.depth >= node_b.depth and node_b.depth < self.max_depth:
+                self._split_node(node_b)
+                split_nodes.append(node_b)
                 
+            if node_b.depth >= node_a.depth and node_a.depth < self.max_depth:
+                self._split_node(node_a)
+                split_nodes.append(node_a)
                 
-    @abc.abstractmethod
-    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
-        """Evaluate point.
-
-        Abstract method to calculate the value of one point within a given node.
+        return split_nodes
+    
+    
+    def _is_significant(self, node_a: QuadNode, node_b: QuadNode) -> bool:
+        """Is significant.
+        
+        Convenience function to test whether the values of two nodes differ by more than sampling noise,
+        at the 'split_confidence' level (always True if 'split_confidence' is None).
 
         Args:
-            node (QuadNode): Node in which to evaulate point.
-            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
-
+            node_a (QuadNode): First quadtree leaf.
+            node_b (QuadNode): Second quadtree leaf.
+            
         Returns:
-            QuadPoint: A QuadPoint object that has been evaluated.
+            bool: True if the difference is significant.
         """
-        pass
+        if self.split_confidence is None:
+            return True
+        
+        if self.split_test == 'stderr':
+            z = NormalDist().inv_cdf(0.5 + self.split_confidence / 2)
+            difference = node_a.get_node_value(self.node_statistic) - node_b.get_node_value(self.node_statistic)
+            
+            return abs(difference) > z * np.hypot(self._standard_error(node_a), self._standard_error(node_b))
+        
+        # bootstrap interval of the difference, with a fixed generator so that decisions are reproducible
+        rng = np.random.default_rng(0)
+        statistic = {'mean': np.mean, 'std': np.std, 'median': np.median}[self.node_statistic]
+        resampled = []
+        for node in (node_a, node_b):
+            values = node.node_points.values
+            resampled.append(statistic(values[rng.integers(0, len(values), (self.bootstrap_samples, len(values)))], axis=1))
+        lower, upper = np.quantile(resampled[0] - resampled[1], [0.5 - self.split_confidence / 2, 0.5 + self.split_confidence / 2])
+        
+        return lower > 0 or upper < 0
     
     
-    def _save_checkpoint(self) -> None:
-        """Save checkpoint.
+    def _split_node(self, node: QuadNode) -> None:
+        """Split node.
         
-        Convenience function to save progress and update node count (called any time a node is split).
+        Convenience function to split a node and update the node count.
+
+        Args:
+            node (QuadNode): Quadtree node to split.
         """
+        node.split_node(self.half_open)
         self.node_count = self.node_count + 3
-        self.print_all_points()
-        self.print_all_nodes()
-        if self.verbose:
-            print(f"Progress saved. (nodes = {self.node_count})")
         
-    
-    def print_all_points(self) -> None:
-        """Print all points.
+        if self.journal:
+            self._journal_pending.append(self._split_entry(node))
         
-        Print all current quadtree points to a file ('filename_points').
+        if self._parents is not None:
+            for child in (node.child_nw, node.child_ne, node.child_sw, node.child_se):
+                self._parents[child] = node
+                
+        if self._paths is not None:
+            children = (node.child_nw, node.child_ne, node.child_sw, node.child_se)
+            for i, child in enumerate(children):
+                self._paths[child] = self._paths[node] + (i,)
+            self._mark_dirty(node)
+            self._dirty.update(children)
+            self._changed.extend(children)
+            self._unfilled.update(children)
+            
+        if self._neighbors is not None:
+            self._update_neighbors(node)
+                
+                
+    def _was_compared(self, northwest: QuadNode, southeast: QuadNode) -> bool:
+        """Was compared.
+        
+        Convenience function to check whether two nodes, or the nodes they were split from during
+        the current sweep, have already been compared with each other in this sweep.
+
+        Args:
+            northwest (QuadNode): First quadtree node.
+            southeast (QuadNode): Second quadtree node.
+            
+        Returns:
+            bool: True if this pair of regions was already compared.
         """
-        stdout_ = sys.stdout
-        f = open(self.filename_points, 'w')
-        sys.stdout = f
+        if self._compared is None:
+            return False
         
-        print("# x \t y \t value")
-        self.root.print_node_points()
-        sys.stdout = stdout_
+        # like a recursive pass, nodes split to reach min_depth are first compared in the next sweep
+        lineage_nw = [northwest]
+        while lineage_nw[-1] in self._parents:
+            lineage_nw.append(self._parents[lineage_nw[-1]])
+            
+        lineage_se = [southeast]
+        while lineage_se[-1] in self._parents:
+            lineage_se.append(self._parents[lineage_se[-1]])
+            
+        if any(node in self._deferred for node in lineage_nw + lineage_se):
+            return True
         
-        f.close()
+        return any((nw, se) in self._compared for nw in lineage_nw for se in lineage_se)
         
-    
-    def print_all_nodes(self) -> None:
-        """Print all nodes.
         
-        Print all current quadtree node values to a file ('filename_nodes').
+    def _is_filled(self, node: QuadNode) -> bool:
+        """Is filled.
+        
+        Convenience function to check whether a node holds its full set of points.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            bool: True if the node contains at least 'N_points' points, or in adaptive mode
+            (see `N_min`) at least 'N_min' points with a precise enough node value.
         """
-        stdout_ = sys.stdout
-        f = open(self.filename_nodes, 'w')
-        sys.stdout = f
+        N = len(node.node_points)
+        if N >= self.N_points:
+            return True
+        elif self.N_min is None or N < self.N_min:
+            return False
         
-        print("# Depth \t x_min \t x_max \t y_min \t y_max \t node value")
-        self.root.print_node_value(self.node_statistic)
-        sys.stdout = stdout_
+        return self._confidence_halfwidth(node) <= self.adaptive_tolerance * self.split_threshold
+    
+    
+    def _confidence_halfwidth(self, node: QuadNode) -> float:
+        """Confidence halfwidth.
         
-        f.close()
+        Convenience function to estimate the uncertainty of a node's value, as 'adaptive_z' times
+        the standard error of the node statistic.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            float: Half-width of the confidence interval of the node value.
+        """
+        return self.adaptive_z * self._standard_error(node)
     
     
-    def load_points(self) -> None:
-        """Load points.
+    def _standard_error(self, node: QuadNode) -> float:
+        """Standard error.
         
-        Load all points from a previously saved quadtree.
+        Convenience function to estimate the standard error of a node's value from the spread of its points.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            float: Standard error of the node value (inf for fewer than two points).
         """
-        with open(self.filename_points, 'r') as f:
-            for line in f:
-                if line[0] == "#":
-                    continue
-                line_spl = line.split('\t')
-                point = QuadPoint(float(line_spl[0]), float(line_spl[1]), float(line_spl[2]))
-                self.root.node_points.append(point)
+        N = len(node.node_points)
+        if N < 2:
+            return np.inf
         
-        self.squeeze_node(self.root)
+        std = np.std(node.node_points.values, ddof=1)
         
+        if self.node_statistic == 'median':
+            error = np.sqrt(np.pi / 2) * std / np.sqrt(N)
+        elif self.node_statistic == 'std':
+            error = std / np.sqrt(2 * (N - 1))
+        else:
+            error = std / np.sqrt(N)
+            
+        return error
     
-    def squeeze_node(self, node: QuadNode) -> None:
+    
+    def _fill_target(self, node: QuadNode) -> int:
+        """Fill target.
+        
+        Convenience function to get the number of points a node should hold after its next evaluation,
+        i.e. 'N_points', or in adaptive mode (see `N_min`) another batch of 'N_min' points.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            int: Number of points.
+        """
+        if self.N_min is None:
+            return self.N_points
+        
+        return min(self.N_points, max(self.N_min, len(node.node_points) + self.N_min))
+    
+    
+    def _collect_leaves(self, node: QuadNode, leaves: list) -> None:
+        """Collect leaves.
+        
+        Convenience function to gather every leaf (unsplit node) below a given node.
+
+        Args:
+            node (QuadNode): Starting quadtree node.
+            leaves (list): List to which the leaves are appended.
+        """
+        if node._is_split():
+            self._collect_leaves(node.child_nw, leaves)
+            self._collect_leaves(node.child_ne, leaves)
+            self._collect_leaves(node.child_sw, leaves)
+            self._collect_leaves(node.child_se, leaves)
+        else:
+            leaves.append(node)
+            
+            
+    def _find_neighbors(self, node: QuadNode) -> list:
+        """Find neighbors.
+        
+        Find every leaf that shares an edge with a given leaf.
+
+        Args:
+            node (QuadNode): Quadtree leaf.
+            
+        Returns:
+            list: Neighboring leaves.
+        """
+        neighbors = []
+        self._collect_neighbors(self.root, node, neighbors)
+        
+        return neighbors
+    
+    
+    def _collect_neighbors(self, current: QuadNode, node: QuadNode, neighbors: list) -> None:
+        """Collect neighbors.
+        
+        Convenience function to walk the quadtree and gather leaves that share an edge with a given leaf.
+
+        Args:
+            current (QuadNode): Quadtree node currently being searched.
+            node (QuadNode): Quadtree leaf whose neighbors are wanted.
+            neighbors (list): List to which the neighbors are appended.
+        """
+        # skip anything that does not touch this node
+        if current.x_min > node.x_max or current.x_max < node.x_min or \
+           current.y_min > node.y_max or current.y_max < node.y_min:
+            return
+        
+        if current._is_split():
+            self._collect_neighbors(current.child_nw, node, neighbors)
+            self._collect_neighbors(current.child_ne, node, neighbors)
+            self._collect_neighbors(current.child_sw, node, neighbors)
+            self._collect_neighbors(current.child_se, node, neighbors)
+            return
+        
+        if current is not node and self._shares_edge(current, node):
+            neighbors.append(current)
+            
+            
+    @staticmethod
+    def _shares_edge(node_a: QuadNode, node_b: QuadNode) -> bool:
+        """Shares edge.
+        
+        Convenience function to check whether two non-overlapping nodes share an edge.
+
+        Args:
+            node_a (QuadNode): First quadtree node.
+            node_b (QuadNode): Second quadtree node.
+            
+        Returns:
+            bool: True if the nodes share (part of) an edge, and False if they only touch at a corner, or not at all.
+        """
+        x_overlap = min(node_a.x_max, node_b.x_max) > max(node_a.x_min, node_b.x_min)
+        y_overlap = min(node_a.y_max, node_b.y_max) > max(node_a.y_min, node_b.y_min)
+        
+        return (x_overlap and (node_a.y_min == node_b.y_max or node_a.y_max == node_b.y_min)) or \
+               (y_overlap and (node_a.x_min == node_b.x_max or node_a.x_max == node_b.x_min))
+    
+    
+    def _index_neighbors(self, leaves: list) -> None:
+        """Index neighbors.
+        
+        Start keeping the neighbors of every leaf. The index is then updated as leaves are split
+        (see '_update_neighbors'), so looking up the neighbors of a leaf (see '_leaf_neighbors')
+        no longer searches the quadtree.
+
+        Args:
+            leaves (list): Every leaf of the quadtree.
+        """
+        self._neighbors = {leaf: set(self._find_neighbors(leaf)) for leaf in leaves}
+        self._leaf_paths = {leaf: self._tree_path(leaf) for leaf in leaves}
+        
+        
+    def _update_neighbors(self, node: QuadNode) -> None:
+        """Update neighbors.
+        
+        Convenience function to replace a leaf that was just split by its children in the neighbor index.
+        Only the neighbors of the split leaf can border its children.
+
+        Args:
+            node (QuadNode): Quadtree node that was split.
+        """
+        children = (node.child_nw, node.child_ne, node.child_sw, node.child_se)
+        neighbors = self._neighbors.pop(node)
+        path = self._leaf_paths.pop(node)
+        for i, child in enumerate(children):
+            self._neighbors[child] = set()
+            self._leaf_paths[child] = path + (i,)
+            
+        pairs = [(node.child_nw, node.child_ne), (node.child_sw, node.child_se),
+                 (node.child_nw, node.child_sw), (node.child_ne, node.child_se)]
+        for neighbor in neighbors:
+            self._neighbors[neighbor].discard(node)
+            pairs.extend((child, neighbor) for child in children if self._shares_edge(child, neighbor))
+            
+        for node_a, node_b in pairs:
+            self._neighbors[node_a].add(node_b)
+            self._neighbors[node_b].add(node_a)
+            
+            
+    def _leaf_neighbors(self, node: QuadNode) -> list:
+        """Leaf neighbors.
+        
+        Find every leaf that shares an edge with a given leaf, from the neighbor index if it is kept
+        (see '_index_neighbors'), in the same order as '_find_neighbors'.
+
+        Args:
+            node (QuadNode): Quadtree leaf.
+            
+        Returns:
+            list: Neighboring leaves.
+        """
+        if self._neighbors is None:
+            return self._find_neighbors(node)
+        
+        return sorted(self._neighbors[node], key=self._leaf_paths.get)
+    
+    
+    def _tree_path(self, node: QuadNode) -> tuple:
+        """Tree path.
+        
+        Convenience function to get the child indices (0 = NW, 1 = NE, 2 = SW, 3 = SE) leading from the root to a node.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            tuple: Child indices.
+        """
+        x = 0.5 * (node.x_min + node.x_max)
+        y = 0.5 * (node.y_min + node.y_max)
+        
+        path = []
+        current = self.root
+        while current is not node:
+            index = 2 * int(y < 0.5 * (current.y_min + current.y_max)) + int(x > 0.5 * (current.x_min + current.x_max))
+            current = (current.child_nw, current.child_ne, current.child_sw, current.child_se)[index]
+            path.append(index)
+            
+        return tuple(path)
+    
+    
+                    
+    def _fill_leaves(self, node: QuadNode) -> int:
+        """Fill leaves.
+        
+        Convenience function to fill every leaf below a given node that still needs points, as one batch
+        (in several rounds in adaptive mode, see `N_min`).
+
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            int: Number of leaves filled.
+        """
+        leaves = []
+        self._collect_leaves(node, leaves)
+        leaves = [leaf for leaf in leaves if not self._is_filled(leaf)]
+        N_filled = len(leaves)
+        
+        while len(leaves) > 0:
+            self.evaluate_nodes(leaves, [self._fill_target(leaf) for leaf in leaves])
+            leaves = [leaf for leaf in leaves if not self._is_filled(leaf)]
+            
+        return N_filled
+    
+    
+    def fill(self, node: QuadNode, N_points: int) -> None:
+        """Fill.
+
+        Fill a given node with points. If the node is split, all of its leaves are filled as one batch.
+
+        Args:
+            node (QuadNode): The quadtree node to be filled.
+            N_points (int): Number of points to put inside this node.
+        """
+        leaves = []
+        self._collect_leaves(node, leaves)
+        self.evaluate_nodes(leaves, N_points)
+     
+     
+    def evaluate_multiple_points(self, node: QuadNode, N_points: int) -> None:
+        """Evaulate multiple points.
+
+        Evaluate multiple points contained within a given node in parallel.
+
+        Args:
+            node (QuadNode): Node in which to evaulate points.
+            N_points (int): Maximum number of points to evaulate within this node.
+        """
+        self.evaluate_nodes([node], N_points)
+        
+        
+    def evaluate_nodes(self, nodes: list, N_points: int) -> None:
+        """Evaluate nodes.
+
+        Evaluate the missing points of several nodes as a single batch, so that all 'N_proc' cores
+        stay busy across node boundaries, then hand the results back to their nodes.
+
+        Args:
+            nodes (list): Quadtree nodes (leaves) in which to evaluate points.
+            N_points (int or list): Number of points each node should contain, or one number per node.
+        """
+        if self._has_evaluate_points():
+            self._evaluate_nodes_batched(nodes, N_points)
+            return
+        
+        tasks = []
+        for node, N_target in zip(nodes, self._per_node(N_points, nodes)):
+            N_filled = len(node.node_points)
+            tasks.extend((node, 0, self._new_seed(node, N_filled + i)) for i in range(int(N_target - N_filled)))
+            
+        if len(tasks) == 0:
+            return
+        
+        targets = self._task_targets(tasks)
+        cached = self._cache_lookup(tasks)
+        missing = [i for i, points in enumerate(cached) if points is None]
+        
+        if len(missing) == 0:
+            points = []
+        elif self._is_parallel():
+            points = self._get_pool().starmap(_evaluate_point_task,
+                                              [(self._bounds(targets[i]), tasks[i][2]) for i in missing]
+                                              )
+        else:
+            points = [self._timed_evaluate_point(targets[i], tasks[i][2]) for i in missing]
+        self._cache_store([tasks[i] for i in missing], [[point] for point in points])
+            
+        # scatter results back to their nodes (starmap preserves the task order)
+        points = iter(points)
+        for (node, _, _), cached_points in zip(tasks, cached):
+            self._add_points(node, cached_points if cached_points is not None else [next(points)])
+            
+            
+    @staticmethod
+    def _per_node(N_points: object, nodes: list) -> list:
+        """Per node.
+        
+        Convenience function to expand a number of points into one number per node.
+
+        Args:
+            N_points (int or list): Number of points for all nodes, or one number per node.
+            nodes (list): Quadtree nodes.
+            
+        Returns:
+            list: Number of points for each node.
+        """
+        if isinstance(N_points, (list, tuple)):
+            return list(N_points)
+        
+        return [N_points] * len(nodes)
+    
+    
+    def _evaluate_nodes_batched(self, nodes: list, N_points: int) -> None:
+        """Evaluate nodes batched.
+
+        Same as 'evaluate_nodes', but with a single call to 'evaluate_points' for each node.
+
+        Args:
+            nodes (list): Quadtree nodes (leaves) in which to evaluate points.
+            N_points (int or list): Number of points each node should contain, or one number per node.
+        """
+        tasks = []
+        for node, N_target in zip(nodes, self._per_node(N_points, nodes)):
+            N_filled = len(node.node_points)
+            N_empty = int(N_target - N_filled)
+            if N_empty > 0:
+                tasks.append((node, N_empty, self._new_seed(node, N_filled)))
+                
+        if len(tasks) == 0:
+            return
+        
+        targets = self._task_targets(tasks)
+        cached = self._cache_lookup(tasks)
+        missing = [i for i, points in enumerate(cached) if points is None]
+        
+        if len(missing) == 0:
+            results = []
+        elif self._is_parallel():
+            results = self._get_pool().starmap(_evaluate_points_task,
+                                               [(self._bounds(tasks[i][0]), *tasks[i][1:], targets[i]) for i in missing]
+                                               )
+        else:
+            results = [self._timed_evaluate_points(*tasks[i], targets[i]) for i in missing]
+        results = [self._to_points(*result) for result in results]
+        self._cache_store([tasks[i] for i in missing], results)
+            
+        results = iter(results)
+        for (node, _, _), cached_points in zip(tasks, cached):
+            self._add_points(node, cached_points if cached_points is not None else next(results))
+            
+            
+    def _has_evaluate_points(self) -> bool:
+        """Has evaluate points.
+        
+        Convenience function to check whether this quadtree can evaluate whole batches of points at once,
+        i.e. whether a subclass provides 'evaluate_points'.
+
+        Returns:
+            bool: True if 'evaluate_points' should be used instead of 'evaluate_point'.
+        """
+        return type(self).evaluate_points is not BaseTree.evaluate_points
+    
+    
+    @staticmethod
+    def _bounds(node: QuadNode) -> tuple:
+        """Bounds.
+
+        Convenience function to get the limits of a node, which is all that is sent to the workers.
+
+        Args:
+            node (QuadNode): Quadtree node.
+
+        Returns:
+            tuple: Node limits (x_min, x_max, y_min, y_max, depth).
+        """
+        return (node.x_min, node.x_max, node.y_min, node.y_max, node.depth)
+    
+    
+    @staticmethod
+    def _to_points(x: np.ndarray, y: np.ndarray, value: np.ndarray, flag: int = 0) -> list:
+        """To points.
+        
+        Convenience function to convert arrays of coordinates and values into QuadPoint objects.
+
+        Args:
+            x (:obj:`np.ndarray`): x coordinates.
+            y (:obj:`np.ndarray`): y coordinates.
+            value (:obj:`np.ndarray`): Point values.
+            flag (int, optional): Flag of all points. Defaults to 0.
+
+        Returns:
+            list: QuadPoint objects.
+        """
+        return [QuadPoint(float(x_i), float(y_i), float(value_i), flag) for x_i, y_i, value_i in zip(x, y, value)]
+    
+    
+    @staticmethod
+    def _draw_locations(node: QuadNode, N_points: int, rng_seed: int) -> tuple:
+        """Draw locations.
+        
+        Convenience function to repeat the location draws of 'evaluate_point' (N_points = 1) or 'evaluate_points'
+        for a given seed, i.e. uniform x values, then uniform y values, within the node.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            N_points (int): Number of points.
+            rng_seed (int): Random number generator seed.
+
+        Returns:
+            tuple: Arrays of x coordinates and y coordinates.
+        """
+        rng = np.random.default_rng(rng_seed)
+        x = rng.uniform(node.x_min, node.x_max, N_points)
+        y = rng.uniform(node.y_min, node.y_max, N_points)
+        
+        return x, y
+    
+    
+    def _sample_locations(self, node: QuadNode, N_points: int, rng_seed: int) -> tuple:
+        """Sample locations.
+
+        Choose the locations of new points within a node with `sampler`, given the points it already holds.
+
+        Args:
+            node (QuadNode): Quadtree node.
+            N_points (int): Number of new points.
+            rng_seed (int): Random number generator seed.
+
+        Returns:
+            tuple: Arrays of x coordinates and y coordinates.
+        """
+        dx = node.x_max - node.x_min
+        dy = node.y_max - node.y_min
+        existing = np.stack(((node.node_points.x - node.x_min) / dx, (node.node_points.y - node.y_min) / dy), axis=1)
+        
+        unit = sample(self.sampler, N_points, np.clip(existing, 0, 1),
+                      np.random.default_rng(rng_seed))
+        
+        return node.x_min + unit[:, 0] * dx, node.y_min + unit[:, 1] * dy
+    
+    
+    def _task_targets(self, tasks: list) -> list:
+        """Task targets.
+
+        Convenience function to decide where each evaluation takes place. With the default 'uniform' `sampler`, 
+        evaluations draw their own locations within their node. Otherwise, the locations of all new points of a node
+        are chosen together (see '_sample_locations'), seeded by the first evaluation of that node.
+
+        Args:
+            tasks (list): (node, N_points, seed) evaluations, with N_points = 0 for 'evaluate_point' calls.
+
+        Returns:
+            list: For each evaluation, the node to pass to 'evaluate_point' (N_points = 0), or the
+            locations to pass to 'evaluate_points' (None for uniform draws).
+        """
+        if self.sampler == 'uniform':
+            return [node if n == 0 else None for node, n, _ in tasks]
+        
+        N_new = collections.Counter()
+        for node, n, _ in tasks:
+            N_new[node] += max(n, 1)
+            
+        targets = []
+        locations = {}
+        for node, n, seed in tasks:
+            if node not in locations:
+                locations[node] = (*self._sample_locations(node, N_new[node], seed), 0)
+            x, y, i = locations[node]
+            
+            if n > 0:
+                targets.append((x[i:i + n], y[i:i + n]))
+            else:
+                # nodes cannot have zero width, so span one floating point step from the chosen location
+                targets.append(QuadNode(x[i], np.nextafter(x[i], np.inf), y[i], np.nextafter(y[i], np.inf), node.depth))
+            locations[node] = (x, y, i + max(n, 1))
+            
+        return targets
+    
+    
+    def _timed_evaluate_point(self, node: QuadNode, rng_seed: int) -> QuadPoint:
+        """Timed evaluate point.
+
+        Same as 'evaluate_point', but limited to 'timeout' seconds (if given). See `timeout`.
+
+        Args:
+            node (QuadNode): Node in which to evaulate point.
+            rng_seed (int): Random number generator seed.
+
+        Returns:
+            QuadPoint: A QuadPoint object that has been evaluated.
+        """
+        if self.timeout is None:
+            return self.evaluate_point(node, rng_seed=rng_seed)
+        
+        seeds = [rng_seed]
+        if self.timeout_resample:
+            seeds.append(int(np.random.default_rng(rng_seed).integers(1, 1e8)))
+            
+        for seed in seeds:
+            timed_out, point = _call_with_timeout(self.evaluate_point, (node, seed), self.timeout)
+            if not timed_out:
+                return point
+            
+        x, y = self._draw_locations(node, 1, seed)
+        
+        return QuadPoint(float(x[0]), float(y[0]), self.timeout_value, QuadPoint.FLAG_TIMEOUT)
+    
+    
+    def _timed_evaluate_points(self, node: QuadNode, N_points: int, rng_seed: int, locations: tuple = None) -> tuple:
+        """Timed evaluate points.
+
+        Same as 'evaluate_points', but limited to 'timeout' seconds per point (if given). See `timeout`.
+
+        Args:
+            node (QuadNode): Node in which to evaulate points.
+            N_points (int): Number of points to evaluate.
+            rng_seed (int): Random number generator seed.
+            locations (tuple, optional): Arrays of x and y coordinates chosen by `sampler`. Defaults to None.
+
+        Returns:
+            tuple: Arrays of x coordinates, y coordinates, and values, and the flag of all points.
+        """
+        def evaluate(seed: int) -> tuple:
+            if locations is None:
+                return self.evaluate_points(node, N_points, rng_seed=seed)
+            return self.evaluate_points(node, N_points, rng_seed=seed, locations=locations)
+        
+        if self.timeout is None:
+            return (*evaluate(rng_seed), 0)
+        
+        seeds = [rng_seed]
+        if self.timeout_resample:
+            seeds.append(int(np.random.default_rng(rng_seed).integers(1, 1e8)))
+            
+        for seed in seeds:
+            timed_out, result = _call_with_timeout(evaluate, (seed,), self.timeout * N_points)
+            if not timed_out:
+                return (*result, 0)
+            
+        x, y = self._draw_locations(node, N_points, seed) if locations is None else locations
+        
+        return x, y, np.full(N_points, self.timeout_value), QuadPoint.FLAG_TIMEOUT
+                
+                
+    @abc.abstractmethod
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        """Evaluate point.
+
+        Abstract method to calculate the value of one point within a given node.
+
+        Args:
+            node (QuadNode): Node in which to evaulate point.
+            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
+
+        Returns:
+            QuadPoint: A QuadPoint object that has been evaluated.
+        """
+        pass
+    
+    
+    def evaluate_points(self, node: QuadNode, N_points: int, rng_seed: int = 123456, locations: tuple = None) -> tuple:
+        """Evaluate points.
+
+        Optional method to calculate the values of several points within a given node in one call.
+        Subclasses that can evaluate points in bulk (e.g. with vectorized NumPy code) should override
+        this method; it is then used instead of 'evaluate_point' whenever nodes are filled.
+
+        Args:
+            node (QuadNode): Node in which to evaulate points.
+            N_points (int): Number of points to evaluate.
+            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
+            locations (tuple, optional): Arrays of x and y coordinates to evaluate, chosen by `sampler`.
+                Only passed if `sampler` is not 'uniform'. Defaults to None, i.e. uniform draws.
+
+        Returns:
+            tuple: Arrays of x coordinates, y coordinates, and values, each with length 'N_points'.
+        """
+        raise NotImplementedError('evaluate_points is not implemented for this quadtree.')
+    
+    
+    def _save_checkpoint(self) -> None:
+        """Save checkpoint.
+        
+        Convenience function to save progress (called after every refinement step).
+        With `journal`, new points and splits are appended to the journal instead (see '_write_journal'),
+        and with `checkpoint_file`, the quadtree is saved there (see 'save_tree').
+        """
+        if self.checkpoint_file is not None:
+            self.save_tree(self.checkpoint_file)
+        elif self.journal:
+            self._write_journal()
+        else:
+            self.print_all_points()
+            self.print_all_nodes()
+        if self.verbose:
+            print(f"Progress saved. (nodes = {self.node_count})")
+        
+    
+    @property
+    def filename_journal(self) -> str:
+        """Name of the journal file (see `journal`)."""
+        return self.filename_points + '.journal'
+    
+    
+    @staticmethod
+    def _split_entry(node: QuadNode) -> str:
+        """Split entry.
+        
+        Convenience function to format the journal entry of a split, identifying the node by its depth
+        and (exact) center.
+
+        Args:
+            node (QuadNode): Quadtree node that was split.
+            
+        Returns:
+            str: Journal line.
+        """
+        return f"S\t{node.depth}\t{0.5 * (node.x_min + node.x_max)!r}\t{0.5 * (node.y_min + node.y_max)!r}\n"
+    
+    
+    def _write_journal(self) -> None:
+        """Write journal.
+        
+        Append the points and splits recorded since the last checkpoint to the journal, then compact
+        the journal into the output files once it holds as many entries as they do.
+        """
+        if len(self._journal_pending) > 0:
+            with open(self.filename_journal, 'a') as f:
+                f.writelines(self._journal_pending)
+            self._journal_entries += len(self._journal_pending)
+            self._journal_pending = []
+            
+        if self._journal_entries > self._snapshot_entries:
+            self._compact_journal()
+            
+            
+    def _compact_journal(self) -> None:
+        """Compact journal.
+        
+        Rewrite the output files with all points and nodes, and replace the journal by the splits
+        of the current quadtree. The journal is replaced first, so that an interruption in between
+        loses the newest points instead of recording them twice.
+        """
+        entries = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            if node._is_split():
+                entries.append(self._split_entry(node))
+                stack.extend((node.child_se, node.child_sw, node.child_ne, node.child_nw))
+                
+        with open(self.filename_journal + '.tmp', 'w') as f:
+            f.write("# x \t y \t value, or S \t depth \t x \t y of split nodes\n")
+            f.writelines(entries)
+        os.replace(self.filename_journal + '.tmp', self.filename_journal)
+        
+        self.print_all_points()
+        self.print_all_nodes()
+        
+        leaves = []
+        self._collect_leaves(self.root, leaves)
+        self._snapshot_entries = sum(len(leaf.node_points) for leaf in leaves)
+        self._journal_entries = 0
+        self._journal_pending = []
+        
+        
+    def _replay_journal(self) -> None:
+        """Replay journal.
+        
+        Add the points recorded in the journal to the root node, and repeat the recorded splits
+        (which also distribute the points to the children).
+        """
+        splits = []
+        with open(self.filename_journal, 'r') as f:
+            for line in f:
+                if line[0] == "#":
+                    continue
+                line_spl = line.split('\t')
+                self._journal_entries += 1
+                if line_spl[0] == 'S':
+                    splits.append((int(line_spl[1]), float(line_spl[2]), float(line_spl[3])))
+                else:
+                    self.root.node_points.append(QuadPoint(float(line_spl[0]), float(line_spl[1]), float(line_spl[2])))
+                    
+        for depth, x, y in splits:
+            node = self.root
+            while node.depth < depth and node._is_split():
+                x_center = 0.5 * (node.x_min + node.x_max)
+                y_center = 0.5 * (node.y_min + node.y_max)
+                if y >= y_center:
+                    node = node.child_ne if x >= x_center else node.child_nw
+                else:
+                    node = node.child_se if x >= x_center else node.child_sw
+            if node.depth == depth and not node._is_split():
+                self._split_node(node)
+                
+        self._journal_pending = []
+        
+        
+    def print_all_points(self) -> None:
+        """Print all points.
+        
+        Print all current quadtree points to a file ('filename_points').
+        """
+        stdout_ = sys.stdout
+        f = open(self.filename_points, 'w')
+        sys.stdout = f
+        
+        print("# x \t y \t value")
+        self.root.print_node_points()
+        sys.stdout = stdout_
+        
+        f.close()
+        
+    
+    def print_all_nodes(self) -> None:
+        """Print all nodes.
+        
+        Print all current quadtree node values to a file ('filename_nodes').
+        """
+        stdout_ = sys.stdout
+        f = open(self.filename_nodes, 'w')
+        sys.stdout = f
+        
+        print("# Depth \t x_min \t x_max \t y_min \t y_max \t node value")
+        self.root.print_node_value(self.node_statistic)
+        sys.stdout = stdout_
+        
+        f.close()
+    
+    
+    def load_points(self) -> None:
+        """Load points.
+        
+        Load all points from a previously saved quadtree, and split nodes as in 'squeeze_node' (see '_grow_tree').
+        With `journal`, the splits and points recorded in the journal are replayed as well (see '_replay_journal').
+        """
+        if self.journal and os.path.exists(self.filename_journal) and not os.path.exists(self.filename_points):
+            self._replay_journal()
+            self.squeeze_node(self.root)
+            return
+        
+        with open(self.filename_points, 'r') as f, warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # a file without points is not an error
+            points = np.loadtxt(f, delimiter='\t', comments='#', usecols=(0, 1, 2), ndmin=2)
+        
+        if self.journal:
+            self.root.node_points.extend(PointList.from_arrays(*points.T))
+            self._snapshot_entries = len(self.root.node_points)
+            if os.path.exists(self.filename_journal):
+                self._replay_journal()
+            self.squeeze_node(self.root)
+        else:
+            self._grow_tree(points)
+        
+    
+    def save_tree(self, filename: str) -> None:
+        """Save tree.
+        
+        Save the exact quadtree to a NumPy .npz file: the depth, limits, and split flag of every node
+        (in depth-first order, children ordered NW, NE, SW, SE), and the full-precision coordinates, values,
+        and flags of all points, with the index of the leaf holding each point. The file is replaced atomically.
+
+        Args:
+            filename (str): Name of the file.
+        """
+        nodes = []
+        stack = [self.root]
+        while len(stack) > 0:
+            node = stack.pop()
+            nodes.append(node)
+            if node._is_split():
+                stack.extend((node.child_se, node.child_sw, node.child_ne, node.child_nw))
+                
+        limits = np.array([(node.x_min, node.x_max, node.y_min, node.y_max) for node in nodes], dtype=float).reshape(-1, 4)
+        points = [node.node_points for node in nodes]
+        
+        with open(filename + '.tmp', 'wb') as f:
+            np.savez(f,
+                     depth=np.array([node.depth for node in nodes], dtype=np.int64),
+                     limits=limits,
+                     split=np.array([node._is_split() for node in nodes], dtype=bool),
+                     points=np.stack([np.concatenate([node_points.x for node_points in points]),
+                                      np.concatenate([node_points.y for node_points in points]),
+                                      np.concatenate([node_points.values for node_points in points]).astype(float)], axis=1),
+                     flag=np.concatenate([node_points.flags for node_points in points]),
+                     leaf=np.repeat(np.arange(len(nodes), dtype=np.int64), [len(node_points) for node_points in points])
+                     )
+        os.replace(filename + '.tmp', filename)
+        
+        
+    def load_tree(self, filename: str) -> None:
+        """Load tree.
+        
+        Restore the exact quadtree saved by 'save_tree', replacing all current nodes and points.
+
+        Args:
+            filename (str): Name of the file.
+        """
+        with np.load(filename) as data:
+            depth = data['depth']
+            limits = data['limits']
+            split = data['split']
+            points = data['points']
+            flag = data['flag']
+            leaf = data['leaf']
+            
+        if tuple(limits[0]) != (self.root.x_min, self.root.x_max, self.root.y_min, self.root.y_max):
+            raise ValueError('the saved quadtree has different limits.')
+        
+        nodes = [QuadNode(*node_limits, node_depth) for node_limits, node_depth in zip(limits.tolist(), depth.tolist())]
+        
+        # rebuild the topology from the depth-first order
+        stack = []
+        for i, node in enumerate(nodes):
+            if len(stack) > 0:
+                parent, children = stack[-1]
+                children.append(node)
+                if len(children) == 4:
+                    parent.child_nw, parent.child_ne, parent.child_sw, parent.child_se = children
+                    stack.pop()
+            if split[i]:
+                stack.append((node, []))
+                
+        # hand the points to their leaves
+        order = np.argsort(leaf, kind='stable')
+        bounds = np.flatnonzero(np.diff(leaf[order])) + 1
+        for indices in np.split(order, bounds):
+            if len(indices) > 0:
+                nodes[leaf[indices[0]]].node_points = PointList.from_arrays(*points[indices].T, flag[indices])
+                
+        self.root = nodes[0]
+        self.node_count = 1 + 3 * int(np.count_nonzero(split))
+        
+        
+    def _grow_tree(self, points: np.ndarray) -> None:
+        """Grow tree.
+        
+        Convenience function to build the quadtree holding a set of loaded points, one level at a time: the
+        quadrant of every point in a node with more than `N_points` points is computed at once, and the points
+        are handed to the leaves only at the end. The result is the same as adding all points to the root
+        and calling 'squeeze_node' (boundary points are handled as in 'QuadNode.split_node', and each leaf
+        keeps its points in file order), without handing points down one node at a time.
+
+        Args:
+            points (:obj:`np.ndarray`): Loaded points (x, y, value), with shape (N, 3).
+        """
+        x, y = points[:, 0], points[:, 1]
+        index = np.arange(len(points))  # points not yet assigned to a leaf
+        owner = np.zeros(len(points), dtype=np.int64)  # their node in the current level
+        level = [self.root]
+        leaves = []
+        
+        while len(level) > 0:
+            count = np.bincount(owner, minlength=len(level))
+            split = (count > self.N_points) & np.array([node.depth < self.max_depth for node in level], dtype=bool)
+            
+            in_leaf = ~split[owner]
+            leaves.append((level, index[in_leaf], owner[in_leaf]))
+            index, owner = index[~in_leaf], owner[~in_leaf]
+            
+            # children of all split nodes, in the order NW, NE, SW, SE
+            rank = np.cumsum(split) - 1
+            children = []
+            for node in [node for node, node_split in zip(level, split) if node_split]:
+                self._split_node(node)
+                children.extend((node.child_nw, node.child_ne, node.child_sw, node.child_se))
+                
+            limits = np.array([(node.x_min, node.x_max, node.y_min, node.y_max) for node in level], dtype=float).reshape(-1, 4)
+            quadrant = quadrant_codes(x[index], y[index], *limits[owner].T, self.half_open)
+            inside = quadrant >= 0
+            index, owner = index[inside], (4 * rank[owner] + quadrant)[inside]
+            level = children
+            
+        for level, index, owner in leaves:
+            order = np.argsort(owner, kind='stable')
+            bounds = np.flatnonzero(np.diff(owner[order])) + 1
+            for start, indices in zip(np.concatenate(([0], bounds)), np.split(index[order], bounds)):
+                if len(indices) > 0:
+                    level[owner[order[start]]].node_points = PointList.from_arrays(*points[indices].T)
+        
+        
+    def squeeze_node(self, node: QuadNode) -> None:
         """Squeeze node.
         
         Distribute quadtree points from parent to children.
         """
         if len(node.node_points) > self.N_points and node.depth < self.max_depth:
-            node.split_node()
-            self.node_count = self.node_count + 3
+            self._split_node(node)
         
         if node._is_split():
             self.squeeze_node(node.child_nw)
@@ -282,11 +1698,31 @@ class BaseTree(abc.ABC):
             self.squeeze_node(node.child_se)
             
             
-    def run_quadtree(self) -> None:
+    def run_quadtree(self, as_completed: bool = False, max_evaluations: int = None, max_wall_time: float = None,
+                     batched: bool = False) -> None:
         """Run quadtree.
         
         Run the quadtree from a previously saved run, or start a new run.
+        
+        Args:
+            as_completed (bool, optional): Option to refine each node as soon as its own points are evaluated,
+                rather than waiting for the whole frontier (see '_run_as_completed'). Defaults to False.
+            max_evaluations (int, optional): Maximum number of new points to evaluate. Setting this or `max_wall_time`
+                refines the most discrepant nodes first, until the budget is spent (see '_run_budgeted'). Defaults to None.
+            max_wall_time (float, optional): Time (in seconds) after which no further refinement is started. Defaults to None.
+            batched (bool, optional): Option to evaluate the whole frontier of new leaves at once in each refinement step,
+                which keeps all 'N_proc' cores busy, rather than filling nodes one at a time (see '_sweep'). The
+                quadtree can then differ slightly from the default node-by-node refinement. Defaults to False.
         """
+        if max_evaluations is not None and max_evaluations <= 0:
+            raise ValueError('max_evaluations must be greater than zero.')
+        elif max_wall_time is not None and max_wall_time <= 0:
+            raise ValueError('max_wall_time must be greater than zero.')
+        elif as_completed and (max_evaluations is not None or max_wall_time is not None):
+            raise ValueError('max_evaluations and max_wall_time cannot be used with as_completed.')
+        elif batched and (as_completed or max_evaluations is not None or max_wall_time is not None):
+            raise ValueError('batched cannot be used with as_completed, max_evaluations, or max_wall_time.')
+        
         # overwrite previous results if overwrite is True
         if self.overwrite:
             print("   Overwrite previous results, starting new...")
@@ -295,57 +1731,497 @@ class BaseTree(abc.ABC):
                 os.remove(self.filename_nodes)
             except OSError:
                 pass
+            if self.journal and os.path.exists(self.filename_journal):
+                os.remove(self.filename_journal)
+            if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
             
         # otherwise attempt to load previous results
         else:
             try:
                 print("Attempting to load previous results...")
-                self.load_points()
+                if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+                    self.load_tree(self.checkpoint_file)
+                else:
+                    self.load_points()
                 print(f"   {self.node_count} nodes found, starting from previous checkpoint...")
             except FileNotFoundError:
                 print("   No previous results found, starting new...")
 
-        # must execute at least minimum depth nodes
-        for _ in range(self.min_depth):
-            self._forward(self.root)
-
-        # save
-        self._save_checkpoint()
+        try:
+            if as_completed:
+                self._run_as_completed()
+            elif max_evaluations is not None or max_wall_time is not None:
+                self._run_budgeted(max_evaluations, max_wall_time)
+            else:
+                # must execute at least minimum depth passes
+                for _ in range(self.min_depth):
+                    if (self._sweep() if batched else self._recursive_pass()) == 0:
+                        break
+        except BaseException:
+            # don't wait for queued evaluations after an error or KeyboardInterrupt
+            self.close(terminate=True)
+            raise
+        finally:
+            self._neighbors = None
+            self._leaf_paths = None
+        
+        self.close()
+        if self.journal:
+            self._compact_journal()
+        elif self.checkpoint_file is not None:
+            self.print_all_points()
+            self.print_all_nodes()
         
         print("DONE! :)")
         
         
-    def _forward(self, node: QuadNode) -> None:
-        """Forward.
+    def _recursive_pass(self) -> int:
+        """Recursive pass.
         
-        Advance quadtree forward a step by comparing child nodes and expanding resolution where necessary.
+        Make one node-by-node pass over the whole quadtree (see '_pass'), and save the progress.
+        
+        Returns:
+            int: Number of nodes split or filled during this pass.
+        """
+        self._fill_splits = True
+        try:
+            N_changed = self._pass(self.root)
+        finally:
+            self._fill_splits = False
+            
+        if N_changed > 0:
+            self._save_checkpoint()
+            
+        return N_changed
+    
+    
+    def _pass(self, node: QuadNode) -> int:
+        """Pass.
+        
+        Advance quadtree forward a step by comparing child nodes and expanding resolution where necessary,
+        one node at a time: nodes split by a comparison are filled (and the progress saved) right away,
+        and nodes split to reach 'min_depth' are filled as the pass reaches them.
         
         Args:
             node (QuadNode): Quadtree node.
+            
+        Returns:
+            int: Number of nodes split or filled during this pass.
         """
+        N_changed = 0
+        
         if node._is_split():
-            self._compare_nodes(node.child_nw, node.child_ne, False)
-            self._compare_nodes(node.child_sw, node.child_se, False)
-            self._compare_nodes(node.child_nw, node.child_sw, True)
-            self._compare_nodes(node.child_ne, node.child_se, True)
+            N_changed += self._compare_nodes(node.child_nw, node.child_ne, False)
+            N_changed += self._compare_nodes(node.child_sw, node.child_se, False)
+            N_changed += self._compare_nodes(node.child_nw, node.child_sw, True)
+            N_changed += self._compare_nodes(node.child_ne, node.child_se, True)
         elif node.depth < self.min_depth:
-            node.split_node()
+            self._split_node(node)
             self._save_checkpoint()
+            N_changed += 1
             
         if node._is_split():
-            self._forward(node.child_nw)
-            self._forward(node.child_ne)
-            self._forward(node.child_sw)
-            self._forward(node.child_se)
-        elif len(node.node_points) < self.N_points:
-            if self.N_proc > 1:
-                self.evaluate_multiple_points(node, self.N_points)
+            N_changed += self._pass(node.child_nw)
+            N_changed += self._pass(node.child_ne)
+            N_changed += self._pass(node.child_sw)
+            N_changed += self._pass(node.child_se)
+        else:
+            N_changed += self._fill_leaves(node)
+            
+        return N_changed
+    
+    
+    def _sweep(self) -> int:
+        """Sweep.
+        
+        Make one pass over the whole quadtree, for batched refinement. Batched steps (see '_forward') are
+        repeated until no node is split or filled, but each pair of neighboring regions is compared at most
+        once per sweep, so a sweep refines the quadtree about as much as one recursive pass (see '_pass'),
+        although the nodes are compared in a different order and the result can differ slightly.
+        After the first step, steps only visit the parts of the quadtree that changed (see '_track_changes').
+        
+        Returns:
+            int: Number of nodes split or filled during this sweep.
+        """
+        self._compared = set()
+        self._parents = {}
+        self._deferred = set()
+        
+        N_changed = 0
+        try:
+            while True:
+                N_step = self._forward(self.root)
+                if N_step == 0:
+                    break
+                N_changed += N_step
+        finally:
+            self._compared = None
+            self._parents = None
+            self._deferred = None
+            self._paths = None
+            self._dirty = None
+            self._changed = None
+            self._unfilled = None
+            
+        return N_changed
+    
+    
+    def _forward(self, node: QuadNode) -> int:
+        """Forward.
+        
+        Advance quadtree forward a step by comparing child nodes and expanding resolution where necessary.
+        All leaves that still need points after this comparison pass are then evaluated as one batch.
+        Once changes are tracked during a sweep, the comparison pass skips every region in which no leaf
+        was created or evaluated since the start of the previous step, and unfilled leaves are looked up
+        directly, so the cost of a step scales with what changed rather than with the size of the quadtree.
+        
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            int: Number of nodes split or filled during this step.
+        """
+        tracked = self._paths is not None and node is self.root
+        if tracked:
+            self._dirty = set()
+            for leaf in self._changed:
+                self._mark_dirty(leaf)
+            self._changed = []
+            
+        N_split = self._refine(node)
+        
+        if tracked:
+            leaves = sorted((leaf for leaf in self._unfilled if not leaf._is_split()), key=self._paths.get)
+            self._dirty = None
+        else:
+            leaves = []
+            self._collect_leaves(node, leaves)
+        leaves = [leaf for leaf in leaves if not self._is_filled(leaf)]
+        self.evaluate_nodes(leaves, [self._fill_target(leaf) for leaf in leaves])
+        
+        if tracked:
+            self._changed.extend(leaves)
+            self._unfilled = {leaf for leaf in leaves if not self._is_filled(leaf)}
+        elif self._compared is not None and node is self.root:
+            self._track_changes(leaves)
+        
+        if N_split > 0 or len(leaves) > 0:
+            self._save_checkpoint()
+            
+        return N_split + len(leaves)
+    
+    
+    def _run_as_completed(self) -> None:
+        """Run as completed.
+        
+        Event-driven refinement. Points are collected from the workers in whatever order they finish,
+        and as soon as a node holds all of its points it is compared with its neighbors (and split if
+        necessary) while evaluations in other nodes are still in flight. Refinement continues until no
+        completed node triggers a split, so this generally refines further than 'min_depth' sweeps.
+        Progress is saved at most once every 'checkpoint_interval' seconds, and once at the end.
+        """
+        results = queue.Queue()
+        N_pending = {}  # number of outstanding evaluations for each node
+        self._refine(self.root)
+        
+        leaves = []
+        self._collect_leaves(self.root, leaves)
+        self._index_neighbors(leaves)
+        for leaf in leaves:
+            if not self._is_filled(leaf):
+                self._submit_node(leaf, results, N_pending)
+                
+        last_checkpoint = time.monotonic()
+        while len(N_pending) > 0:
+            node, points, task = results.get()
+            if isinstance(points, BaseException):
+                raise points
+            self._add_points(node, points)
+            if task is not None:
+                self._cache_store([task], [points])
+            
+            N_pending[node] -= 1
+            if N_pending[node] > 0:
+                continue
+            del N_pending[node]
+            
+            if not self._is_filled(node):  # adaptive mode: draw another batch
+                self._submit_node(node, results, N_pending)
+                continue
+            
+            # this node is complete, so compare it with its (completed) neighbors
+            split_nodes = []
+            for neighbor in self._leaf_neighbors(node):
+                if node._is_split():
+                    break
+                if neighbor._is_split() or not self._is_filled(neighbor):
+                    continue
+                split_nodes.extend(self._compare_leaves(node, neighbor))
+                
+            for split_node in split_nodes:
+                for child in (split_node.child_nw, split_node.child_ne, split_node.child_sw, split_node.child_se):
+                    self._submit_node(child, results, N_pending)
+                    
+            if len(split_nodes) > 0 and time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                self._save_checkpoint()
+                last_checkpoint = time.monotonic()
+                
+        self._save_checkpoint()
+        
+        
+    def _run_budgeted(self, max_evaluations: int = None, max_wall_time: float = None) -> None:
+        """Run budgeted.
+        
+        Anytime refinement within a budget. After the 'min_depth' grid is filled, pairs of neighboring leaves
+        are kept in a priority queue ordered by the difference of their values, and the most discrepant pairs
+        are split first, a few at a time (enough new points to keep 'N_proc' cores busy). Refinement continues
+        until no pair triggers a split, the next split could exceed `max_evaluations` new points, or `max_wall_time`
+        has passed. The time limit is checked between batches, so the batch in flight still finishes. The quadtree
+        is checkpointed at most once every 'checkpoint_interval' seconds, and once at the end, so it is valid
+        whenever the run stops.
+        
+        Args:
+            max_evaluations (int, optional): Maximum number of new points to evaluate. Defaults to None.
+            max_wall_time (float, optional): Time (in seconds) after which no further refinement is started. Defaults to None.
+        """
+        remaining = np.inf if max_evaluations is None else max_evaluations
+        deadline = np.inf if max_wall_time is None else time.monotonic() + max_wall_time
+        N_first = self.N_points if self.N_min is None else self.N_min  # points in a new node, before adaptive batches
+        
+        def fill(leaves: list) -> bool:
+            # fill leaves (in several rounds in adaptive mode) as far as the budget allows
+            nonlocal remaining
+            leaves = [leaf for leaf in leaves if not self._is_filled(leaf)]
+            while len(leaves) > 0:
+                targets = [self._fill_target(leaf) for leaf in leaves]
+                costs = np.cumsum([target - len(leaf.node_points) for leaf, target in zip(leaves, targets)])
+                N_fit = int(np.searchsorted(costs, remaining, side='right'))
+                if N_fit > 0:
+                    self.evaluate_nodes(leaves[:N_fit], targets[:N_fit])
+                    remaining -= costs[N_fit - 1]
+                if N_fit < len(leaves):
+                    return False
+                leaves = [leaf for leaf in leaves if not self._is_filled(leaf)]
+                
+            return True
+        
+        heap = []
+        N_pushed = 0  # tie breaker, so that equal differences are refined in the order they were found
+        
+        def push(node: QuadNode) -> None:
+            # queue the pairs of a leaf and its neighbors that could be split
+            nonlocal N_pushed
+            for neighbor in self._leaf_neighbors(node):
+                if not (self._is_filled(node) and self._is_filled(neighbor)) or min(node.depth, neighbor.depth) >= self.max_depth:
+                    continue
+                difference = abs(node.get_node_value(self.node_statistic) - neighbor.get_node_value(self.node_statistic))
+                if difference >= self.split_threshold:
+                    heapq.heappush(heap, (-difference, N_pushed, node, neighbor))
+                    N_pushed += 1
+                    
+        self._refine(self.root)
+        leaves = []
+        self._collect_leaves(self.root, leaves)
+        self._index_neighbors(leaves)
+        within_budget = fill(leaves)
+        for leaf in leaves:
+            push(leaf)
+            
+        last_checkpoint = time.monotonic()
+        while within_budget and len(heap) > 0 and time.monotonic() < deadline:
+            # split the most discrepant pairs that are still leaves
+            children = []
+            while len(heap) > 0 and len(children) * N_first < self.N_proc:
+                _, _, node_a, node_b = heapq.heappop(heap)
+                if node_a._is_split() or node_b._is_split():
+                    continue
+                
+                # the shallower leaf is split, or both if they have equal depth (see '_compare_leaves')
+                N_split = int(node_b.depth >= node_a.depth) + int(node_a.depth >= node_b.depth)
+                if (len(children) + 4 * N_split) * N_first > remaining:
+                    within_budget = False
+                    break
+                
+                for split_node in self._compare_leaves(node_a, node_b):
+                    children.extend((split_node.child_nw, split_node.child_ne, split_node.child_sw, split_node.child_se))
+                    
+            within_budget = fill(children) and within_budget
+            for child in children:
+                push(child)
+                
+            if time.monotonic() - last_checkpoint >= self.checkpoint_interval:
+                self._save_checkpoint()
+                last_checkpoint = time.monotonic()
+                
+        self._save_checkpoint()
+        
+        
+    def _attach_worker(self) -> None:
+        """Attach worker.
+        
+        Hook called once in each worker process after the quadtree has been installed there
+        (see '_init_worker'), e.g. to attach shared resources. Does nothing by default.
+        """
+        pass
+    
+    
+    def _detached_copy(self) -> 'BaseTree':
+        """Detached copy.
+        
+        Convenience function to create a shallow copy of this quadtree without any nodes or points,
+        which is installed once in each worker process (see '_init_worker').
+        
+        Returns:
+            BaseTree: Copy of this quadtree with an empty root node.
+        """
+        tree = copy.copy(self)
+        tree._pool = None
+        tree._cache = None
+        tree.executor = None  # workers evaluate their own tasks serially
+        tree._fill_splits = False
+        tree._compared = tree._parents = tree._deferred = None
+        tree._paths = tree._dirty = tree._changed = tree._unfilled = None
+        tree._neighbors = tree._leaf_paths = None
+        tree._journal_pending = []
+        tree.root = QuadNode(self.root.x_min, self.root.x_max, self.root.y_min, self.root.y_max, self.root.depth)
+        
+        return tree
+                
+                
+    def _submit_node(self, node: QuadNode, results: queue.Queue, N_pending: dict) -> None:
+        """Submit node.
+        
+        Convenience function to start evaluating the missing points (or next batch, see `N_min`) of a node. Each finished task puts
+        a (node, points, task) entry on the results queue, with one point per task, or all missing points if
+        'evaluate_points' is available; a node that is already full gets a single (node, [], None) entry.
+        'task' is the (node, N_points, seed) evaluation to store in the cache, or None for cached points.
+        Workers receive only the node's limits, since the quadtree keeps changing while they run.
+
+        Args:
+            node (QuadNode): Quadtree leaf to fill.
+            results (queue.Queue): Queue receiving finished points.
+            N_pending (dict): Number of outstanding evaluations for each node.
+        """
+        N_filled = len(node.node_points)
+        N_empty = int(self._fill_target(node) - N_filled)
+        
+        if N_empty <= 0:
+            N_pending[node] = 1
+            results.put((node, [], None))
+            return
+        
+        bounds = self._bounds(node)
+        
+        # one task for the whole node
+        if self._has_evaluate_points():
+            tasks = [(node, N_empty, self._new_seed(node, N_filled))]
+        # one task per point
+        else:
+            tasks = [(node, 0, self._new_seed(node, N_filled + i)) for i in range(N_empty)]
+            
+        N_pending[node] = len(tasks)
+        for task, target, cached_points in zip(tasks, self._task_targets(tasks), self._cache_lookup(tasks)):
+            _, n, rng_seed = task
+            if cached_points is not None:
+                results.put((node, cached_points, None))
+            elif n > 0 and self._is_parallel():
+                self._get_pool().apply_async(_evaluate_points_task, (bounds, n, rng_seed, target),
+                                             callback=lambda xyv, task=task: results.put((node, self._to_points(*xyv), task)),
+                                             error_callback=lambda err: results.put((node, err, None))
+                                             )
+            elif n > 0:
+                results.put((node, self._to_points(*self._timed_evaluate_points(node, n, rng_seed, target)), task))
+            elif self._is_parallel():
+                self._get_pool().apply_async(_evaluate_point_task, (self._bounds(target), rng_seed),
+                                             callback=lambda point, task=task: results.put((node, [point], task)),
+                                             error_callback=lambda err: results.put((node, err, None))
+                                             )
             else:
-                while len(node.node_points) < self.N_points:
-                    point = self.evaluate_point(node, rng_seed=np.random.randint(1, 1e8))
-                    node.node_points.append(point)
+                results.put((node, [self._timed_evaluate_point(target, rng_seed)], task))
+                
+                
+    def _refine(self, node: QuadNode) -> int:
+        """Refine.
+        
+        Compare neighboring child nodes and split where necessary, recursing through the quadtree.
+        
+        Args:
+            node (QuadNode): Quadtree node.
+            
+        Returns:
+            int: Number of nodes split.
+        """
+        N_split = 0
+        
+        # skip regions in which nothing changed since the previous step (see '_forward')
+        if self._dirty is not None and node not in self._dirty:
+            return N_split
+        
+        if node._is_split():
+            N_split += self._compare_nodes(node.child_nw, node.child_ne, False)
+            N_split += self._compare_nodes(node.child_sw, node.child_se, False)
+            N_split += self._compare_nodes(node.child_nw, node.child_sw, True)
+            N_split += self._compare_nodes(node.child_ne, node.child_se, True)
+        elif node.depth < self.min_depth:
+            self._split_node(node)
+            N_split += 1
+            
+            if self._deferred is not None:
+                self._deferred.add(node)
+            
+        if node._is_split():
+            N_split += self._refine(node.child_nw)
+            N_split += self._refine(node.child_ne)
+            N_split += self._refine(node.child_sw)
+            N_split += self._refine(node.child_se)
+            
+        return N_split
                     
                     
+    def _track_changes(self, leaves: list) -> None:
+        """Track changes.
+        
+        Start tracking changes for the rest of the sweep, after a full step of '_forward'. Only leaves
+        created or evaluated since the start of a step can lead to new comparisons in the next step:
+        any other pair of leaves was already compared (or skipped for the rest of the sweep) in that step.
+        Tracking only starts once every leaf has reached 'min_depth', since shallower leaves are split
+        by the full pass.
+
+        Args:
+            leaves (list): Leaves evaluated in this step.
+        """
+        paths = {}
+        stack = [(self.root, ())]
+        while len(stack) > 0:
+            node, path = stack.pop()
+            paths[node] = path
+            if node._is_split():
+                for i, child in enumerate((node.child_nw, node.child_ne, node.child_sw, node.child_se)):
+                    stack.append((child, path + (i,)))
+            elif node.depth < self.min_depth:
+                return
+            
+        self._paths = paths
+        self._changed = list(leaves) + list(self._parents)  # evaluated, or created during this sweep
+        self._unfilled = {leaf for leaf in leaves if not self._is_filled(leaf)}
+        
+        
+    def _mark_dirty(self, node: QuadNode) -> None:
+        """Mark dirty.
+        
+        Convenience function to mark a node, and every node containing it, as changed during this step.
+
+        Args:
+            node (QuadNode): Quadtree node.
+        """
+        current = self.root
+        self._dirty.add(current)
+        for i in self._paths[node]:
+            current = (current.child_nw, current.child_ne, current.child_sw, current.child_se)[i]
+            self._dirty.add(current)
+            
+            
     def _get_min_max_nodes(self, node: QuadNode) -> None:
         """Get min max nodes.
 
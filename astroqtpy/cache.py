@@ -0,0 +1,277 @@
+import re
+import types
+import hashlib
+import pickle
+import sqlite3
+
+import numpy as np
+
+
+_ADDRESS = re.compile(r' at 0x[0-9a-fA-F]+')  # memory address in the representation of an object
+
+
+def fingerprint(items: list) -> str:
+    """Fingerprint.
+
+    Hash a list of items that determine the outcome of evaluations (functions, arrays, and other settings).
+    Functions are identified by their module, name, compiled code, default arguments, and the variables they
+    read from their closure or module, so that editing a function (e.g. a simulation setup) or a module constant
+    it uses invalidates previously cached results. Fingerprints are the same in every process.
+
+    Args:
+        items (list): Items to hash.
+
+    Returns:
+        str: Hexadecimal SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(_item_bytes(item))
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+def _item_bytes(item: object, seen: set = None) -> bytes:
+    """Item bytes.
+
+    Convenience function to turn one item into bytes for 'fingerprint'. Functions are turned into bytes
+    together with the defaults, closure variables, and global variables they use (see '_function_bytes').
+
+    Args:
+        item (object): Item to hash.
+        seen (set, optional): Ids of the functions already being hashed, to stop at recursive references. Defaults to None.
+
+    Returns:
+        bytes: Bytes representing the item.
+    """
+    if isinstance(item, np.ndarray):
+        return str(item.dtype).encode() + str(item.shape).encode() + np.ascontiguousarray(item).tobytes()
+
+    if isinstance(getattr(item, '__code__', None), types.CodeType):
+        return _function_bytes(item, set() if seen is None else seen)
+
+    if isinstance(item, types.ModuleType):
+        return item.__name__.encode()
+
+    if isinstance(item, (list, tuple)):
+        return repr(type(item)).encode() + b'\0'.join(_item_bytes(element, seen) for element in item)
+
+    if isinstance(item, dict):
+        return b'{' + b'\0'.join(_item_bytes(key, seen) + b':' + _item_bytes(value, seen)
+                                 for key, value in sorted(item.items(), key=lambda key_value: repr(key_value[0]))) + b'}'
+
+    try:
+        return pickle.dumps(item)
+    except Exception:
+        return _ADDRESS.sub('', repr(item)).encode()  # memory addresses differ between processes
+
+
+def _function_bytes(func: callable, seen: set) -> bytes:
+    """Function bytes.
+
+    Convenience function to turn a function into bytes for 'fingerprint': its module and name, its compiled code
+    (see '_code_bytes'), its default arguments, the contents of its closure, and the values of the global variables
+    its code refers to, so that changing any of these (e.g. a module constant read by a simulation) changes the
+    fingerprint. Global modules are identified by their names only.
+
+    Args:
+        func (callable): Function to hash.
+        seen (set): Ids of the functions already being hashed, to stop at recursive references.
+
+    Returns:
+        bytes: Bytes representing the function.
+    """
+    code = func.__code__
+    name = f"{getattr(func, '__module__', '')}.{getattr(func, '__qualname__', '')}".encode()
+    if id(func) in seen:
+        return name
+    seen.add(id(func))
+
+    parts = [name, _code_bytes(code), _item_bytes(getattr(func, '__defaults__', None), seen),
+             _item_bytes(getattr(func, '__kwdefaults__', None), seen)]
+
+    for cell in getattr(func, '__closure__', None) or ():
+        try:
+            parts.append(_item_bytes(cell.cell_contents, seen))
+        except ValueError:  # empty cell
+            parts.append(b'')
+
+    namespace = getattr(func, '__globals__', {})
+    for name in sorted(_code_names(code)):
+        if name in namespace:
+            parts.append(name.encode() + b'=' + _item_bytes(namespace[name], seen))
+
+    return b'\0'.join(parts)
+
+
+def _code_bytes(code: types.CodeType) -> bytes:
+    """Code bytes.
+
+    Convenience function to turn compiled code into bytes, including nested code objects (e.g. lambdas, inner
+    functions, and comprehensions), without the memory addresses in their representations.
+
+    Args:
+        code (:obj:`types.CodeType`): Compiled code.
+
+    Returns:
+        bytes: Bytes representing the code.
+    """
+    return code.co_code + b'\0'.join(_constant_bytes(constant) for constant in code.co_consts) + repr(code.co_names).encode()
+
+
+def _constant_bytes(constant: object) -> bytes:
+    """Constant bytes.
+
+    Convenience function to turn a constant of compiled code into bytes.
+
+    Args:
+        constant (object): Constant (a literal, or nested compiled code).
+
+    Returns:
+        bytes: Bytes representing the constant.
+    """
+    if isinstance(constant, types.CodeType):
+        return b'<code>' + _code_bytes(constant)
+    elif isinstance(constant, tuple):
+        return b'(' + b','.join(_constant_bytes(element) for element in constant) + b')'
+    elif isinstance(constant, frozenset):  # iteration order of sets of strings differs between processes
+        return b'{' + b','.join(sorted(_constant_bytes(element) for element in constant)) + b'}'
+
+    return repr(constant).encode()
+
+
+def _code_names(code: types.CodeType) -> set:
+    """Code names.
+
+    Convenience function to gather the global (and attribute) names used by compiled code and its nested code.
+
+    Args:
+        code (:obj:`types.CodeType`): Compiled code.
+
+    Returns:
+        set: Names.
+    """
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, types.CodeType):
+            names |= _code_names(constant)
+
+    return names
+
+
+class EvaluationCache():
+    """Evaluation cache.
+
+    A persistent store of evaluated points in a SQLite database, so that rerunning a quadtree with different
+    settings (e.g. `split_threshold`, `max_depth`, or `node_statistic`) does not repeat evaluations of the
+    same samples. Entries are keyed by a fingerprint of the evaluation (see 'fingerprint') and a key
+    identifying the sample (node limits, number of points, and random seed).
+
+    Args:
+        filename (str): Name of the database file. Created if it does not exist.
+        fingerprint (str): Fingerprint of the evaluation function and its configuration.
+    """
+    def __init__(self,
+                 filename: str,
+                 fingerprint: str,
+                 ) -> None:
+        """__init__
+
+        Open an evaluation cache.
+        """
+        self.filename = filename
+        self.fingerprint = fingerprint
+
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS evaluations "
+                                 "(fingerprint TEXT, key TEXT, result BLOB, PRIMARY KEY (fingerprint, key))")
+        self._connection.commit()
+
+
+    @staticmethod
+    def key(bounds: tuple, N_points: int, rng_seed: int) -> str:
+        """Key.
+
+        Convenience function to identify one evaluation within a fingerprint.
+
+        Args:
+            bounds (tuple): Node limits (x_min, x_max, y_min, y_max, depth).
+            N_points (int): Number of points evaluated (0 for a single 'evaluate_point' call).
+            rng_seed (int): Random number generator seed.
+
+        Returns:
+            str: Key of the evaluation.
+        """
+        return f"{bounds[0]!r},{bounds[1]!r},{bounds[2]!r},{bounds[3]!r}|{N_points}|{rng_seed}"
+
+
+    @staticmethod
+    def seed(bounds: tuple, index: int) -> int:
+        """Seed.
+
+        Derive a reproducible random seed for the point with a given index in a node,
+        so that repeated runs draw the same samples and can reuse cached results.
+
+        Args:
+            bounds (tuple): Node limits (x_min, x_max, y_min, y_max, depth).
+            index (int): Index of the point within the node.
+
+        Returns:
+            int: Random number generator seed between 1 and 1e8.
+        """
+        digest = hashlib.sha256(f"{bounds[0]!r},{bounds[1]!r},{bounds[2]!r},{bounds[3]!r}|{index}".encode()).digest()
+
+        return int.from_bytes(digest[:8], 'little') % (10**8 - 1) + 1
+
+
+    def get_many(self, keys: list) -> dict:
+        """Get many.
+
+        Look up several evaluations.
+
+        Args:
+            keys (list): Keys of the evaluations (see 'key').
+
+        Returns:
+            dict: Cached results, for the keys that were found.
+        """
+        found = {}
+        for i in range(0, len(keys), 500):  # stay below SQLite's limit on query parameters
+            chunk = keys[i:i + 500]
+            query = (f"SELECT key, result FROM evaluations WHERE fingerprint = ? "
+                     f"AND key IN ({', '.join('?' * len(chunk))})")
+            for key, result in self._connection.execute(query, [self.fingerprint, *chunk]):
+                found[key] = pickle.loads(result)
+
+        return found
+
+
+    def put(self, key: str, result: object) -> None:
+        """Put.
+
+        Store one evaluation. Changes are written to disk by 'commit'.
+
+        Args:
+            key (str): Key of the evaluation (see 'key').
+            result (object): Result of the evaluation.
+        """
+        self._connection.execute("INSERT OR REPLACE INTO evaluations VALUES (?, ?, ?)",
+                                 (self.fingerprint, key, pickle.dumps(result)))
+
+
+    def commit(self) -> None:
+        """Commit.
+
+        Write stored evaluations to disk.
+        """
+        self._connection.commit()
+
+
+    def close(self) -> None:
+        """Close.
+
+        Write stored evaluations to disk and close the database.
+        """
+        self._connection.commit()
+        self._connection.close()
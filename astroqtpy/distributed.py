@@ -0,0 +1,288 @@
+import os
+import sys
+import queue
+import pickle
+import threading
+from concurrent.futures import Future
+from multiprocessing.reduction import ForkingPickler
+from multiprocessing.connection import Listener, Client
+
+
+class Coordinator():
+    """Coordinator.
+
+    An executor that hands tasks to any number of remote worker processes over TCP, using
+    :obj:`multiprocessing.connection`. A coordinator can be given to any quadtree as its `executor`,
+    so that one quadtree is evaluated across many machines without any outside services.
+
+    .. note::
+
+        Workers are started separately, e.g. on each machine of a cluster, with
+
+        .. code-block:: python
+
+            from astroqtpy.distributed import run_worker
+            run_worker(('coordinator-host', 5000), authkey=b'secret')
+
+        or from the command line with ``python -m astroqtpy.distributed coordinator-host:5000`` (reading the
+        key from the ``ASTROQTPY_AUTHKEY`` environment variable). Each worker runs one task at a time, so start
+        one worker per core. Workers can join and leave at any time: a task held by a worker that disconnects
+        is handed to another worker. Tasks, including the simulation or model functions they refer to, are
+        sent with :obj:`pickle`, so these must be importable on the workers. Tasks that cannot be pickled or
+        unpickled, or that reach a worker whose initializer failed, fail with that error (see their futures).
+
+    Args:
+        address (tuple, optional): (host, port) to listen on. Port 0 picks a free port (see `address` attribute).
+            Defaults to ('localhost', 0).
+        authkey (bytes, optional): Key that workers must present to connect. Defaults to None, i.e. a random key
+            (see `authkey` attribute).
+    """
+    def __init__(self,
+                 address: tuple = ('localhost', 0),
+                 authkey: bytes = None,
+                 ) -> None:
+        """__init__
+
+        Create a coordinator and start listening for workers.
+        """
+        if authkey is None:
+            authkey = os.urandom(16)
+        elif not isinstance(authkey, bytes):
+            raise TypeError('authkey must be bytes.')
+        self.authkey = authkey
+
+        self._listener = Listener(address, authkey=self.authkey)
+        self.address = self._listener.address
+
+        self._tasks = queue.Queue()  # pending [future, func, args, kwargs] items
+        self._initializer = None
+        self._initargs = ()
+        self._init_version = 0
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self._threads = []
+
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+
+    def set_initializer(self, initializer: callable, initargs: tuple = ()) -> None:
+        """Set initializer.
+
+        Set a function to be called on every worker, connected now or later, before it runs any further tasks.
+        Quadtrees use this to send their static configuration once per worker instead of once per task.
+
+        Args:
+            initializer (callable): Function to call on each worker.
+            initargs (tuple, optional): Arguments of the initializer. Defaults to ().
+        """
+        with self._lock:
+            self._initializer = initializer
+            self._initargs = initargs
+            self._init_version += 1
+
+
+    def submit(self, func: callable, *args, **kwargs) -> Future:
+        """Submit.
+
+        Schedule `func(*args, **kwargs)` to run on the next available worker.
+
+        Args:
+            func (callable): Task function.
+
+        Returns:
+            :obj:`concurrent.futures.Future`: Future of the task.
+        """
+        if self._shutdown:
+            raise RuntimeError('cannot submit tasks after shutdown.')
+
+        future = Future()
+        self._tasks.put([future, func, args, kwargs])
+
+        return future
+
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        """Shutdown.
+
+        Stop accepting tasks and workers. Connected workers are told to stop once the tasks already
+        submitted have been handed out.
+
+        Args:
+            wait (bool, optional): Option to wait until all workers have been released. Defaults to True.
+            cancel_futures (bool, optional): Option to cancel all tasks that have not started yet. Defaults to False.
+        """
+        with self._lock:
+            already_shutdown = self._shutdown
+            self._shutdown = True
+
+        if cancel_futures:
+            while True:
+                try:
+                    self._tasks.get_nowait()[0].cancel()
+                except queue.Empty:
+                    break
+
+        if not already_shutdown:
+            # wake up the accepting thread, which is blocked waiting for a connection
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+
+        if wait:
+            self._accept_thread.join()
+            for thread in list(self._threads):
+                thread.join()
+
+
+    def __enter__(self) -> 'Coordinator':
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.shutdown(wait=True, cancel_futures=exc_type is not None)
+
+
+    def _accept(self) -> None:
+        """Accept.
+
+        Accept workers until shutdown, serving each one in its own thread.
+        """
+        while True:
+            try:
+                connection = self._listener.accept()
+            except OSError:  # includes failed authentication
+                if self._shutdown:
+                    break
+                continue
+
+            if self._shutdown:
+                connection.close()
+                break
+
+            thread = threading.Thread(target=self._serve, args=(connection,), daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+        self._listener.close()
+
+
+    def _next_task(self) -> list:
+        """Next task.
+
+        Wait for the next pending task that has not been cancelled.
+
+        Returns:
+            list: [future, func, args, kwargs] item, or None after shutdown once no tasks are left.
+        """
+        while True:
+            try:
+                item = self._tasks.get(timeout=0.1)
+            except queue.Empty:
+                if self._shutdown:
+                    return None
+                continue
+
+            future = item[0]
+            if future.running() or future.set_running_or_notify_cancel():
+                return item
+
+
+    def _serve(self, connection) -> None:
+        """Serve.
+
+        Send tasks to one worker, one at a time, until shutdown or until the worker disconnects.
+
+        Args:
+            connection (:obj:`multiprocessing.connection.Connection`): Connection to the worker.
+        """
+        version = 0
+        try:
+            while True:
+                item = self._next_task()
+                if item is None:
+                    connection.send(('stop',))
+                    break
+                future, func, args, kwargs = item
+
+                try:
+                    with self._lock:
+                        initializer, initargs, init_version = self._initializer, self._initargs, self._init_version
+                    if init_version != version:
+                        # pickled separately, so that the worker can tell a failed initializer from a failed task
+                        connection.send(('init', bytes(ForkingPickler.dumps((initializer, initargs)))))
+                        version = init_version
+                    connection.send(('task', func, args, kwargs))
+                    success, result = connection.recv()
+                except (EOFError, OSError):
+                    self._tasks.put(item)  # worker left, so hand its task to another worker
+                    break
+                except Exception as error:  # e.g. tasks or initializers that cannot be pickled
+                    future.set_exception(error)
+                    continue
+
+                if success:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+
+
+def run_worker(address: tuple, authkey: bytes) -> None:
+    """Run worker.
+
+    Connect to a coordinator and run the tasks it sends until it shuts down.
+
+    Args:
+        address (tuple): (host, port) of the coordinator.
+        authkey (bytes): Key of the coordinator.
+    """
+    connection = Client(address, authkey=authkey)
+    init_error = None  # error of the last initializer, reported back for each task instead of running it
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            except Exception as error:  # e.g. a task function that cannot be imported here
+                message = ('error', error)
+
+            if message[0] == 'stop':
+                break
+            elif message[0] == 'init':
+                try:
+                    initializer, initargs = pickle.loads(message[1])
+                    if initializer is not None:
+                        initializer(*initargs)
+                    init_error = None
+                except Exception as error:
+                    init_error = error
+                continue
+
+            if message[0] == 'error':
+                reply = (False, message[1])
+            elif init_error is not None:
+                reply = (False, init_error)
+            else:
+                _, func, args, kwargs = message
+                try:
+                    reply = (True, func(*args, **kwargs))
+                except Exception as error:
+                    reply = (False, error)
+
+            try:
+                connection.send(reply)
+            except Exception as error:  # e.g. results or exceptions that cannot be pickled
+                connection.send((False, RuntimeError(repr(error))))
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    host, port = sys.argv[1].rsplit(':', 1)
+    run_worker((host, int(port)), authkey=os.environ['ASTROQTPY_AUTHKEY'].encode())
@@ -0,0 +1,166 @@
+import concurrent.futures
+import threading
+
+
+EXECUTORS = ('serial', 'threads', 'fork', 'spawn')  # built-in choices for the 'executor' option of quadtrees
+
+
+class ExecutorPool():
+    """Executor pool.
+
+    An adapter providing the parts of the :obj:`multiprocessing.pool.Pool` interface used by astroQTpy quadtrees
+    ('starmap', 'apply_async', 'close', 'terminate', and 'join') on top of any :obj:`concurrent.futures.Executor`-style
+    object, i.e. any object with a 'submit(fn, *args, **kwargs)' method returning a :obj:`concurrent.futures.Future`.
+
+    Args:
+        executor (:obj:`concurrent.futures.Executor`): Executor running the tasks.
+        tree (BaseTree, optional): Quadtree passed to every task, for executors whose workers are not initialized
+            with one (see 'basetree._init_worker'). Defaults to None.
+        shutdown (bool, optional): Option to shut down the executor when the pool is closed. Should be False for
+            executors owned by the caller. Defaults to True.
+    """
+    def __init__(self,
+                 executor: concurrent.futures.Executor,
+                 tree: object = None,
+                 shutdown: bool = True,
+                 ) -> None:
+        """__init__
+
+        Create an executor pool.
+        """
+        if not callable(getattr(executor, 'submit', None)):
+            raise TypeError('executor must have a submit method.')
+        else:
+            self.executor = executor
+
+        self.tree = tree
+        self.shutdown = shutdown
+
+        # outstanding futures, so that caller-owned executors can be waited on or cancelled
+        self._futures = set()
+        self._lock = threading.Lock()
+
+
+    def _submit(self, func: callable, args: tuple) -> concurrent.futures.Future:
+        """Submit.
+
+        Convenience function to submit one task, passing 'tree' along if given.
+
+        Args:
+            func (callable): Task function.
+            args (tuple): Positional arguments of the task.
+
+        Returns:
+            :obj:`concurrent.futures.Future`: Future of the task.
+        """
+        if self.tree is None:
+            future = self.executor.submit(func, *args)
+        else:
+            future = self.executor.submit(func, *args, tree=self.tree)
+
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+
+        return future
+
+
+    def _discard(self, future: concurrent.futures.Future) -> None:
+        """Discard.
+
+        Forget a finished future.
+
+        Args:
+            future (:obj:`concurrent.futures.Future`): Finished future.
+        """
+        with self._lock:
+            self._futures.discard(future)
+
+
+    def starmap(self, func: callable, iterable: list) -> list:
+        """Starmap.
+
+        Run 'func' on each tuple of arguments and wait for all results.
+
+        Args:
+            func (callable): Task function.
+            iterable (list): Tuples of positional arguments, one per task.
+
+        Returns:
+            list: Results, in the same order as the arguments.
+        """
+        futures = [self._submit(func, args) for args in iterable]
+
+        return [future.result() for future in futures]
+
+
+    def apply_async(self,
+                    func: callable,
+                    args: tuple = (),
+                    callback: callable = None,
+                    error_callback: callable = None
+                    ) -> concurrent.futures.Future:
+        """Apply async.
+
+        Run 'func' without waiting for the result, then call 'callback' with the result,
+        or 'error_callback' with the exception if the task failed.
+
+        Args:
+            func (callable): Task function.
+            args (tuple, optional): Positional arguments of the task. Defaults to ().
+            callback (callable, optional): Function called with the result. Defaults to None.
+            error_callback (callable, optional): Function called with the exception. Defaults to None.
+
+        Returns:
+            :obj:`concurrent.futures.Future`: Future of the task.
+        """
+        def done(future: concurrent.futures.Future) -> None:
+            if future.cancelled():
+                return
+            error = future.exception()
+            if error is not None:
+                if error_callback is not None:
+                    error_callback(error)
+            elif callback is not None:
+                callback(future.result())
+
+        future = self._submit(func, args)
+        future.add_done_callback(done)
+
+        return future
+
+
+    def close(self) -> None:
+        """Close.
+
+        Stop accepting tasks. Outstanding tasks still run to completion.
+        """
+        if self.shutdown:
+            self.executor.shutdown(wait=False)
+
+
+    def terminate(self) -> None:
+        """Terminate.
+
+        Stop accepting tasks and cancel all tasks that have not started yet.
+        """
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.cancel()
+
+        if self.shutdown:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def join(self) -> None:
+        """Join.
+
+        Wait for all outstanding tasks to finish.
+        """
+        if self.shutdown:
+            self.executor.shutdown(wait=True)
+
+        with self._lock:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
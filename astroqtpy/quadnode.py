@@ -1,6 +1,469 @@
+import operator
+import collections.abc
+
 import numpy as np 
 from matplotlib import axes, cm
 
+from .quadpoint import QuadPoint
+
+
+def quadrant_codes(x: np.ndarray, y: np.ndarray, x_min: np.ndarray, x_max: np.ndarray, y_min: np.ndarray, y_max: np.ndarray,
+                   half_open: bool = False) -> np.ndarray:
+    """Quadrant codes.
+
+    Find the child (quadrant) of a node into which each point falls when the node is split.
+    By default, as for the original node-by-node checks, points must lie strictly inside a child, so points on
+    a boundary between children (or outside the node) are dropped. With `half_open`, each child includes its
+    west and south edges, and points on the east and north edges of the node go to the children along them,
+    so every point within the (closed) node limits ends up in exactly one child.
+
+    Args:
+        x (:obj:`np.ndarray`): x coordinates of the points.
+        y (:obj:`np.ndarray`): y coordinates of the points.
+        x_min (:obj:`np.ndarray`): Minimum x value of the node (or of each point's node).
+        x_max (:obj:`np.ndarray`): Maximum x value of the node (or of each point's node).
+        y_min (:obj:`np.ndarray`): Minimum y value of the node (or of each point's node).
+        y_max (:obj:`np.ndarray`): Maximum y value of the node (or of each point's node).
+        half_open (bool, optional): Option to use half-open children instead of dropping boundary points. Defaults to False.
+
+    Returns:
+        :obj:`np.ndarray`: Child of each point (0 = NW, 1 = NE, 2 = SW, 3 = SE), or -1 for dropped points.
+    """
+    x_center = 0.5 * (x_min + x_max)
+    y_center = 0.5 * (y_min + y_max)
+    
+    if half_open:
+        west = (x_min <= x) & (x < x_center)
+        east = (x_center <= x) & (x <= x_max)
+        south = (y_min <= y) & (y < y_center)
+        north = (y_center <= y) & (y <= y_max)
+    else:
+        west = (x_min < x) & (x < x_center)
+        east = (x_center < x) & (x < x_max)
+        south = (y_min < y) & (y < y_center)
+        north = (y_center < y) & (y < y_max)
+        
+    return np.where((west | east) & (south | north), 2 * south.astype(np.int64) + east.astype(np.int64), -1)
+
+
+class NodeStatistics():
+    """Node statistics.
+
+    Statistics of the point values in a quadtree node. The count is updated as points are added, and the mean,
+    standard deviation, and median are computed from the typed array of values with numpy when first needed
+    (so that they are identical to numpy's), and kept until the points change. Node values are then always
+    current, and repeated queries are O(1), without storing anything per point.
+    """
+    def __init__(self) -> None:
+        """__init__
+
+        Create empty node statistics.
+        """
+        self.reset()
+        
+        
+    def reset(self) -> None:
+        """Reset.
+        
+        Forget all values.
+        """
+        self.count = 0
+        self._cached = {}  # node values computed since the points last changed
+        
+        
+    def add(self, N: int = 1) -> None:
+        """Add.
+        
+        Update the statistics after adding values.
+        
+        Args:
+            N (int, optional): Number of values added. Defaults to 1.
+        """
+        self.count += N
+        self._cached.clear()
+            
+            
+    def value(self, statistic: str, values: np.ndarray) -> float:
+        """Value.
+        
+        Node value from the statistics.
+        
+        Args:
+            statistic (str): Statistic to compute. Choose from ['count', 'mean', 'std', or 'median'].
+            values (:obj:`np.ndarray`): Point values of the node.
+
+        Returns:
+            float: Node value (-inf without points).
+        """
+        if statistic == 'count':
+            return self.count
+        elif statistic not in ('mean', 'std', 'median'):
+            raise ValueError(" Node statistic must be either 'count', 'mean', 'std', or 'median'. ")
+        elif self.count == 0:
+            return -np.inf
+        
+        if statistic not in self._cached:
+            self._cached[statistic] = {'mean': np.mean, 'std': np.std, 'median': np.median}[statistic](values)
+            
+        return self._cached[statistic]
+        
+        
+class PointList(collections.abc.MutableSequence):
+    """Point list.
+
+    A list of quadtree points stored compactly in typed arrays (x and y coordinates, values, and flags),
+    rather than as one QuadPoint object per point. Points are handed out as new QuadPoint objects, so
+    changing a point requires assigning it back to the list. Values are stored as integers while all values
+    added are integers, and as floats otherwise, and flags are only stored once a point has a nonzero flag.
+    
+    The statistics of the node are kept up to date (see 'NodeStatistics'): any change to the points updates
+    the count and invalidates the other node values, without any per-point work.
+    
+    Args:
+        points (list, optional): Initial points. Defaults to ().
+    """
+    def __init__(self, points: list = ()) -> None:
+        """__init__
+
+        Create a point list.
+        """
+        self.stats = NodeStatistics()
+        self._clear_arrays()
+        self.extend(points)
+        
+        
+    @classmethod
+    def from_arrays(cls, x: np.ndarray, y: np.ndarray, value: np.ndarray, flag: np.ndarray = 0) -> 'PointList':
+        """From arrays.
+        
+        Create a point list from arrays of coordinates, values, and flags, without creating QuadPoint objects.
+
+        Args:
+            x (:obj:`np.ndarray`): x coordinates.
+            y (:obj:`np.ndarray`): y coordinates.
+            value (:obj:`np.ndarray`): Point values.
+            flag (:obj:`np.ndarray`, optional): Point flags. Defaults to 0.
+
+        Returns:
+            PointList: Point list.
+        """
+        points = cls()
+        points._extend_arrays(x, y, value, flag)
+        
+        return points
+        
+        
+    def __reduce__(self) -> tuple:
+        return (PointList.from_arrays, (self.x.copy(), self.y.copy(), self.values.copy(), self.flags.copy()))
+    
+    
+    @property
+    def x(self) -> np.ndarray:
+        """x coordinates of the points (read-only view)."""
+        return self._view(self._xy[:self._size, 0])
+    
+    
+    @property
+    def y(self) -> np.ndarray:
+        """y coordinates of the points (read-only view)."""
+        return self._view(self._xy[:self._size, 1])
+    
+    
+    @property
+    def values(self) -> np.ndarray:
+        """Values of the points (read-only view)."""
+        return self._view(self._values[:self._size])
+    
+    
+    @property
+    def flags(self) -> np.ndarray:
+        """Flags of the points (read-only view)."""
+        if self._flags is None:
+            return self._view(np.zeros(self._size, dtype=np.int64))
+        return self._view(self._flags[:self._size])
+    
+    
+    @staticmethod
+    def _view(array: np.ndarray) -> np.ndarray:
+        array = array.view()
+        array.flags.writeable = False
+        return array
+    
+    
+    def _clear_arrays(self) -> None:
+        """Clear arrays.
+        
+        Convenience function to release the storage of all points.
+        """
+        self._xy = np.empty((0, 2))
+        self._values = np.empty(0, dtype=np.int64)
+        self._flags = None  # flags are only stored once a point has a nonzero flag
+        self._size = 0
+        
+        
+    def _reserve(self, N: int, value_dtype: np.dtype) -> None:
+        """Reserve.
+        
+        Convenience function to make room for a total of N points, growing the arrays geometrically,
+        and to switch the values to floats if needed.
+
+        Args:
+            N (int): Number of points.
+            value_dtype (:obj:`np.dtype`): Type of the values to be stored.
+        """
+        values_dtype = np.result_type(self._values.dtype, value_dtype)
+        if N > len(self._values) or values_dtype != self._values.dtype:
+            capacity = max(N, 2 * len(self._values), 4) if N > len(self._values) else len(self._values)
+            xy = np.empty((capacity, 2))
+            values = np.empty(capacity, dtype=values_dtype)
+            xy[:self._size] = self._xy[:self._size]
+            values[:self._size] = self._values[:self._size]
+            self._xy, self._values = xy, values
+            if self._flags is not None:
+                flags = np.zeros(capacity, dtype=np.int64)
+                flags[:self._size] = self._flags[:self._size]
+                self._flags = flags
+            
+            
+    def _set_flags(self, index: object, flag: object) -> None:
+        """Set flags.
+        
+        Convenience function to set the flags of some points, only storing flags once one is nonzero.
+
+        Args:
+            index (object): Index (or slice) of the points.
+            flag (object): Point flag (or flags).
+        """
+        if self._flags is None:
+            if not np.any(flag):
+                return
+            self._flags = np.zeros(len(self._values), dtype=np.int64)
+        self._flags[index] = flag
+            
+            
+    @staticmethod
+    def _value_dtype(values: list) -> np.dtype:
+        """Value dtype.
+        
+        Convenience function for the type in which to store point values: integers, or floats otherwise.
+
+        Args:
+            values (list): Point values.
+
+        Returns:
+            :obj:`np.dtype`: int64 or float64.
+        """
+        if all(isinstance(value, (int, np.integer)) for value in values):
+            return np.dtype(np.int64)
+        return np.dtype(float)
+    
+    
+    def _extend_arrays(self, x: np.ndarray, y: np.ndarray, value: np.ndarray, flag: np.ndarray = 0) -> None:
+        """Extend arrays.
+        
+        Convenience function to add points given as arrays.
+
+        Args:
+            x (:obj:`np.ndarray`): x coordinates.
+            y (:obj:`np.ndarray`): y coordinates.
+            value (:obj:`np.ndarray`): Point values.
+            flag (:obj:`np.ndarray`, optional): Point flags. Defaults to 0.
+        """
+        value = np.asarray(value)
+        value_dtype = np.dtype(np.int64) if np.issubdtype(value.dtype, np.integer) else np.dtype(float)
+        value = value.astype(value_dtype, copy=False)
+        
+        N = self._size + len(x)
+        self._reserve(N, value_dtype)
+        self._xy[self._size:N, 0] = x
+        self._xy[self._size:N, 1] = y
+        self._values[self._size:N] = value
+        self._set_flags(slice(self._size, N), flag)
+        self._size = N
+        self.stats.add(len(value))
+            
+            
+    def take(self, mask: np.ndarray) -> 'PointList':
+        """Take.
+        
+        Select points, keeping their order.
+
+        Args:
+            mask (:obj:`np.ndarray`): Boolean mask (or indices) of the points to select.
+
+        Returns:
+            PointList: Selected points.
+        """
+        flags = 0 if self._flags is None else self._flags[:self._size][mask]
+        return PointList.from_arrays(self.x[mask], self.y[mask], self.values[mask], flags)
+    
+    
+    def _point(self, index: int) -> QuadPoint:
+        """Point.
+        
+        Convenience function to create the QuadPoint at a given (non-negative) index.
+
+        Args:
+            index (int): Index of the point.
+
+        Returns:
+            QuadPoint: Point.
+        """
+        return QuadPoint(self._xy[index, 0].item(), self._xy[index, 1].item(),
+                         self._values[index].item(), 0 if self._flags is None else self._flags[index].item())
+    
+    
+    def _recompute(self) -> None:
+        """Recompute.
+        
+        Convenience function to rebuild the statistics from all points.
+        """
+        self.stats.reset()
+        self.stats.add(self._size)
+            
+            
+    def _replace(self, points: list) -> None:
+        """Replace.
+        
+        Convenience function to replace all points, recomputing the statistics.
+
+        Args:
+            points (list): New points.
+        """
+        self._clear_arrays()
+        self.stats.reset()
+        self.extend(points)
+        
+        
+    def __len__(self) -> int:
+        return self._size
+    
+    
+    def __iter__(self) -> object:
+        for x, y, value, flag in zip(self._xy[:self._size, 0].tolist(), self._xy[:self._size, 1].tolist(),
+                                     self._values[:self._size].tolist(), self.flags.tolist()):
+            yield QuadPoint(x, y, value, flag)
+            
+            
+    def __getitem__(self, index: object) -> object:
+        if isinstance(index, slice):
+            return [self._point(i) for i in range(*index.indices(self._size))]
+        
+        index = operator.index(index)
+        if not -self._size <= index < self._size:
+            raise IndexError('point index out of range')
+        
+        return self._point(index % self._size)
+    
+    
+    def __setitem__(self, index: object, points: object) -> None:
+        if isinstance(index, slice):
+            new_points = list(self)
+            new_points[index] = points
+            self._replace(new_points)
+            return
+        
+        index = operator.index(index)
+        if not -self._size <= index < self._size:
+            raise IndexError('point index out of range')
+        
+        index = index % self._size
+        self._reserve(self._size, self._value_dtype([points.value]))
+        self._xy[index] = (points.x, points.y)
+        self._values[index] = points.value
+        self._set_flags(index, points.flag)
+        self._recompute()
+        
+        
+    def __delitem__(self, index: object) -> None:
+        keep = np.ones(self._size, dtype=bool)
+        keep[index] = False
+        N = np.count_nonzero(keep)
+        self._xy[:N] = self._xy[:self._size][keep]
+        self._values[:N] = self._values[:self._size][keep]
+        if self._flags is not None:
+            self._flags[:N] = self._flags[:self._size][keep]
+        self._size = N
+        self._recompute()
+        
+        
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, PointList)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    
+    def __repr__(self) -> str:
+        return repr(list(self))
+    
+    
+    def insert(self, index: int, point: object) -> None:
+        index = min(max(index + self._size if index < 0 else index, 0), self._size)
+        self._reserve(self._size + 1, self._value_dtype([point.value]))
+        self._xy[index + 1:self._size + 1] = self._xy[index:self._size].copy()
+        self._values[index + 1:self._size + 1] = self._values[index:self._size].copy()
+        if self._flags is not None:
+            self._flags[index + 1:self._size + 1] = self._flags[index:self._size].copy()
+        self._xy[index] = (point.x, point.y)
+        self._values[index] = point.value
+        self._set_flags(index, point.flag)
+        self._size += 1
+        self.stats.add()
+        
+        
+    def append(self, point: object) -> None:
+        self._reserve(self._size + 1, self._value_dtype([point.value]))
+        self._xy[self._size] = (point.x, point.y)
+        self._values[self._size] = point.value
+        self._set_flags(self._size, point.flag)
+        self._size += 1
+        self.stats.add()
+        
+        
+    def extend(self, points: list) -> None:
+        if isinstance(points, PointList):
+            self._extend_arrays(points.x, points.y, points.values, 0 if points._flags is None else points.flags)
+            return
+        
+        points = list(points)
+        if len(points) == 0:
+            return
+        
+        values = [point.value for point in points]
+        N = self._size + len(points)
+        self._reserve(N, self._value_dtype(values))
+        self._xy[self._size:N] = [(point.x, point.y) for point in points]
+        self._values[self._size:N] = values
+        self._set_flags(slice(self._size, N), [point.flag for point in points])
+        self._size = N
+        self.stats.add(len(values))
+            
+            
+    def __iadd__(self, points: list) -> 'PointList':
+        self.extend(points)
+        return self
+    
+    
+    def clear(self) -> None:
+        self._clear_arrays()
+        self.stats.reset()
+        
+        
+    def pop(self, index: int = -1) -> QuadPoint:
+        point = self[index]
+        del self[index]
+        return point
+    
+    
+    def remove(self, point: object) -> None:
+        del self[self.index(point)]
+        
+        
+    def __imul__(self, N: int) -> 'PointList':
+        self._replace(list(self) * N)
+        return self
+    
+    
 class QuadNode():
     """Quadtree node.
 
@@ -55,18 +518,30 @@ class QuadNode():
         
         # define other attributes
         self.node_value = -np.inf
-        self.node_points = []  # to store QuadPoint objects
+        self.node_points = PointList()  # to store QuadPoint objects
         self.child_nw = None
         self.child_ne = None
         self.child_sw = None
         self.child_se = None
-     
+        
+        
+    @property
+    def node_points(self) -> PointList:
+        return self._node_points
+    @node_points.setter
+    def node_points(self, points: list) -> None:
+        self._node_points = points if isinstance(points, PointList) else PointList(points)
+        
     
-    def split_node(self) -> None:
+    def split_node(self, half_open: bool = False) -> None:
         """Split node.
 
         Split this node into 4 equal 'child' nodes. Distribute any points
-        contained within this node to its children.
+        contained within this node to its children (see 'quadrant_codes').
+        
+        Args:
+            half_open (bool, optional): Option to hand points on a boundary between children to the child to their
+                east or north, instead of dropping them. Defaults to False.
         """
         x_center = 0.5 * (self.x_min + self.x_max)
         y_center = 0.5 * (self.y_min + self.y_max)
@@ -77,28 +552,15 @@ class QuadNode():
         self.child_sw = QuadNode(self.x_min, x_center, self.y_min, y_center, self.depth + 1)
         self.child_se = QuadNode(x_center, self.x_max, self.y_min, y_center, self.depth + 1)
         
-        # distribute completed trials from parent node to child nodes
-        for parent_point in self.node_points:
-            # NW child
-            if self.child_nw.x_min < parent_point.x < self.child_nw.x_max and \
-               self.child_nw.y_min < parent_point.y < self.child_nw.y_max:
-                self.child_nw.node_points.append(parent_point)
-            
-            # NE child
-            if self.child_ne.x_min < parent_point.x < self.child_ne.x_max and \
-               self.child_ne.y_min < parent_point.y < self.child_ne.y_max:
-                self.child_ne.node_points.append(parent_point)
-                
-            # SW child
-            if self.child_sw.x_min < parent_point.x < self.child_sw.x_max and \
-               self.child_sw.y_min < parent_point.y < self.child_sw.y_max:
-                self.child_sw.node_points.append(parent_point)
+        # distribute completed trials from parent node to child nodes, keeping their order
+        if len(self.node_points) > 0:
+            codes = quadrant_codes(self.node_points.x, self.node_points.y, self.x_min, self.x_max, self.y_min, self.y_max,
+                                   half_open)
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(-1, 4), side='right')
+            for i, child in enumerate((self.child_nw, self.child_ne, self.child_sw, self.child_se)):
+                child.node_points = self.node_points.take(order[bounds[i]:bounds[i + 1]])
                 
-            # SE child
-            if self.child_se.x_min < parent_point.x < self.child_se.x_max and \
-               self.child_se.y_min < parent_point.y < self.child_se.y_max:
-                self.child_se.node_points.append(parent_point)
-        
         # clear parent node points
         self.node_points.clear()
     
@@ -106,42 +568,32 @@ class QuadNode():
     def _generate_node_value(self, statistic: str) -> None:
         """Generate node value.
         
-        Calculate an aggragate value of all points contained within this node.
+        Calculate an aggragate value of all points contained within this node, from the running
+        statistics kept by 'node_points' (see 'NodeStatistics').
         
         Args:
             statistic (str): Statistic to compute for this node. Choose from ['count', 'mean', 'std', or 'median'].
         """
-                
-        if len(self.node_points) == 0:
-            return
-        
-        node_point_values = [point.value for point in self.node_points]
+        value = self.node_points.stats.value(statistic, self.node_points.values)
         
-        if statistic == 'count':
-            self.node_value = len(node_point_values)
-        elif statistic == 'mean':
-            self.node_value = np.mean(node_point_values)
-        elif statistic == 'std':
-            self.node_value = np.std(node_point_values)
-        elif statistic == 'median':
-            self.node_value = np.median(node_point_values)
+        if len(self.node_points) == 0:
+            self.node_value = -np.inf
         else:
-            raise ValueError(" Node statistic must be either 'count', 'mean', 'std', or 'median'. ")
+            self.node_value = value
     
     
     def get_node_value(self, statistic: str) -> float:
         """Get node value.
         
-        Convenience function to grab this node's value.
+        Convenience function to grab this node's value, which is always current with the points it contains.
         
         Args:
             statistic (str): Statistic to pass to '_generate_node_value'. Choose from ['count', 'mean', 'std', or 'median'].
 
         Returns:
-            float: Node value.
+            float: Node value (-inf for a node without points).
         """
-        if self.node_value == -np.inf:
-            self._generate_node_value(statistic)
+        self._generate_node_value(statistic)
             
         return self.node_value
     
@@ -224,7 +676,7 @@ class QuadNode():
             
             if show_points:
                 if len(self.node_points) > 0:
-                    ax.scatter(*zip(*[(point.x, point.y) for point in self.node_points]),
+                    ax.scatter(self.node_points.x, self.node_points.y,
                             c='k', s=1, marker='.', alpha=0.8, rasterized=True
                             )
                 
@@ -11,10 +11,14 @@ class QuadPoint():
         _x (float): x position.
         _y (float): y position.
         _value (float, optional): Point value. Defaults to -inf.
+        _flag (int, optional): Point flag, e.g. 'FLAG_TIMEOUT' if the evaluation ran out of time. Defaults to 0.
     """
     _x: float
     _y: float
     _value: float = -np.inf
+    _flag: int = 0
+    
+    FLAG_TIMEOUT = 1  # evaluation exceeded its time budget, so value is a sentinel
     
     @property
     def x(self) -> float:
@@ -35,4 +39,11 @@ class QuadPoint():
         return self._value
     @value.setter
     def value(self, val: float) -> None:
-        self._value = val
\ No newline at end of file
+        self._value = val
+        
+    @property
+    def flag(self) -> int:
+        return self._flag
+    @flag.setter
+    def flag(self, val: int) -> None:
+        self._flag = val
@@ -1,8 +1,10 @@
+from multiprocessing import shared_memory
+
 import numpy as np
 
 from astroqtpy.quadnode import QuadNode
 
-from .quadnode import QuadNode
+from .quadnode import QuadNode, PointList
 from .quadpoint import QuadPoint
 from .basetree import BaseTree
 
@@ -27,6 +29,20 @@ class RandomQuadTree(BaseTree):
         filename_points (str, optional): Name of output file to save points. Defaults to 'points.txt'.
         filename_nodes (str, optional): Name of output file to save nodes. Defaults to 'nodes.txt'.
         overwrite (bool, optional): Option to automatically overwrite previously saved results. Defaults to False.
+        executor (str or :obj:`concurrent.futures.Executor`, optional): How points are evaluated in parallel ['serial', 'threads', 'fork', 'spawn', or an executor object]. Defaults to None.
+        sampler (str, optional): How new points are placed within nodes ['uniform', 'sobol', 'halton', 'lhs', or 'jitter']. Defaults to 'uniform'.
+        timeout (float, optional): Wall-clock time limit (in seconds) for one evaluation. Defaults to None.
+        timeout_value (float, optional): Value of evaluations that exceeded `timeout`. Defaults to nan.
+        timeout_resample (bool, optional): Option to try one replacement point before recording a timeout. Defaults to False.
+        cache (str, optional): Name of a database file in which to cache evaluations. Defaults to None.
+        cache_key (str, optional): Fingerprint of the evaluations, to use instead of the computed one. Defaults to None.
+        N_min (int, optional): Initial number of points per node in adaptive mode. Defaults to None, i.e. always `N_points`.
+        adaptive_tolerance (float, optional): Confidence interval half-width, relative to `split_threshold`, at which nodes stop drawing points in adaptive mode. Defaults to 0.5.
+        split_confidence (float, optional): Confidence level at which differences between nodes must be significant to split them. Defaults to None, i.e. no test.
+        split_test (str, optional): Significance test for `split_confidence` ['stderr' or 'bootstrap']. Defaults to 'stderr'.
+        journal (bool, optional): Option to checkpoint by appending to a journal instead of rewriting the output files. Defaults to False.
+        checkpoint_file (str, optional): Name of a binary (.npz) file in which to checkpoint the exact quadtree instead. Defaults to None.
+        half_open (bool, optional): Option to hand points on a boundary between children to the child to their east or north when splitting nodes, instead of dropping them. Defaults to False.
     """
     
     def __init__(self,
@@ -44,6 +60,20 @@ class RandomQuadTree(BaseTree):
                  filename_points: str = 'points.txt',
                  filename_nodes: str = 'nodes.txt',
                  overwrite: bool = False,
+                 executor: object = None,
+                 sampler: str = 'uniform',
+                 timeout: float = None,
+                 timeout_value: float = np.nan,
+                 timeout_resample: bool = False,
+                 cache: str = None,
+                 cache_key: str = None,
+                 N_min: int = None,
+                 adaptive_tolerance: float = 0.5,
+                 split_confidence: float = None,
+                 split_test: str = 'stderr',
+                 journal: bool = False,
+                 checkpoint_file: str = None,
+                 half_open: bool = False,
                  ) -> None:
         """__init__
 
@@ -62,7 +92,21 @@ class RandomQuadTree(BaseTree):
                          verbose,
                          filename_points,
                          filename_nodes,
-                         overwrite
+                         overwrite,
+                         executor,
+                         timeout,
+                         timeout_value,
+                         timeout_resample,
+                         cache,
+                         cache_key,
+                         sampler,
+                         N_min,
+                         adaptive_tolerance,
+                         split_confidence,
+                         split_test,
+                         journal,
+                         checkpoint_file,
+                         half_open
                          )
         
         
@@ -87,6 +131,33 @@ class RandomQuadTree(BaseTree):
             )
     
         return point
+    
+    
+    def evaluate_points(self, node: QuadNode, N_points: int, rng_seed: int = 123456, locations: tuple = None) -> tuple:
+        """Evaluate points.
+
+        Calculate the values of several points within a given node as either 1 or 0, with a single
+        vectorized draw from the random number generator.
+
+        Args:
+            node (QuadNode): Quadtree node in which to evaulate points.
+            N_points (int): Number of points to evaluate.
+            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
+            locations (tuple, optional): Arrays of x and y coordinates to evaluate. Defaults to None, i.e. uniform draws.
+
+        Returns:
+            tuple: Arrays of x coordinates, y coordinates, and values.
+        """
+        rng = np.random.default_rng(rng_seed)
+        
+        if locations is None:
+            x = rng.uniform(node.x_min, node.x_max, N_points)
+            y = rng.uniform(node.y_min, node.y_max, N_points)
+        else:
+            x, y = locations
+        value = rng.choice([1, 0], N_points)
+        
+        return x, y, value
 
 
 
@@ -120,6 +191,22 @@ class Chi2QuadTree(BaseTree):
                 
                 return y
                 
+        If `vectorized` is True, `a` and `b` are instead column arrays with shape (n, 1), and `model_func`
+        must return an array of models with shape (n, N), one row per parameter pair. Simple NumPy models
+        such as the one above usually broadcast this way without changes. Samples are then evaluated in
+        chunks whose temporary arrays use at most `max_memory` bytes.
+        
+        If the model is linear in the parameters, :math:`f(x | a, b) = a\\,g(x) + b\\,h(x) + c(x)`, pass
+        `linear=True` (the columns :math:`g`, :math:`h` and :math:`c` are then found by evaluating `model_func`
+        at three parameter pairs, and checked at two more, so that nonlinear models raise a ValueError) or give
+        the design matrix :math:`(g, h)` directly as `design_matrix` (in which case `model_func` may be None). :math:`\\chi^2` is then a quadratic form in :math:`(a, b)` that is
+        precomputed once from weighted sums of the data, so each sample costs O(1) regardless of N.
+        
+        If `shared_memory` is True, `data` and `weights` are copied once per run into a
+        :obj:`multiprocessing.shared_memory.SharedMemory` block when the worker pool starts, and each worker
+        attaches to it as read-only arrays instead of receiving its own copy. The block is released by `close`,
+        which is called at the end of `run_quadtree`.
+                
         See tutorials for more examples.
         
     Args:
@@ -128,7 +215,7 @@ class Chi2QuadTree(BaseTree):
         y_min (float): Minimum y value (param `b`)for this quadtree.
         y_max (float): Maximum y value (param `b`)for this quadtree.
         data (:obj:`np.ndarray`): Data array. Must have shape (2, N).
-        model_func (callable): Function :math:`f(x | a, b)` to calculate a model to compare to data.
+        model_func (callable): Function :math:`f(x | a, b)` to calculate a model to compare to data. May be None if `design_matrix` is given.
         weights (:obj:`np.ndarray`, optional): Data weights, typically expressed as :math:`1/\\sigma^2`. Defaults to None.
         max_chi2 (float, optional): Largest permitted reduced :math:`\\chi^2`. Defaults to 10.
         split_threshold (float, optional): Threshold discrepancy in order to split nodes. Defaults to 0.2.
@@ -141,6 +228,22 @@ class Chi2QuadTree(BaseTree):
         filename_points (str, optional): Name of output file to save points. Defaults to 'points.txt'.
         filename_nodes (str, optional): Name of output file to save nodes. Defaults to 'nodes.txt'.
         overwrite (bool, optional): Option to automatically overwrite previously saved results. Defaults to False.
+        vectorized (bool, optional): Whether `model_func` accepts arrays of parameters. Defaults to False.
+        max_memory (float, optional): Approximate memory limit (in bytes) for vectorized evaluations. Defaults to 1e8.
+        linear (bool, optional): Whether `model_func` is linear in the parameters `a` and `b`. Defaults to False.
+        design_matrix (:obj:`np.ndarray`, optional): Linear model columns :math:`(g, h)`. Must have shape (2, N). Defaults to None.
+        shared_memory (bool, optional): Option to share `data` and `weights` with the workers without copying. Defaults to False.
+        executor (str or :obj:`concurrent.futures.Executor`, optional): How points are evaluated in parallel ['serial', 'threads', 'fork', 'spawn', or an executor object]. Defaults to None.
+        cache (str, optional): Name of a database file in which to cache evaluations. Defaults to None.
+        cache_key (str, optional): Fingerprint of the evaluations, to use instead of the computed one. Defaults to None.
+        sampler (str, optional): How new points are placed within nodes ['uniform', 'sobol', 'halton', 'lhs', or 'jitter']. Defaults to 'uniform'.
+        N_min (int, optional): Initial number of points per node in adaptive mode. Defaults to None, i.e. always `N_points`.
+        adaptive_tolerance (float, optional): Confidence interval half-width, relative to `split_threshold`, at which nodes stop drawing points in adaptive mode. Defaults to 0.5.
+        split_confidence (float, optional): Confidence level at which differences between nodes must be significant to split them. Defaults to None, i.e. no test.
+        split_test (str, optional): Significance test for `split_confidence` ['stderr' or 'bootstrap']. Defaults to 'stderr'.
+        journal (bool, optional): Option to checkpoint by appending to a journal instead of rewriting the output files. Defaults to False.
+        checkpoint_file (str, optional): Name of a binary (.npz) file in which to checkpoint the exact quadtree instead. Defaults to None.
+        half_open (bool, optional): Option to hand points on a boundary between children to the child to their east or north when splitting nodes, instead of dropping them. Defaults to False.
     """
     
     def __init__(self,
@@ -162,6 +265,22 @@ class Chi2QuadTree(BaseTree):
                  filename_points: str = 'points.txt',
                  filename_nodes: str = 'nodes.txt',
                  overwrite: bool = False,
+                 vectorized: bool = False,
+                 max_memory: float = 1e8,
+                 linear: bool = False,
+                 design_matrix: np.ndarray = None,
+                 shared_memory: bool = False,
+                 executor: object = None,
+                 cache: str = None,
+                 cache_key: str = None,
+                 sampler: str = 'uniform',
+                 N_min: int = None,
+                 adaptive_tolerance: float = 0.5,
+                 split_confidence: float = None,
+                 split_test: str = 'stderr',
+                 journal: bool = False,
+                 checkpoint_file: str = None,
+                 half_open: bool = False,
                  ) -> None:
         """__init__
 
@@ -180,7 +299,18 @@ class Chi2QuadTree(BaseTree):
                          verbose,
                          filename_points, 
                          filename_nodes,
-                         overwrite
+                         overwrite,
+                         executor,
+                         cache=cache,
+                         cache_key=cache_key,
+                         sampler=sampler,
+                         N_min=N_min,
+                         adaptive_tolerance=adaptive_tolerance,
+                         split_confidence=split_confidence,
+                         split_test=split_test,
+                         journal=journal,
+                         checkpoint_file=checkpoint_file,
+                         half_open=half_open
                          )
         
         # check inputs
@@ -191,7 +321,7 @@ class Chi2QuadTree(BaseTree):
         else:
             self.data = data
         
-        if not callable(model_func):
+        if not callable(model_func) and not (model_func is None and design_matrix is not None):
             raise TypeError('model_func must be callable.')
         else:
             self.model_func = model_func
@@ -209,9 +339,162 @@ class Chi2QuadTree(BaseTree):
         else:
             self.max_chi2 = max_chi2
             
+        if max_memory <= 0:
+            raise ValueError('max_memory must be greater than zero.')
+        else:
+            self.max_memory = max_memory
+            
+        self.vectorized = vectorized
+        self.shared_memory = shared_memory
+        self._shm = None  # shared memory block holding data and weights while the worker pool runs
+        self._shm_info = None  # (name, N) of the shared memory block to attach to (worker copies only)
+        
+        # precompute chi^2 quadratic form for linear models
+        self._linear_form = None
+        if design_matrix is not None:
+            if np.shape(design_matrix) != np.shape(data):
+                raise ValueError('design_matrix must have the same shape as data.')
+            self._precompute_linear_form(design_matrix[0], design_matrix[1], np.zeros(np.shape(data)[1]))
+        elif linear:
+            x_data = self.data[0]
+            offset = self.model_func(x_data, (0., 0.)) * np.ones_like(x_data)
+            g = self.model_func(x_data, (1., 0.)) - offset
+            h = self.model_func(x_data, (0., 1.)) - offset
+
+            # check that the model is indeed linear, at a unit and a non-unit parameter pair
+            for a, b in ((1., 1.), (-2., 3.)):
+                expected = a * g + b * h + offset
+                if not np.allclose(self.model_func(x_data, (a, b)), expected, rtol=1e-6, atol=1e-6 * np.max(np.abs(expected))):
+                    raise ValueError('model_func must be linear in the parameters if linear is True.')
+
+            self._precompute_linear_form(g, h, offset)
+            
         # define other attributes
         self.chi2_min_point = QuadPoint(0, 0, np.inf)  # just a dummy point for now
         
+        
+    def _detached_copy(self) -> BaseTree:
+        """Detached copy.
+        
+        Same as 'BaseTree._detached_copy', but if `shared_memory` is True the data and weights are moved
+        into a shared memory block, and the copy only carries the name of that block.
+        
+        Returns:
+            BaseTree: Copy of this quadtree with an empty root node.
+        """
+        tree = super()._detached_copy()
+        if not self.shared_memory:
+            return tree
+        
+        N_data = np.shape(self.data)[1]
+        if self._shm is None:
+            self._shm = shared_memory.SharedMemory(create=True, size=3 * N_data * 8)
+            shared = np.ndarray((3, N_data), dtype=np.float64, buffer=self._shm.buf)
+            shared[:2] = self.data
+            shared[2] = self.weights
+            del shared  # release the buffer, so that the block can be closed later
+            
+        tree._shm = None
+        tree._shm_info = (self._shm.name, N_data)
+        tree.data = None
+        tree.weights = None
+        
+        return tree
+    
+    
+    def _attach_worker(self) -> None:
+        """Attach worker.
+        
+        Attach to the shared memory block holding the data and weights (if any), as read-only arrays.
+        """
+        if self._shm_info is None:
+            return
+        
+        name, N_data = self._shm_info
+        self._shm = shared_memory.SharedMemory(name=name)
+        shared = np.ndarray((3, N_data), dtype=np.float64, buffer=self._shm.buf)
+        shared.flags.writeable = False
+        self.data = shared[:2]
+        self.weights = shared[2]
+        
+        
+    def close(self, terminate: bool = False) -> None:
+        """Close.
+
+        Same as 'BaseTree.close', but also releases the shared memory block holding the data and weights (if any).
+        
+        Args:
+            terminate (bool, optional): Option to stop the workers immediately, discarding any queued
+                evaluations, instead of waiting for them to finish. Defaults to False.
+        """
+        super().close(terminate=terminate)
+        
+        if self._shm is not None and self._shm_info is None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            
+            
+    def _fingerprint_items(self) -> list:
+        """Fingerprint items.
+
+        Same as 'BaseTree._fingerprint_items', plus the model, data, weights, and `max_chi2`.
+
+        Returns:
+            list: Items to hash (see 'cache.fingerprint').
+        """
+        return super()._fingerprint_items() + [self.model_func, self.data, self.weights, self.max_chi2,
+                                               self._linear_form]
+    
+    
+    def _precompute_linear_form(self, g: np.ndarray, h: np.ndarray, c: np.ndarray) -> None:
+        """Precompute linear form.
+
+        Write :math:`\\chi^2(a, b)` for the linear model :math:`a\\,g + b\\,h + c` as
+        :math:`\\chi^2_{min} + \\Delta p^T F \\Delta p`, where :math:`\\Delta p` is the offset from the
+        weighted least-squares solution and :math:`F` is the Fisher matrix.
+
+        Args:
+            g (:obj:`np.ndarray`): Model column multiplying `a`.
+            h (:obj:`np.ndarray`): Model column multiplying `b`.
+            c (:obj:`np.ndarray`): Constant part of the model.
+        """
+        residual = self.data[1] - c
+        
+        fisher = np.array([[np.sum(self.weights * g * g), np.sum(self.weights * g * h)],
+                           [np.sum(self.weights * g * h), np.sum(self.weights * h * h)]])
+        projection = np.array([np.sum(self.weights * g * residual), np.sum(self.weights * h * residual)])
+        
+        if np.linalg.cond(fisher) > 1 / np.finfo(float).eps:
+            raise ValueError('linear model columns must be linearly independent.')
+        
+        a_best, b_best = np.linalg.solve(fisher, projection)
+        chi2_min = np.sum(self.weights * (residual - a_best * g - b_best * h)**2)
+        
+        self._linear_form = (a_best, b_best, fisher, chi2_min)
+        
+        
+    def _chi2_linear(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Chi^2 linear.
+
+        Calculate reduced :math:`\\chi^2` values from the precomputed quadratic form of a linear model.
+
+        Args:
+            a (:obj:`np.ndarray`): Values of parameter `a`.
+            b (:obj:`np.ndarray`): Values of parameter `b`.
+
+        Returns:
+            :obj:`np.ndarray`: Reduced :math:`\\chi^2` values, capped at `max_chi2`.
+        """
+        a_best, b_best, fisher, chi2_min = self._linear_form
+        da = a - a_best
+        db = b - b_best
+        
+        chi2 = chi2_min + fisher[0, 0] * da**2 + 2 * fisher[0, 1] * da * db + fisher[1, 1] * db**2
+        dof = len(self.data[1]) - 2
+        
+        return np.minimum(self.max_chi2, chi2 / dof)  # if really large, set to max_chi2
+        
     
     def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
         """Evaluate point.
@@ -234,6 +517,11 @@ class Chi2QuadTree(BaseTree):
         y_data = self.data[1]
         
         # calculate model
+        if self._linear_form is not None:
+            return QuadPoint(_x, _y, float(self._chi2_linear(_x, _y)))
+        elif self.vectorized:
+            return QuadPoint(_x, _y, self._chi2_vectorized(np.array([_x]), np.array([_y]))[0])
+        
         model_params = (_x, _y)
         y_model = self.model_func(x_data, model_params)
         
@@ -249,6 +537,76 @@ class Chi2QuadTree(BaseTree):
         return point
     
     
+    def evaluate_points(self, node: QuadNode, N_points: int, rng_seed: int = 123456, locations: tuple = None) -> tuple:
+        """Evaluate points.
+
+        Calculate the values of several points within a given node with a vectorized `model_func`,
+        or the precomputed quadratic form of a linear model (only used if `vectorized` or `linear`).
+
+        Args:
+            node (QuadNode): Quadtree node in which to evaulate points.
+            N_points (int): Number of points to evaluate.
+            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
+            locations (tuple, optional): Arrays of x and y coordinates to evaluate. Defaults to None, i.e. uniform draws.
+
+        Returns:
+            tuple: Arrays of x coordinates, y coordinates, and values.
+        """
+        if locations is None:
+            rng = np.random.default_rng(rng_seed)
+            x = rng.uniform(node.x_min, node.x_max, N_points)
+            y = rng.uniform(node.y_min, node.y_max, N_points)
+        else:
+            x, y = locations
+        
+        if self._linear_form is not None:
+            return x, y, self._chi2_linear(x, y)
+        
+        return x, y, self._chi2_vectorized(x, y)
+    
+    
+    def _chi2_vectorized(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Chi^2 vectorized.
+
+        Calculate reduced :math:`\\chi^2` values for arrays of parameters, in chunks so that the
+        (chunk size, N) temporary arrays stay below `max_memory` bytes.
+
+        Args:
+            a (:obj:`np.ndarray`): Values of parameter `a`.
+            b (:obj:`np.ndarray`): Values of parameter `b`.
+
+        Returns:
+            :obj:`np.ndarray`: Reduced :math:`\\chi^2` values, capped at `max_chi2`.
+        """
+        # grab data
+        x_data = self.data[0]
+        y_data = self.data[1]
+        dof = len(y_data) - 2
+        
+        # model, residuals and weighted squares each need one (chunk size, N) float array
+        chunk_size = max(1, int(self.max_memory // (3 * 8 * len(y_data))))
+        
+        chi2 = np.empty(len(a))
+        for start in range(0, len(a), chunk_size):
+            stop = start + chunk_size
+            y_model = self.model_func(x_data, (a[start:stop, None], b[start:stop, None]))
+            chi2[start:stop] = np.sum(self.weights * (y_data - y_model)**2, axis=1)
+            
+        # reduced chi-square
+        return np.minimum(self.max_chi2, chi2 / dof)  # if really large, set to max_chi2
+    
+    
+    def _has_evaluate_points(self) -> bool:
+        """Has evaluate points.
+        
+        Whole nodes are only evaluated in one call if `model_func` is vectorized or linear.
+
+        Returns:
+            bool: True if 'evaluate_points' should be used instead of 'evaluate_point'.
+        """
+        return self.vectorized or self._linear_form is not None
+    
+    
     def _find_chi2_min(self, node: QuadNode) -> None:
         """Find chi^2 min.
 
@@ -310,6 +668,13 @@ class NbodyQuadTree(BaseTree):
                 
                 return number
                 
+        If `vectorized` is True, `simulation_func` instead receives a tuple of arrays `(x, y)` and must
+        return an array of values with the same length, so that each node is filled with a single call.
+        
+        Simulations that may run for a very long time (e.g. close encounters integrated with IAS15) can be
+        stopped after `timeout` seconds, and recorded with `timeout_value` (see BaseTree). With `cache`, simulations
+        are stored on disk and reused by later runs with other quadtree settings (see BaseTree).
+                
         See tutorials for more examples.
 
 
@@ -329,6 +694,21 @@ class NbodyQuadTree(BaseTree):
         filename_points (str, optional): Name of output file to save points. Defaults to 'points.txt'.
         filename_nodes (str, optional): Name of output file to save nodes. Defaults to 'nodes.txt'.
         overwrite (bool, optional): Option to automatically overwrite previously saved results. Defaults to False.
+        vectorized (bool, optional): Whether `simulation_func` accepts arrays of parameters. Defaults to False.
+        executor (str or :obj:`concurrent.futures.Executor`, optional): How points are evaluated in parallel ['serial', 'threads', 'fork', 'spawn', or an executor object]. Defaults to None.
+        timeout (float, optional): Wall-clock time limit (in seconds) for one simulation. Defaults to None.
+        timeout_value (float, optional): Value of simulations that exceeded `timeout`. Defaults to nan.
+        timeout_resample (bool, optional): Option to try one replacement point before recording a timeout. Defaults to False.
+        cache (str, optional): Name of a database file in which to cache evaluations. Defaults to None.
+        cache_key (str, optional): Fingerprint of the evaluations, to use instead of the computed one. Defaults to None.
+        sampler (str, optional): How new points are placed within nodes ['uniform', 'sobol', 'halton', 'lhs', or 'jitter']. Defaults to 'uniform'.
+        N_min (int, optional): Initial number of points per node in adaptive mode. Defaults to None, i.e. always `N_points`.
+        adaptive_tolerance (float, optional): Confidence interval half-width, relative to `split_threshold`, at which nodes stop drawing points in adaptive mode. Defaults to 0.5.
+        split_confidence (float, optional): Confidence level at which differences between nodes must be significant to split them. Defaults to None, i.e. no test.
+        split_test (str, optional): Significance test for `split_confidence` ['stderr' or 'bootstrap']. Defaults to 'stderr'.
+        journal (bool, optional): Option to checkpoint by appending to a journal instead of rewriting the output files. Defaults to False.
+        checkpoint_file (str, optional): Name of a binary (.npz) file in which to checkpoint the exact quadtree instead. Defaults to None.
+        half_open (bool, optional): Option to hand points on a boundary between children to the child to their east or north when splitting nodes, instead of dropping them. Defaults to False.
     """
     def __init__(self,
                  x_min: float,
@@ -346,6 +726,21 @@ class NbodyQuadTree(BaseTree):
                  filename_points: str = 'points.txt',
                  filename_nodes: str = 'nodes.txt',
                  overwrite: bool = False,
+                 vectorized: bool = False,
+                 executor: object = None,
+                 timeout: float = None,
+                 timeout_value: float = np.nan,
+                 timeout_resample: bool = False,
+                 cache: str = None,
+                 cache_key: str = None,
+                 sampler: str = 'uniform',
+                 N_min: int = None,
+                 adaptive_tolerance: float = 0.5,
+                 split_confidence: float = None,
+                 split_test: str = 'stderr',
+                 journal: bool = False,
+                 checkpoint_file: str = None,
+                 half_open: bool = False,
                  ) -> None:
         """__init__
 
@@ -364,7 +759,21 @@ class NbodyQuadTree(BaseTree):
                          verbose,
                          filename_points,
                          filename_nodes,
-                         overwrite
+                         overwrite,
+                         executor,
+                         timeout,
+                         timeout_value,
+                         timeout_resample,
+                         cache,
+                         cache_key,
+                         sampler,
+                         N_min,
+                         adaptive_tolerance,
+                         split_confidence,
+                         split_test,
+                         journal,
+                         checkpoint_file,
+                         half_open
                          )
         
         # check that input function is callable
@@ -372,6 +781,8 @@ class NbodyQuadTree(BaseTree):
             raise TypeError('simulation_func must be callable.')
         else:
             self.simulation_func = simulation_func
+            
+        self.vectorized = vectorized
         
             
     def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
@@ -391,11 +802,66 @@ class NbodyQuadTree(BaseTree):
         _y = rng.uniform(node.y_min, node.y_max)
         
         # run N-body sim
-        sim = self.simulation_func((_x, _y))
+        if self.vectorized:
+            sim = self.simulation_func((np.array([_x]), np.array([_y])))[0]
+        else:
+            sim = self.simulation_func((_x, _y))
         
         point = QuadPoint(_x, _y, sim)
     
         return point
+    
+    
+    def evaluate_points(self, node: QuadNode, N_points: int, rng_seed: int = 123456, locations: tuple = None) -> tuple:
+        """Evaluate points.
+
+        Calculate the values of several points within a given node with one call to a vectorized
+        `simulation_func` (only used if `vectorized` is True).
+
+        Args:
+            node (QuadNode): Quadtree node in which to evaulate points.
+            N_points (int): Number of points to evaluate.
+            rng_seed (int, optional): Random number generator seed. Defaults to 123456.
+            locations (tuple, optional): Arrays of x and y coordinates to evaluate. Defaults to None, i.e. uniform draws.
+
+        Returns:
+            tuple: Arrays of x coordinates, y coordinates, and values.
+        """
+        if locations is None:
+            rng = np.random.default_rng(rng_seed)
+            x = rng.uniform(node.x_min, node.x_max, N_points)
+            y = rng.uniform(node.y_min, node.y_max, N_points)
+        else:
+            x, y = locations
+        
+        # run N-body sims
+        value = np.asarray(self.simulation_func((x, y)), dtype=float)
+        if value.shape != (N_points,):
+            raise ValueError('vectorized simulation_func must return one value per parameter pair.')
+        
+        return x, y, value
+    
+    
+    def _fingerprint_items(self) -> list:
+        """Fingerprint items.
+
+        Same as 'BaseTree._fingerprint_items', plus `simulation_func`.
+
+        Returns:
+            list: Items to hash (see 'cache.fingerprint').
+        """
+        return super()._fingerprint_items() + [self.simulation_func]
+    
+    
+    def _has_evaluate_points(self) -> bool:
+        """Has evaluate points.
+        
+        Whole nodes are only simulated in one call if `simulation_func` is vectorized.
+
+        Returns:
+            bool: True if 'evaluate_points' should be used instead of 'evaluate_point'.
+        """
+        return self.vectorized
 
         
         
@@ -415,6 +881,7 @@ class Hist2dQuadTree(BaseTree):
         N_points (int, optional): Maximum number of points per node. Defaults to 20.
         min_depth (int, optional): Minimum quadtree depth. Defaults to 3.
         max_depth (int, optional):  Maximum quadtree depth. Defaults to 6.
+        half_open (bool, optional): Option to hand points on a boundary between children to the child to their east or north when splitting nodes, instead of dropping them. Defaults to False.
     """
     def __init__(self,
                  x_min: float,
@@ -425,6 +892,7 @@ class Hist2dQuadTree(BaseTree):
                  N_points: int = 20,
                  min_depth: int = 3,
                  max_depth: int = 6,
+                 half_open: bool = False,
                  ) -> None:
         """__init__
 
@@ -438,6 +906,7 @@ class Hist2dQuadTree(BaseTree):
                          N_points=N_points,
                          min_depth=min_depth,
                          max_depth=max_depth,
+                         half_open=half_open,
                          )
         
             
@@ -474,19 +943,19 @@ class Hist2dQuadTree(BaseTree):
                 raise TypeError('z must be ndarray.')
             elif len(z) != len(x):
                 raise ValueError('z must have same length as x and y.')
-            
-            # create QuadPoints
-            for i in range(len(x)):
-                point = QuadPoint(float(x[i]), float(y[i]), float(z[i]))
-                self.root.node_points.append(point)
         
         # if no z is specified, set to nan
+        points = np.stack((x, y, np.full(len(x), np.nan) if z is None else z), axis=1).astype(float)
+        
+        if self.root._is_split():
+            self.root.node_points.extend(PointList.from_arrays(*points.T))
+            self.squeeze_node(self.root)
         else:
-            for i in range(len(x)):
-                point = QuadPoint(float(x[i]), float(y[i]), np.nan)
-                self.root.node_points.append(point)
-            
-        self.squeeze_node(self.root)
+            # build the quadtree from all points at once, as 'squeeze_node' would
+            points = np.concatenate((np.stack((self.root.node_points.x, self.root.node_points.y,
+                                               self.root.node_points.values), axis=1), points))
+            self.root.node_points.clear()
+            self._grow_tree(points)
         
         
         
\ No newline at end of file
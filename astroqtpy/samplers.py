@@ -0,0 +1,175 @@
+import numpy as np
+
+
+SAMPLERS = ('uniform', 'sobol', 'halton', 'lhs', 'jitter')  # choices for the 'sampler' option of quadtrees
+
+_SOBOL_BITS = 32
+
+
+def sample(sampler: str, N_points: int, existing: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Sample.
+
+    Draw new sample locations in the unit square, completing the design formed by any existing points
+    (e.g. points handed down from a parent node after a split), so that the combined set stays evenly spread.
+
+    Args:
+        sampler (str): Sampling scheme ['uniform', 'sobol', 'halton', 'lhs', or 'jitter'].
+        N_points (int): Number of new locations.
+        existing (:obj:`np.ndarray`): Existing locations in the unit square, with shape (N, 2).
+        rng (:obj:`np.random.Generator`): Random number generator (used for scrambling and jittering).
+
+    Returns:
+        :obj:`np.ndarray`: New locations in the unit square, with shape (N_points, 2).
+    """
+    existing = np.asarray(existing, dtype=float).reshape(-1, 2)
+    N_total = N_points + len(existing)
+
+    if sampler == 'uniform':
+        return rng.uniform(0, 1, (N_points, 2))
+    elif sampler == 'sobol':
+        return _complete(sobol(N_total, rng), existing)
+    elif sampler == 'halton':
+        return _complete(halton(N_total, rng), existing)
+    elif sampler == 'lhs':
+        return _latin_hypercube(N_points, existing, rng)
+    elif sampler == 'jitter':
+        return _jittered_grid(N_points, existing, rng)
+    else:
+        raise ValueError('sampler must be either "uniform", "sobol", "halton", "lhs", or "jitter".')
+
+
+def sobol(N_points: int, rng: np.random.Generator) -> np.ndarray:
+    """Sobol.
+
+    First points of the 2D Sobol sequence, scrambled with a random digital shift.
+
+    Args:
+        N_points (int): Number of points.
+        rng (:obj:`np.random.Generator`): Random number generator.
+
+    Returns:
+        :obj:`np.ndarray`: Points in the unit square, with shape (N_points, 2).
+    """
+    # direction numbers: van der Corput in x, primitive polynomial x + 1 in y (m_k = 2 m_(k-1) XOR m_(k-1))
+    m = [1]
+    for _ in range(_SOBOL_BITS - 1):
+        m.append((m[-1] << 1) ^ m[-1])
+    directions = np.array([[1 << (_SOBOL_BITS - 1 - k), m[k] << (_SOBOL_BITS - 1 - k)] for k in range(_SOBOL_BITS)],
+                          dtype=np.uint64)
+
+    index = np.arange(N_points, dtype=np.uint64)
+    digits = np.zeros((N_points, 2), dtype=np.uint64)
+    for k in range(max(1, int(N_points).bit_length())):
+        bit = (index >> np.uint64(k)) & np.uint64(1)
+        digits ^= bit[:, None] * directions[k]
+
+    shift = rng.integers(0, 1 << _SOBOL_BITS, 2, dtype=np.uint64)
+
+    return (digits ^ shift) / float(1 << _SOBOL_BITS)
+
+
+def halton(N_points: int, rng: np.random.Generator) -> np.ndarray:
+    """Halton.
+
+    First points of the 2D Halton sequence (bases 2 and 3), scrambled with a random shift modulo 1.
+
+    Args:
+        N_points (int): Number of points.
+        rng (:obj:`np.random.Generator`): Random number generator.
+
+    Returns:
+        :obj:`np.ndarray`: Points in the unit square, with shape (N_points, 2).
+    """
+    points = np.zeros((N_points, 2))
+    for dim, base in enumerate((2, 3)):
+        index = np.arange(1, N_points + 1)
+        scale = 1.
+        while np.any(index > 0):
+            scale /= base
+            points[:, dim] += scale * (index % base)
+            index //= base
+
+    return (points + rng.uniform(0, 1, 2)) % 1
+
+
+def _complete(design: np.ndarray, existing: np.ndarray) -> np.ndarray:
+    """Complete.
+
+    Convenience function to pick the design points that fill the gaps left by existing points. The unit square
+    is split into a grid with at least one cell per design point, and design points are taken in sequence order,
+    skipping cells that are already occupied as long as possible.
+
+    Args:
+        design (:obj:`np.ndarray`): Design with room for the existing points, with shape (N, 2).
+        existing (:obj:`np.ndarray`): Existing points, with shape (M, 2), M <= N.
+
+    Returns:
+        :obj:`np.ndarray`: Chosen design points, with shape (N - M, 2).
+    """
+    N_points = len(design) - len(existing)
+    N_grid = int(np.ceil(np.sqrt(len(design))))
+    
+    occupied = set(map(tuple, np.minimum((existing * N_grid).astype(int), N_grid - 1)))
+    chosen = []
+    skipped = []
+    for i, cell in enumerate(map(tuple, np.minimum((design * N_grid).astype(int), N_grid - 1))):
+        if cell in occupied:
+            skipped.append(i)
+        else:
+            occupied.add(cell)
+            chosen.append(i)
+            
+    return design[(chosen + skipped)[:N_points]]
+
+
+def _latin_hypercube(N_points: int, existing: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Latin hypercube.
+
+    Convenience function to draw a Latin hypercube sample: each axis is split into one stratum per point
+    (new and existing), and new points are spread over the strata not yet occupied by existing points.
+
+    Args:
+        N_points (int): Number of new points.
+        existing (:obj:`np.ndarray`): Existing points, with shape (M, 2).
+        rng (:obj:`np.random.Generator`): Random number generator.
+
+    Returns:
+        :obj:`np.ndarray`: New points, with shape (N_points, 2).
+    """
+    N_total = N_points + len(existing)
+    points = np.zeros((N_points, 2))
+    for dim in range(2):
+        occupied = np.zeros(N_total, dtype=bool)
+        occupied[np.minimum((existing[:, dim] * N_total).astype(int), N_total - 1)] = True
+        strata = np.flatnonzero(~occupied)
+        strata = rng.permutation(np.concatenate((strata, rng.choice(N_total, max(0, N_points - len(strata))))))
+        points[:, dim] = (strata[:N_points] + rng.uniform(0, 1, N_points)) / N_total
+
+    return points
+
+
+def _jittered_grid(N_points: int, existing: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Jittered grid.
+
+    Convenience function to draw a jittered (stratified) sample: the unit square is split into a grid with at
+    least one cell per point (new and existing), and new points are placed at random within empty cells.
+
+    Args:
+        N_points (int): Number of new points.
+        existing (:obj:`np.ndarray`): Existing points, with shape (M, 2).
+        rng (:obj:`np.random.Generator`): Random number generator.
+
+    Returns:
+        :obj:`np.ndarray`: New points, with shape (N_points, 2).
+    """
+    N_grid = int(np.ceil(np.sqrt(N_points + len(existing))))
+    occupied = np.zeros((N_grid, N_grid), dtype=bool)
+    cells = np.minimum((existing * N_grid).astype(int), N_grid - 1)
+    occupied[cells[:, 0], cells[:, 1]] = True
+
+    empty = rng.permutation(np.flatnonzero(~occupied.ravel()))
+    if len(empty) < N_points:
+        empty = np.concatenate((empty, rng.choice(N_grid**2, N_points - len(empty))))
+    i, j = np.divmod(empty[:N_points], N_grid)
+
+    return (np.stack((i, j), axis=1) + rng.uniform(0, 1, (N_points, 2))) / N_grid
@@ -0,0 +1,856 @@
+import pathlib
+import pickle
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from astroqtpy import basetree
+from astroqtpy.basetree import BaseTree
+from astroqtpy.quadnode import QuadNode
+from astroqtpy.quadpoint import QuadPoint
+
+
+class LinearTree(BaseTree):
+    """Minimal quadtree for testing BaseTree. Point values are x + y.
+    
+    """
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        rng = np.random.default_rng(rng_seed)
+        x = rng.uniform(node.x_min, node.x_max)
+        y = rng.uniform(node.y_min, node.y_max)
+        
+        return QuadPoint(x, y, x + y)
+    
+    
+class FailingTree(LinearTree):
+    """Minimal quadtree for testing BaseTree. Slow, and fails in the west half.
+    
+    """
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        time.sleep(0.2)
+        if node.x_max <= 0.5:
+            raise RuntimeError('simulation failed')
+        
+        return super().evaluate_point(node, rng_seed)
+    
+    
+class NoisyTree(LinearTree):
+    """Minimal quadtree for testing BaseTree. Point values are 0 in the west half, and random elsewhere.
+    
+    """
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        point = super().evaluate_point(node, rng_seed)
+        if point.x < 0.5:
+            return QuadPoint(point.x, point.y, 0.)
+        
+        return QuadPoint(point.x, point.y, np.random.default_rng(rng_seed + 1).normal())
+    
+    
+class StepTree(LinearTree):
+    """Minimal quadtree for testing BaseTree. Point values have a gentle slope in x, and a step at x = 2.
+    
+    """
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        point = super().evaluate_point(node, rng_seed)
+        
+        return QuadPoint(point.x, point.y, 0.1 * point.x + (point.x >= 2))
+    
+    
+def test_worker_pool(tmp_path) -> None:
+    """Test that the worker pool is reused and torn down.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1,
+                           N_points=4,
+                           N_proc=2,
+                           filename_points=str(tmp_path / 'points.txt'),
+                           filename_nodes=str(tmp_path / 'nodes.txt')
+                           )
+    
+    # pool is created lazily and reused between nodes
+    assert test_tree._pool is None
+    test_tree.fill(test_tree.root, 4)
+    pool = test_tree._pool
+    assert pool is not None
+    test_tree.root.split_node()
+    test_tree.fill(test_tree.root, 4)
+    assert test_tree._pool is pool
+    
+    # pool is closed after a run
+    test_tree.run_quadtree()
+    assert test_tree._pool is None
+    
+    # pool is closed when used as a context manager
+    with LinearTree(0, 1, 0, 1, N_points=4, N_proc=2) as test_tree:
+        test_tree.fill(test_tree.root, 4)
+        assert test_tree._pool is not None
+    assert test_tree._pool is None
+    
+    
+def test_worker_pool_terminate() -> None:
+    """Test that queued evaluations are discarded when a run fails.
+    
+    """
+    start = time.time()
+    with pytest.raises(RuntimeError):
+        with LinearTree(0, 1, 0, 1, N_proc=2) as test_tree:
+            for _ in range(8):
+                test_tree._get_pool().apply_async(time.sleep, (2,))
+            raise RuntimeError('interrupted')
+        
+    assert test_tree._pool is None
+    assert time.time() - start < 4
+    
+    
+class CountingPool:
+    """Serial stand-in for the worker pool that records the size of each starmap batch.
+    
+    """
+    def __init__(self, tree) -> None:
+        self.batches = []
+        basetree._init_worker(tree._detached_copy())
+        
+    def starmap(self, func, iterable) -> list:
+        iterable = list(iterable)
+        self.batches.append(len(iterable))
+        self.payload = max(len(pickle.dumps(args)) for args in iterable)
+        return [func(*args) for args in iterable]
+    
+    
+def test_batched_forward(tmp_path) -> None:
+    """Test that one refinement step evaluates the whole frontier as a single batch.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1,
+                           N_points=4,
+                           N_proc=2,
+                           filename_points=str(tmp_path / 'points.txt'),
+                           filename_nodes=str(tmp_path / 'nodes.txt')
+                           )
+    pool = CountingPool(test_tree)
+    test_tree._pool = pool
+    
+    # first step splits down to min_depth and fills every leaf in one batch
+    test_tree._forward(test_tree.root)
+    leaves = []
+    test_tree._collect_leaves(test_tree.root, leaves)
+    assert len(leaves) == 4**(test_tree.min_depth - 1)
+    assert pool.batches == [4 * len(leaves)]
+    
+    # every point is handed back to the leaf it was evaluated for
+    for leaf in leaves:
+        assert len(leaf.node_points) == 4
+        for point in leaf.node_points:
+            assert leaf.x_min <= point.x <= leaf.x_max
+            assert leaf.y_min <= point.y <= leaf.y_max
+    test_tree._pool = None
+    
+    
+def reference_forward(tree: BaseTree, node: QuadNode) -> None:
+    """Node-by-node refinement step, filling every node as soon as it is split.
+    
+    """
+    def fill(node: QuadNode) -> None:
+        if node._is_split():
+            for child in (node.child_nw, node.child_ne, node.child_sw, node.child_se):
+                fill(child)
+        while len(node.node_points) < tree.N_points and not node._is_split():
+            node.node_points.append(tree.evaluate_point(node, rng_seed=np.random.randint(1, 1e8)))
+            
+    def compare(northwest: QuadNode, southeast: QuadNode, dir_northsouth: bool) -> None:
+        if northwest._is_split() and southeast._is_split():
+            pairs = [(northwest.child_sw, southeast.child_nw), (northwest.child_se, southeast.child_ne)] if dir_northsouth else \
+                    [(northwest.child_ne, southeast.child_nw), (northwest.child_se, southeast.child_sw)]
+        elif northwest._is_split():
+            pairs = [(northwest.child_sw, southeast), (northwest.child_se, southeast)] if dir_northsouth else \
+                    [(northwest.child_ne, southeast), (northwest.child_se, southeast)]
+        elif southeast._is_split():
+            pairs = [(northwest, southeast.child_nw), (northwest, southeast.child_ne)] if dir_northsouth else \
+                    [(northwest, southeast.child_nw), (northwest, southeast.child_sw)]
+        else:
+            pairs = []
+            if abs(northwest.get_node_value(tree.node_statistic) - southeast.get_node_value(tree.node_statistic)) >= tree.split_threshold:
+                if northwest.depth >= southeast.depth and southeast.depth < tree.max_depth:
+                    southeast.split_node()
+                    fill(southeast)
+                if southeast.depth >= northwest.depth and northwest.depth < tree.max_depth:
+                    northwest.split_node()
+                    fill(northwest)
+        for pair in pairs:
+            compare(*pair, dir_northsouth)
+            
+    if node._is_split():
+        compare(node.child_nw, node.child_ne, False)
+        compare(node.child_sw, node.child_se, False)
+        compare(node.child_nw, node.child_sw, True)
+        compare(node.child_ne, node.child_se, True)
+    elif node.depth < tree.min_depth:
+        node.split_node()
+        
+    if node._is_split():
+        for child in (node.child_nw, node.child_ne, node.child_sw, node.child_se):
+            reference_forward(tree, child)
+    else:
+        fill(node)
+    
+    
+def test_recursive_pass(tmp_path) -> None:
+    """Test that default runs refine node by node, and that batched runs refine about as much.
+    
+    """
+    with pytest.raises(ValueError):
+        LinearTree(0, 1, 0, 1).run_quadtree(as_completed=True, batched=True)
+        
+    leaves = []
+    for run in ['reference', 'default', 'batched']:
+        np.random.seed(3)
+        test_tree = NoisyTree(0, 1, 0, 1,
+                              split_threshold=0.5,
+                              N_points=4,
+                              max_depth=6,
+                              filename_points=str(tmp_path / 'points.txt'),
+                              filename_nodes=str(tmp_path / 'nodes.txt'),
+                              overwrite=True
+                              )
+        if run == 'reference':
+            for _ in range(test_tree.min_depth):
+                reference_forward(test_tree, test_tree.root)
+        else:
+            test_tree.run_quadtree(batched=run == 'batched')
+        leaves.append([])
+        test_tree._collect_leaves(test_tree.root, leaves[-1])
+        
+    key = lambda leaf: (leaf.x_min, leaf.y_min, leaf.depth, [point.value for point in leaf.node_points])
+    assert [key(leaf) for leaf in leaves[0]] == [key(leaf) for leaf in leaves[1]]
+    assert len(leaves[0]) > 50
+    assert abs(len(leaves[2]) - len(leaves[0])) < len(leaves[0]) / 4
+    
+    
+def test_task_payload() -> None:
+    """Test that tasks sent to the workers do not grow with the quadtree.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1, N_points=4, N_proc=2)
+    pool = CountingPool(test_tree)
+    test_tree._pool = pool
+    
+    test_tree.fill(test_tree.root, 4)
+    assert pool.payload < 100  # bytes; node limits and a seed
+    
+    test_tree.root.node_points.extend(QuadPoint(0.5, 0.5, 1.) for _ in range(1000))
+    test_tree.root.split_node()
+    test_tree.fill(test_tree.root.child_ne, 4)
+    assert pool.payload < 100
+    for point in test_tree.root.child_ne.node_points:
+        assert point.value == pytest.approx(point.x + point.y)
+    test_tree._pool = None
+    
+    
+@pytest.mark.parametrize('executor', ['serial', 'threads', 'spawn', 'custom'])
+def test_executor(executor) -> None:
+    """Test that every executor backend fills nodes with the same points.
+    
+    """
+    if executor == 'custom':
+        executor = ThreadPoolExecutor(max_workers=2)
+        
+    reference_tree = LinearTree(0, 1, 0, 1, N_points=4)
+    test_tree = LinearTree(0, 1, 0, 1, N_points=4, N_proc=2, executor=executor)
+    assert test_tree._is_parallel() == (executor != 'serial')
+    
+    for tree in (reference_tree, test_tree):
+        np.random.seed(11)
+        tree.root.split_node()
+        tree.fill(tree.root, 4)
+        
+    for node in ('child_nw', 'child_ne', 'child_sw', 'child_se'):
+        for point_a, point_b in zip(getattr(reference_tree.root, node).node_points,
+                                    getattr(test_tree.root, node).node_points):
+            assert (point_a.x, point_a.y, point_a.value) == (point_b.x, point_b.y, point_b.value)
+    test_tree.close()
+    
+    # executors given by the caller are not shut down
+    if isinstance(executor, ThreadPoolExecutor):
+        assert executor.submit(abs, -1).result() == 1
+        executor.shutdown()
+        
+    with pytest.raises(ValueError):
+        LinearTree(0, 1, 0, 1, executor='gpu')
+    with pytest.raises(TypeError):
+        LinearTree(0, 1, 0, 1, executor=object())
+        
+        
+class SlowTree(LinearTree):
+    """Minimal quadtree for testing BaseTree. Points in the west half never finish.
+    
+    """
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        if node.x_max <= 0.5:
+            time.sleep(60)
+        
+        return super().evaluate_point(node, rng_seed)
+    
+    
+def test_timeout() -> None:
+    """Test that evaluations exceeding the time limit are stopped and flagged.
+    
+    """
+    with pytest.raises(ValueError):
+        SlowTree(0, 1, 0, 1, timeout=0)
+    with pytest.raises(ValueError):
+        SlowTree(0, 1, 0, 1, N_proc=2, timeout=1, executor='threads')
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        with pytest.raises(ValueError):
+            SlowTree(0, 1, 0, 1, timeout=1, executor=executor)
+        
+    test_tree = SlowTree(0, 1, 0, 1, N_points=2, N_proc=2, timeout=0.5, timeout_value=-1., timeout_resample=True)
+    test_tree.root.split_node()
+    start = time.time()
+    test_tree.fill(test_tree.root, 2)
+    assert time.time() - start < 10
+    test_tree.close()
+    
+    for node in (test_tree.root.child_nw, test_tree.root.child_sw):
+        for point in node.node_points:
+            assert point.flag == QuadPoint.FLAG_TIMEOUT and point.value == -1.
+            assert node.x_min <= point.x <= node.x_max and node.y_min <= point.y <= node.y_max
+    for node in (test_tree.root.child_ne, test_tree.root.child_se):
+        for point in node.node_points:
+            assert point.flag == 0 and point.value == pytest.approx(point.x + point.y)
+            
+    # errors are still raised
+    failing_tree = FailingTree(0, 1, 0, 1, N_points=2, timeout=5)
+    failing_tree.root.split_node()
+    with pytest.raises(RuntimeError):
+        failing_tree.fill(failing_tree.root.child_nw, 2)
+        
+        
+class CountingTree(LinearTree):
+    """Minimal quadtree for testing BaseTree. Counts its (serial) evaluations.
+    
+    """
+    N_evaluations = 0
+    
+    def evaluate_point(self, node: QuadNode, rng_seed: int = 123456) -> QuadPoint:
+        CountingTree.N_evaluations += 1
+        
+        return super().evaluate_point(node, rng_seed)
+    
+    
+def test_cache(tmp_path) -> None:
+    """Test that reruns with other settings reuse cached evaluations.
+    
+    """
+    kwargs = dict(N_points=4, filename_points=str(tmp_path / 'points.txt'),
+                  filename_nodes=str(tmp_path / 'nodes.txt'), overwrite=True, cache=str(tmp_path / 'cache.db'))
+    
+    first_tree = CountingTree(0, 1, 0, 1, split_threshold=0.2, **kwargs)
+    first_tree.run_quadtree()
+    first_points = np.loadtxt(tmp_path / 'points.txt')
+    N_first = CountingTree.N_evaluations
+    assert N_first == len(first_points)
+    
+    # the same run is free and gives the same points, and finer settings only evaluate new samples
+    CountingTree.N_evaluations = 0
+    second_tree = CountingTree(0, 1, 0, 1, split_threshold=0.2, **kwargs)
+    second_tree.run_quadtree()
+    assert CountingTree.N_evaluations == 0
+    assert np.array_equal(np.loadtxt(tmp_path / 'points.txt'), first_points)
+    
+    third_tree = CountingTree(0, 1, 0, 1, split_threshold=0.05, max_depth=7, **kwargs)
+    third_tree.run_quadtree()
+    assert third_tree.node_count > first_tree.node_count
+    assert CountingTree.N_evaluations <= len(np.loadtxt(tmp_path / 'points.txt')) - N_first
+    
+    # a different fingerprint does not reuse results
+    CountingTree.N_evaluations = 0
+    other_tree = CountingTree(0, 1, 0, 1, cache_key='other', **kwargs)
+    other_tree.run_quadtree()
+    assert CountingTree.N_evaluations == N_first
+    
+    
+@pytest.mark.parametrize('N_proc', [1, 2])
+def test_sampler(N_proc) -> None:
+    """Test that samplers place the points of nodes, and of their children after a split.
+    
+    """
+    with pytest.raises(ValueError):
+        LinearTree(0, 1, 0, 1, sampler='grid')
+        
+    test_tree = LinearTree(0, 4, 0, 4, N_points=16, N_proc=N_proc, sampler='jitter')
+    test_tree.fill(test_tree.root, 16)
+    test_tree.root.split_node()
+    test_tree.fill(test_tree.root, 16)
+    test_tree.close()
+    
+    for node in (test_tree.root.child_nw, test_tree.root.child_ne, test_tree.root.child_sw, test_tree.root.child_se):
+        assert len(node.node_points) == 16
+        cells = {(int(point.x * 2), int(point.y * 2)) for point in node.node_points}
+        assert len(cells) == 16
+        for point in node.node_points:
+            assert point.value == pytest.approx(point.x + point.y)
+            
+            
+def test_compare_unfilled() -> None:
+    """Test that unfilled leaves, and pairs already compared in a sweep, are not compared.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1, split_threshold=0.5, N_points=1, max_depth=4)
+    root = test_tree.root
+    root.split_node()
+    root.child_nw.node_points.append(QuadPoint(0.25, 0.75, 0))
+    root.child_ne.node_points.append(QuadPoint(0.75, 0.75, 1))
+    
+    # south children are unfilled
+    assert test_tree._compare_nodes(root.child_nw, root.child_sw, True) == 0
+    assert test_tree._compare_nodes(root.child_ne, root.child_se, True) == 0
+    assert not root.child_nw._is_split() and not root.child_sw._is_split()
+    
+    # filled neighbors with discrepant values are split
+    test_tree._compared, test_tree._parents, test_tree._deferred = set(), {}, set()
+    assert test_tree._compare_nodes(root.child_nw, root.child_ne, False) == 2
+    
+    # their children are not compared again across the same boundary in this sweep
+    for node in (root.child_nw, root.child_ne):
+        for child in (node.child_nw, node.child_ne, node.child_sw, node.child_se):
+            while len(child.node_points) < 1:
+                child.node_points.append(QuadPoint(child.x_min, child.y_min, np.random.rand()))
+    assert test_tree._compare_nodes(root.child_nw, root.child_ne, False) == 0
+    
+    
+def test_as_completed(tmp_path) -> None:
+    """Test event-driven refinement and neighbor search.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1,
+                           split_threshold=0.1,
+                           N_points=4,
+                           N_proc=2,
+                           filename_points=str(tmp_path / 'points.txt'),
+                           filename_nodes=str(tmp_path / 'nodes.txt')
+                           )
+    with test_tree:
+        test_tree._run_as_completed()
+    
+    # nodes were split beyond min_depth, and every leaf is filled
+    leaves = []
+    test_tree._collect_leaves(test_tree.root, leaves)
+    assert len(leaves) > 4**(test_tree.min_depth - 1)
+    assert test_tree.node_count == len(leaves)
+    assert all(len(leaf.node_points) >= 4 for leaf in leaves)
+    assert (tmp_path / 'points.txt').exists()
+    
+    # worker errors propagate without waiting for queued evaluations
+    test_tree = FailingTree(0, 1, 0, 1,
+                            N_proc=2,
+                            filename_points=str(tmp_path / 'points.txt'),
+                            filename_nodes=str(tmp_path / 'nodes.txt'),
+                            overwrite=True
+                            )
+    start = time.time()
+    with pytest.raises(RuntimeError):
+        test_tree.run_quadtree(as_completed=True)
+    assert time.time() - start < 5
+    assert test_tree._pool is None
+    
+    # neighbors share an edge (not just a corner)
+    node = QuadNode(0, 1, 0, 1, 1)
+    node.split_node()
+    node.child_ne.split_node()
+    test_tree.root = node
+    assert len(test_tree._find_neighbors(node.child_nw)) == 3
+    assert len(test_tree._find_neighbors(node.child_se)) == 3
+    assert len(test_tree._find_neighbors(node.child_sw)) == 2
+    
+    # the neighbor index is kept up to date as leaves are split, and matches the neighbor search
+    leaves = []
+    test_tree._collect_leaves(node, leaves)
+    test_tree._index_neighbors(leaves)
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        leaf = rng.choice(list(test_tree._neighbors))
+        if leaf.depth < 7:
+            test_tree._split_node(leaf)
+    leaves = []
+    test_tree._collect_leaves(test_tree.root, leaves)
+    assert set(test_tree._neighbors) == set(leaves)
+    assert all(test_tree._leaf_neighbors(leaf) == test_tree._find_neighbors(leaf) for leaf in leaves)
+    with pytest.raises(RuntimeError):
+        test_tree.run_quadtree(as_completed=True)
+    assert test_tree._neighbors is None
+    
+    
+def test_adaptive(tmp_path) -> None:
+    """Test adaptive sample sizes, which stop early in uniform nodes and go up to N_points in noisy ones.
+    
+    """
+    for kwargs in [{'N_min': 0}, {'N_min': 21}, {'N_min': 5, 'node_statistic': 'count'}, {'N_min': 5, 'adaptive_tolerance': 0}]:
+        with pytest.raises(ValueError):
+            LinearTree(0, 1, 0, 1, **kwargs)
+            
+    for as_completed in [False, True]:
+        test_tree = NoisyTree(0, 1, 0, 1,
+                              N_points=32,
+                              min_depth=2,
+                              max_depth=2,
+                              N_min=4,
+                              filename_points=str(tmp_path / 'points.txt'),
+                              filename_nodes=str(tmp_path / 'nodes.txt'),
+                              overwrite=True
+                              )
+        test_tree.run_quadtree(as_completed=as_completed)
+        
+        leaves = []
+        test_tree._collect_leaves(test_tree.root, leaves)
+        assert len(leaves) == 4
+        for leaf in leaves:
+            if leaf.x_max <= 0.5:
+                assert len(leaf.node_points) == 4
+            else:
+                assert len(leaf.node_points) == 32
+                
+    # without N_min, nodes always need N_points
+    test_tree = NoisyTree(0, 1, 0, 1, N_points=32)
+    test_tree.fill(test_tree.root, 4)
+    assert not test_tree._is_filled(test_tree.root)
+    assert test_tree._fill_target(test_tree.root) == 32
+    
+    
+def test_split_confidence(tmp_path) -> None:
+    """Test that significance tests keep sampling noise from splitting nodes, but not real differences.
+    
+    """
+    for kwargs in [{'split_confidence': 1}, {'split_confidence': 0.9, 'node_statistic': 'count'},
+                   {'split_confidence': 0.9, 'N_points': 1}, {'split_test': 'ttest'}]:
+        with pytest.raises(ValueError):
+            LinearTree(0, 1, 0, 1, **kwargs)
+            
+    def make_node(values: list) -> QuadNode:
+        node = QuadNode(0, 1, 0, 1, 1)
+        node.node_points.extend(QuadPoint(0.5, 0.5, value) for value in values)
+        return node
+    
+    quiet = np.array([-0.02, -0.01, 0., 0.01, 0.02] * 4)
+    noisy = np.array([-1, -0.5, 0., 0.5, 1] * 4)
+    for split_test in ['stderr', 'bootstrap']:
+        test_tree = LinearTree(0, 1, 0, 1, split_confidence=0.95, split_test=split_test)
+        assert test_tree._is_significant(make_node(quiet), make_node(quiet + 0.3))
+        assert not test_tree._is_significant(make_node(noisy), make_node(noisy + 0.3))
+        
+        # nodes with significant differences are still only split beyond split_threshold
+        assert test_tree._compare_leaves(make_node(quiet), make_node(quiet + 0.1)) == []
+        assert len(test_tree._compare_leaves(make_node(quiet), make_node(quiet + 0.3))) == 2
+        
+    # pure noise splits far fewer nodes with a significance test
+    node_counts = []
+    for split_confidence in [None, 0.95]:
+        np.random.seed(1)
+        test_tree = NoisyTree(0.5, 1, 0, 1,
+                              N_points=8,
+                              min_depth=2,
+                              max_depth=4,
+                              split_confidence=split_confidence,
+                              filename_points=str(tmp_path / 'points.txt'),
+                              filename_nodes=str(tmp_path / 'nodes.txt'),
+                              overwrite=True
+                              )
+        test_tree.run_quadtree()
+        node_counts.append(test_tree.node_count)
+    assert node_counts[1] < node_counts[0] / 2
+    
+    
+def test_budget(tmp_path) -> None:
+    """Test anytime refinement, which splits the most discrepant nodes first and stops at the budget.
+    
+    """
+    test_tree = LinearTree(0, 1, 0, 1)
+    for kwargs in [{'max_evaluations': 0}, {'max_wall_time': -1}, {'max_evaluations': 100, 'as_completed': True}]:
+        with pytest.raises(ValueError):
+            test_tree.run_quadtree(**kwargs)
+            
+    for N_proc in [1, 2]:
+        test_tree = StepTree(0, 4, 0, 4,
+                             split_threshold=0.05,
+                             N_points=4,
+                             max_depth=6,
+                             N_proc=N_proc,
+                             filename_points=str(tmp_path / 'points.txt'),
+                             filename_nodes=str(tmp_path / 'nodes.txt'),
+                             overwrite=True
+                             )
+        test_tree.run_quadtree(max_evaluations=128)
+        
+        # the 4x4 grid costs 64 points, and every further split is at the step, despite the gradient elsewhere
+        leaves = []
+        test_tree._collect_leaves(test_tree.root, leaves)
+        assert sum(len(leaf.node_points) for leaf in leaves) <= 128
+        assert len(leaves) > 16
+        for leaf in leaves:
+            assert len(leaf.node_points) >= 4
+            if leaf.depth > test_tree.min_depth:
+                assert leaf.x_min >= 1 and leaf.x_max <= 3
+        assert len(np.loadtxt(tmp_path / 'points.txt')) == sum(len(leaf.node_points) for leaf in leaves)
+        
+    # without a budget on evaluations, the time limit stops refinement after the grid
+    test_tree = StepTree(0, 4, 0, 4,
+                         split_threshold=0.05,
+                         N_points=4,
+                         filename_points=str(tmp_path / 'points.txt'),
+                         filename_nodes=str(tmp_path / 'nodes.txt'),
+                         overwrite=True
+                         )
+    test_tree.run_quadtree(max_wall_time=1e-9)
+    leaves = []
+    test_tree._collect_leaves(test_tree.root, leaves)
+    assert len(leaves) == 16
+    
+    
+def test_change_tracking(tmp_path, monkeypatch) -> None:
+    """Test that steps which only visit changed regions refine exactly like full passes, with fewer comparisons.
+    
+    """
+    results = []
+    for tracking in [False, True]:
+        if not tracking:
+            monkeypatch.setattr(BaseTree, '_track_changes', lambda self, leaves: None)
+        else:
+            monkeypatch.undo()
+        N_compared = []
+        compare_nodes = BaseTree._compare_nodes
+        def counting_compare_nodes(self, *args, **kwargs):
+            N_compared.append(1)
+            return compare_nodes(self, *args, **kwargs)
+        monkeypatch.setattr(BaseTree, '_compare_nodes', counting_compare_nodes)
+        
+        np.random.seed(2)
+        test_tree = NoisyTree(0, 1, 0, 1,
+                              split_threshold=0.5,
+                              N_points=2,
+                              min_depth=2,
+                              max_depth=7,
+                              filename_points=str(tmp_path / 'points.txt'),
+                              filename_nodes=str(tmp_path / 'nodes.txt'),
+                              overwrite=True
+                              )
+        test_tree.run_quadtree(batched=True)
+        assert test_tree._paths is None and test_tree._dirty is None
+        
+        leaves = []
+        test_tree._collect_leaves(test_tree.root, leaves)
+        results.append(([(leaf.x_min, leaf.y_min, leaf.depth, [point.value for point in leaf.node_points]) for leaf in leaves],
+                        len(N_compared)))
+        
+    assert results[0][0] == results[1][0]
+    assert len(results[0][0]) > 50
+    assert results[1][1] < results[0][1] / 2
+    
+    
+def test_journal(tmp_path, monkeypatch) -> None:
+    """Test journaled checkpoints: same final output, fewer rewrites, and exact resumption from the journal.
+    
+    """
+    N_rewrites = []
+    print_all_points = BaseTree.print_all_points
+    def counting_print_all_points(self):
+        N_rewrites.append(1)
+        print_all_points(self)
+    monkeypatch.setattr(BaseTree, 'print_all_points', counting_print_all_points)
+    
+    outputs = []
+    for journal in [False, True]:
+        N_rewrites.clear()
+        np.random.seed(5)
+        test_tree = NoisyTree(0, 1, 0, 1,
+                              split_threshold=0.5,
+                              N_points=4,
+                              max_depth=6,
+                              journal=journal,
+                              filename_points=str(tmp_path / f'points_{journal}.txt'),
+                              filename_nodes=str(tmp_path / f'nodes_{journal}.txt'),
+                              overwrite=True
+                              )
+        test_tree.run_quadtree()
+        outputs.append(((tmp_path / f'points_{journal}.txt').read_text(), (tmp_path / f'nodes_{journal}.txt').read_text(),
+                        len(N_rewrites)))
+        
+    assert outputs[0][:2] == outputs[1][:2]
+    assert outputs[1][2] < outputs[0][2]
+    
+    # interrupted runs resume from the journal, exactly if it holds everything (points in the output files are rounded)
+    for compact in [False, True]:
+        np.random.seed(6)
+        kwargs = dict(split_threshold=0.5, N_points=4, max_depth=6, journal=True,
+                      filename_points=str(tmp_path / 'points.txt'), filename_nodes=str(tmp_path / 'nodes.txt'))
+        test_tree = NoisyTree(0, 1, 0, 1, overwrite=True, **kwargs)
+        if not compact:
+            test_tree._snapshot_entries = np.inf
+        test_tree._sweep()
+        test_tree._snapshot_entries = np.inf
+        test_tree._sweep()
+        assert test_tree._journal_entries > 0
+        
+        loaded_tree = NoisyTree(0, 1, 0, 1, **kwargs)
+        loaded_tree.load_points()
+        assert loaded_tree.node_count == test_tree.node_count
+        
+        leaves = []
+        for tree in (test_tree, loaded_tree):
+            leaves.append([])
+            tree._collect_leaves(tree.root, leaves[-1])
+        for leaf, loaded_leaf in zip(*leaves):
+            assert (leaf.x_min, leaf.y_min, leaf.depth) == (loaded_leaf.x_min, loaded_leaf.y_min, loaded_leaf.depth)
+            if not compact:
+                assert [point.value for point in leaf.node_points] == [point.value for point in loaded_leaf.node_points]
+                
+    # a journal on its own (interrupted before the first compaction) is enough to resume
+    (tmp_path / 'points.txt').unlink()
+    loaded_tree = NoisyTree(0, 1, 0, 1, **kwargs)
+    loaded_tree.load_points()
+    assert loaded_tree.node_count > 1
+    
+    
+def test_checkpoint_file(tmp_path, capsys) -> None:
+    """Test binary checkpoints, which restore the exact quadtree.
+    
+    """
+    with pytest.raises(ValueError):
+        LinearTree(0, 1, 0, 1, journal=True, checkpoint_file=str(tmp_path / 'tree.npz'))
+        
+    outputs = []
+    for checkpoint_file in [None, str(tmp_path / 'tree.npz')]:
+        np.random.seed(7)
+        test_tree = NoisyTree(0, 1, 0, 1,
+                              split_threshold=0.5,
+                              N_points=4,
+                              max_depth=6,
+                              checkpoint_file=checkpoint_file,
+                              filename_points=str(tmp_path / 'points.txt'),
+                              filename_nodes=str(tmp_path / 'nodes.txt'),
+                              overwrite=True
+                              )
+        test_tree.run_quadtree()
+        outputs.append(((tmp_path / 'points.txt').read_text(), (tmp_path / 'nodes.txt').read_text()))
+    assert outputs[0] == outputs[1]
+    
+    # resuming starts from the final checkpoint
+    resumed_tree = NoisyTree(0, 1, 0, 1,
+                             split_threshold=0.5,
+                             N_points=4,
+                             max_depth=6,
+                             checkpoint_file=str(tmp_path / 'tree.npz'),
+                             filename_points=str(tmp_path / 'points.txt'),
+                             filename_nodes=str(tmp_path / 'nodes.txt'),
+                             overwrite=False
+                             )
+    capsys.readouterr()
+    resumed_tree.run_quadtree()
+    assert f"{test_tree.node_count} nodes found" in capsys.readouterr().out
+    assert resumed_tree.node_count >= test_tree.node_count
+    
+    # unfilled leaves, flags, and full precision survive a round trip
+    leaf = test_tree.root
+    while leaf._is_split():
+        leaf = leaf.child_nw
+    leaf.split_node()
+    test_tree.node_count = test_tree.node_count + 3
+    leaf.child_se.node_points.append(QuadPoint((leaf.child_se.x_min + 2 * leaf.child_se.x_max) / 3,
+                                               (2 * leaf.child_se.y_min + leaf.child_se.y_max) / 3,
+                                               np.pi, QuadPoint.FLAG_TIMEOUT))
+    test_tree.save_tree(str(tmp_path / 'tree.npz'))
+    
+    loaded_tree = NoisyTree(0, 1, 0, 1)
+    loaded_tree.load_tree(str(tmp_path / 'tree.npz'))
+    assert loaded_tree.node_count == test_tree.node_count
+    
+    nodes = []
+    for tree in (test_tree, loaded_tree):
+        stack = [tree.root]
+        nodes.append([])
+        while len(stack) > 0:
+            node = stack.pop()
+            nodes[-1].append((node.x_min, node.x_max, node.y_min, node.y_max, node.depth, node._is_split(),
+                              [(point.x, point.y, point.value, point.flag) for point in node.node_points]))
+            if node._is_split():
+                stack.extend((node.child_se, node.child_sw, node.child_ne, node.child_nw))
+    assert nodes[0] == nodes[1]
+    
+    with pytest.raises(ValueError):
+        LinearTree(0, 2, 0, 1).load_tree(str(tmp_path / 'tree.npz'))
+        
+        
+def test_load_points(tmp_path) -> None:
+    """Test loading points, which builds the same quadtree as squeezing them down from the root.
+    
+    """
+    rng = np.random.default_rng(5)
+    x = np.round(rng.uniform(-0.1, 1.1, 2000), 5)
+    y = np.round(rng.uniform(0, 1, 2000)**2, 5)
+    x[:200] = np.round(x[:200], 1)  # many points on the boundaries between nodes
+    values = rng.normal(size=2000)
+    values[::50] = np.nan
+    
+    N_loaded = []
+    for half_open in (False, True):
+        with open(tmp_path / 'points.txt', 'w') as f:
+            f.write("# x \t y \t value\n")
+            for point in zip(x, y, values):
+                f.write(f"{point[0]:.5f}\t{point[1]:.5f}\t{point[2]}\t\n")
+                
+        trees = []
+        for _ in range(2):
+            trees.append(LinearTree(0, 1, 0, 1,
+                                    N_points=8,
+                                    max_depth=7,
+                                    filename_points=str(tmp_path / 'points.txt'),
+                                    filename_nodes=str(tmp_path / 'nodes.txt'),
+                                    half_open=half_open
+                                    ))
+        trees[0].root.node_points.extend(QuadPoint(*point) for point in zip(x.tolist(), y.tolist(), values.tolist()))
+        trees[0].squeeze_node(trees[0].root)
+        trees[1].load_points()
+        assert trees[0].node_count == trees[1].node_count > 1
+        
+        nodes = []
+        for tree in trees:
+            tree.print_all_nodes()
+            nodes.append((tmp_path / 'nodes.txt').read_text())
+            tree.print_all_points()
+            nodes.append((tmp_path / 'points.txt').read_text())
+        assert nodes[0] == nodes[2] and nodes[1] == nodes[3]
+        
+        leaves = []
+        trees[1]._collect_leaves(trees[1].root, leaves)
+        N_loaded.append(sum(len(leaf.node_points) for leaf in leaves))
+        
+    # only points outside the quadtree are lost with half-open children
+    assert N_loaded[0] < N_loaded[1] == np.count_nonzero((x >= 0) & (x <= 1))
+    
+    # a file without points leaves the root empty
+    with open(tmp_path / 'points.txt', 'w') as f:
+        f.write("# x \t y \t value\n")
+    test_tree = LinearTree(0, 1, 0, 1, filename_points=str(tmp_path / 'points.txt'))
+    test_tree.load_points()
+    assert test_tree.node_count == 1 and len(test_tree.root.node_points) == 0
+    
+    
+if __name__ == "__main__":
+    test_worker_pool(pathlib.Path(tempfile.mkdtemp()))
+    test_worker_pool_terminate()
+    test_task_payload()
+    test_batched_forward(pathlib.Path(tempfile.mkdtemp()))
+    test_recursive_pass(pathlib.Path(tempfile.mkdtemp()))
+    for executor in ['serial', 'threads', 'spawn', 'custom']:
+        test_executor(executor)
+    test_timeout()
+    test_cache(pathlib.Path(tempfile.mkdtemp()))
+    test_sampler(1)
+    test_sampler(2)
+    test_compare_unfilled()
+    test_as_completed(pathlib.Path(tempfile.mkdtemp()))
+    test_adaptive(pathlib.Path(tempfile.mkdtemp()))
+    test_split_confidence(pathlib.Path(tempfile.mkdtemp()))
+    test_budget(pathlib.Path(tempfile.mkdtemp()))
+    test_load_points(pathlib.Path(tempfile.mkdtemp()))
@@ -0,0 +1,112 @@
+import pathlib
+import subprocess
+import sys
+
+import numpy as np
+
+from astroqtpy.cache import EvaluationCache, fingerprint
+from astroqtpy.quadpoint import QuadPoint
+
+
+def model_a(x: float) -> float:
+    return 2 * x
+
+
+def model_b(x: float) -> float:
+    return 3 * x
+
+
+SCALE = 2.
+
+
+def scaled_model(x: float, offset: float = 0.) -> float:
+    return SCALE * x + offset
+
+
+def make_model(power: int) -> callable:
+    return lambda x: x**power
+
+
+FINGERPRINT_SCRIPT = '''
+import numpy as np
+from astroqtpy.cache import fingerprint
+
+THRESHOLDS = {'low': 1., 'high': 2.}
+
+def simulation(parameters, N_steps=10):
+    x, y = parameters
+    orbits = [np.sin(k * x) for k in range(N_steps)]
+    stable = lambda value: value < THRESHOLDS['high'] and value in {0.5, 1.5, 'a', 'b'}
+    return sum(stable(orbit) for orbit in orbits)
+
+print(fingerprint([simulation, np.arange(3.), 'mean']))
+'''
+
+
+def test_fingerprint() -> None:
+    """Test that fingerprints change with functions, arrays, and settings.
+    
+    """
+    data = np.arange(5.)
+    reference = fingerprint([model_a, data, 10])
+    assert fingerprint([model_a, data.copy(), 10]) == reference
+    assert fingerprint([model_b, data, 10]) != reference
+    assert fingerprint([model_a, data + 1, 10]) != reference
+    assert fingerprint([model_a, data, 11]) != reference
+    
+    # module constants, default arguments, and closures used by functions
+    reference = fingerprint([scaled_model])
+    assert fingerprint([scaled_model]) == reference
+    global SCALE
+    SCALE = 3.
+    try:
+        assert fingerprint([scaled_model]) != reference
+    finally:
+        SCALE = 2.
+    scaled_model.__defaults__ = (1.,)
+    try:
+        assert fingerprint([scaled_model]) != reference
+    finally:
+        scaled_model.__defaults__ = (0.,)
+    assert fingerprint([scaled_model]) == reference
+    assert fingerprint([make_model(2)]) == fingerprint([make_model(2)]) != fingerprint([make_model(3)])
+    
+    
+def test_fingerprint_processes() -> None:
+    """Test that fingerprints of functions with lambdas, comprehensions, and sets are the same in every process.
+    
+    """
+    fingerprints = {subprocess.run([sys.executable, '-c', FINGERPRINT_SCRIPT], capture_output=True, text=True,
+                                   check=True, cwd=pathlib.Path(__file__).parents[1]).stdout.strip() for _ in range(3)}
+    assert len(fingerprints) == 1 and len(fingerprints.pop()) == 64
+    
+    
+def test_evaluation_cache(tmp_path) -> None:
+    """Test storing and looking up evaluations.
+    
+    """
+    bounds = (0., 0.5, 0.25, 0.5, 3)
+    seed = EvaluationCache.seed(bounds, 2)
+    assert seed == EvaluationCache.seed(bounds, 2) and seed != EvaluationCache.seed(bounds, 3)
+    assert 1 <= seed < 1e8
+    
+    key = EvaluationCache.key(bounds, 0, seed)
+    cache = EvaluationCache(str(tmp_path / 'cache.db'), 'a')
+    assert cache.get_many([key]) == {}
+    cache.put(key, [QuadPoint(0.1, 0.3, 4.)])
+    cache.close()
+    
+    # entries persist, and are separated by fingerprint
+    cache = EvaluationCache(str(tmp_path / 'cache.db'), 'a')
+    assert cache.get_many([key, 'other']) == {key: [QuadPoint(0.1, 0.3, 4.)]}
+    cache.close()
+    cache = EvaluationCache(str(tmp_path / 'cache.db'), 'b')
+    assert cache.get_many([key]) == {}
+    cache.close()
+    
+    
+if __name__ == "__main__":
+    import tempfile
+    test_fingerprint()
+    test_fingerprint_processes()
+    test_evaluation_cache(pathlib.Path(tempfile.mkdtemp()))
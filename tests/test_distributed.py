@@ -0,0 +1,131 @@
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+
+from astroqtpy.distributed import Coordinator, run_worker
+from astroqtpy.quadtree import NbodyQuadTree
+from tests.test_basetree import LinearTree
+
+
+def slow_square(x: float) -> float:
+    time.sleep(0.05)
+    if x < 0:
+        raise ValueError('negative')
+    
+    return x**2
+
+
+def failing_initializer() -> None:
+    raise RuntimeError('initializer failed')
+
+
+def fail_on_load() -> None:
+    raise ImportError('cannot load task')
+
+
+class Unloadable:
+    def __reduce__(self) -> tuple:
+        return (fail_on_load, ())
+    
+    
+def start_workers(coordinator: Coordinator, N_workers: int) -> list:
+    context = multiprocessing.get_context('spawn')
+    workers = [context.Process(target=run_worker, args=(coordinator.address, coordinator.authkey), daemon=True)
+               for _ in range(N_workers)]
+    for worker in workers:
+        worker.start()
+        
+    return workers
+
+
+def test_coordinator() -> None:
+    """Test tasks, errors, and workers joining and leaving a coordinator on localhost.
+    
+    """
+    with pytest.raises(TypeError):
+        Coordinator(authkey='secret')
+        
+    with Coordinator() as coordinator:
+        # tasks wait until a worker joins
+        futures = [coordinator.submit(slow_square, x) for x in range(40)]
+        time.sleep(0.2)
+        assert not any(future.done() for future in futures)
+        workers = start_workers(coordinator, 3)
+        
+        # a worker leaving mid-run does not lose its task
+        while sum(future.done() for future in futures) < 5:
+            time.sleep(0.01)
+        workers[0].terminate()
+        assert [future.result(timeout=60) for future in futures] == [x**2 for x in range(40)]
+        
+        with pytest.raises(ValueError):
+            coordinator.submit(slow_square, -1).result(timeout=60)
+            
+    for worker in workers[1:]:
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+    with pytest.raises(RuntimeError):
+        coordinator.submit(slow_square, 1)
+        
+        
+def test_distributed_tree() -> None:
+    """Test that a quadtree evaluated by remote workers gets the same points as a serial one.
+    
+    """
+    reference_tree = LinearTree(0, 1, 0, 1, N_points=4)
+    with Coordinator() as coordinator:
+        workers = start_workers(coordinator, 2)
+        test_tree = LinearTree(0, 1, 0, 1, N_points=4, executor=coordinator)
+        
+        for tree in (reference_tree, test_tree):
+            np.random.seed(12)
+            tree.root.split_node()
+            tree.fill(tree.root, 4)
+        test_tree.close()
+        
+    for node in ('child_nw', 'child_ne', 'child_sw', 'child_se'):
+        for point_a, point_b in zip(getattr(reference_tree.root, node).node_points,
+                                    getattr(test_tree.root, node).node_points):
+            assert (point_a.x, point_a.y, point_a.value) == (point_b.x, point_b.y, point_b.value)
+    for worker in workers:
+        worker.join(timeout=10)
+        
+        
+def test_coordinator_errors() -> None:
+    """Test that tasks and initializers that cannot be sent, unpickled, or run fail their futures.
+    
+    """
+    with Coordinator() as coordinator:
+        workers = start_workers(coordinator, 2)
+        
+        # tasks that cannot be pickled, or unpickled by the worker
+        with pytest.raises(Exception):
+            coordinator.submit(lambda x: x, 1).result(timeout=60)
+        with pytest.raises(ImportError):
+            coordinator.submit(slow_square, Unloadable()).result(timeout=60)
+            
+        # initializers that fail are reported for every task, without losing the workers
+        coordinator.set_initializer(failing_initializer)
+        for future in [coordinator.submit(slow_square, x) for x in range(4)]:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=60)
+        coordinator.set_initializer(None)
+        assert [coordinator.submit(slow_square, x).result(timeout=60) for x in range(4)] == [0, 1, 4, 9]
+        
+        # a quadtree with a function that cannot be sent to the workers fails instead of waiting
+        test_tree = NbodyQuadTree(0, 1, 0, 1, lambda parameters: 1., N_points=4, executor=coordinator)
+        with pytest.raises(Exception):
+            test_tree.fill(test_tree.root, 4)
+        test_tree.close()
+        
+    for worker in workers:
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+        
+        
+if __name__ == "__main__":
+    test_coordinator()
+    test_distributed_tree()
+    test_coordinator_errors()
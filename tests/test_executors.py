@@ -0,0 +1,70 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from astroqtpy.executors import ExecutorPool
+
+
+def square(x: float, tree: object = None) -> float:
+    if x < 0:
+        raise ValueError('negative')
+    
+    return x**2 if tree is None else tree * x**2
+
+
+def test_executor_pool() -> None:
+    """Test the pool interface on top of a concurrent.futures executor.
+    
+    """
+    with pytest.raises(TypeError):
+        ExecutorPool(object())
+        
+    pool = ExecutorPool(ThreadPoolExecutor(max_workers=2))
+    assert pool.starmap(square, [(x,) for x in range(10)]) == [x**2 for x in range(10)]
+    
+    # results and errors are handed to the callbacks
+    results = queue.Queue()
+    pool.apply_async(square, (3,), callback=results.put, error_callback=results.put)
+    assert results.get(timeout=5) == 9
+    pool.apply_async(square, (-3,), callback=results.put, error_callback=results.put)
+    assert isinstance(results.get(timeout=5), ValueError)
+    
+    # tree is passed to every task
+    tree_pool = ExecutorPool(ThreadPoolExecutor(max_workers=2), tree=2)
+    assert tree_pool.starmap(square, [(3,)]) == [18]
+    tree_pool.close()
+    tree_pool.join()
+    
+    pool.close()
+    pool.join()
+    with pytest.raises(RuntimeError):
+        pool.starmap(square, [(1,)])
+        
+        
+def test_executor_pool_terminate() -> None:
+    """Test that queued tasks are cancelled, and that executors owned by the caller are left running.
+    
+    """
+    executor = ThreadPoolExecutor(max_workers=1)
+    pool = ExecutorPool(executor, shutdown=False)
+    
+    event = threading.Event()
+    results = queue.Queue()
+    pool.apply_async(event.wait, (5,))
+    futures = [pool.apply_async(square, (x,), callback=results.put) for x in range(5)]
+    pool.terminate()
+    event.set()
+    pool.join()
+    assert all(future.cancelled() for future in futures)
+    assert results.empty()
+    
+    # executor is still usable
+    assert executor.submit(square, 2).result() == 4
+    executor.shutdown()
+    
+    
+if __name__ == "__main__":
+    test_executor_pool()
+    test_executor_pool_terminate()
@@ -1,7 +1,9 @@
+import pickle
+
 import pytest
 import numpy as np
 
-from astroqtpy.quadnode import QuadNode
+from astroqtpy.quadnode import QuadNode, PointList
 from astroqtpy.quadpoint import QuadPoint
 
 def test_nbody_node() -> None:
@@ -38,5 +40,120 @@ def test_nbody_node() -> None:
         my_node._generate_node_value('fake_statistic')  # should throw value error
     
     
+def test_node_statistics() -> None:
+    """Test that node statistics are identical to numpy's, and stay current as points are added or removed.
+    
+    """
+    rng = np.random.default_rng(1)
+    my_node = QuadNode(0, 1, 0, 1)
+    for statistic in ('count', 'mean', 'std', 'median'):
+        assert my_node.get_node_value(statistic) == -np.inf
+    
+    statistics = {'count': len, 'mean': np.mean, 'std': np.std, 'median': np.median}
+    for N_points in [1, 2, 7, 20, 21]:
+        while len(my_node.node_points) < N_points:
+            my_node.node_points.append(QuadPoint(*rng.uniform(0, 1, 2), rng.normal()))
+        values = [point.value for point in my_node.node_points]
+        for statistic, function in statistics.items():
+            assert my_node.get_node_value(statistic) == function(values)
+            
+    # split decisions depend on exact values, e.g. for means of 0/1 values (multiples of 0.05 for 20 points)
+    for _ in range(200):
+        my_node.node_points = [QuadPoint(0.5, 0.5, value) for value in rng.integers(0, 2, 20).tolist()]
+        values = [point.value for point in my_node.node_points]
+        for statistic, function in statistics.items():
+            assert my_node.get_node_value(statistic) == function(values)
+            
+    # other changes recompute the statistics
+    my_node.node_points.pop(0)
+    my_node.node_points[0] = QuadPoint(0.5, 0.5, 100.)
+    values = [point.value for point in my_node.node_points]
+    assert my_node.get_node_value('median') == np.median(values)
+    assert pickle.loads(pickle.dumps(my_node)).get_node_value('mean') == np.mean(values)
+    my_node.node_points = [QuadPoint(0.5, 0.5, 1.), QuadPoint(0.5, 0.5, 3.)]
+    assert my_node.get_node_value('mean') == 2.
+    
+    # non-finite values give the same results as numpy
+    my_node.node_points.append(QuadPoint(0.5, 0.5, np.nan))
+    assert np.isnan(my_node.get_node_value('mean'))
+    assert my_node.get_node_value('count') == 3
+    
+    # splitting hands the points (and their statistics) to the children
+    my_node.node_points = [QuadPoint(0.25, 0.25, 1.), QuadPoint(0.75, 0.75, 3.), QuadPoint(0.8, 0.9, 5.)]
+    my_node.split_node()
+    assert my_node.get_node_value('mean') == -np.inf
+    assert my_node.child_sw.get_node_value('mean') == 1.
+    assert my_node.child_ne.get_node_value('mean') == 4.
+    
+    
+def test_point_list() -> None:
+    """Test that point lists store points in arrays, and behave like lists of QuadPoint objects.
+    
+    """
+    points = [QuadPoint(0.1, 0.2, 1), QuadPoint(0.3, 0.4, 0, QuadPoint.FLAG_TIMEOUT), QuadPoint(0.5, 0.6, 1)]
+    point_list = PointList(points)
+    assert point_list == points and list(point_list) == points
+    assert point_list[1] == points[1] and point_list[-1] == points[-1] and point_list[:2] == points[:2]
+    with pytest.raises(IndexError):
+        point_list[3]
+        
+    # integer values stay integers until a float is added
+    assert point_list.values.dtype == np.int64 and type(point_list[0].value) is int
+    assert np.array_equal(point_list.flags, [0, QuadPoint.FLAG_TIMEOUT, 0])
+    with pytest.raises(ValueError):
+        point_list.x[0] = 1.
+    point_list.append(QuadPoint(0.7, 0.8, 0.5))
+    assert point_list.values.dtype == float and point_list[0].value == 1 and point_list[3].value == 0.5
+    
+    # changes behave as for lists, and keep the statistics current
+    points.append(QuadPoint(0.7, 0.8, 0.5))
+    for change in (lambda p: p.insert(1, QuadPoint(0.9, 0.9, 2.5)), lambda p: p.insert(-9, QuadPoint(0.1, 0.1, 3.)),
+                   lambda p: p.pop(2), lambda p: p.remove(QuadPoint(0.5, 0.6, 1)), lambda p: p.__delitem__(slice(0, 1)),
+                   lambda p: p.__setitem__(0, QuadPoint(0.2, 0.2, -1.)), lambda p: p.__setitem__(slice(1, 2), []),
+                   lambda p: p.extend(PointList(p)), lambda p: p.__imul__(2)):
+        change(points)
+        change(point_list)
+        assert point_list == points
+        assert point_list.stats.value('mean', point_list.values) == np.mean([p.value for p in points])
+    with pytest.raises(ValueError):
+        point_list.remove(QuadPoint(5., 5., 5.))
+        
+    assert pickle.loads(pickle.dumps(point_list)) == points
+    assert point_list.take(point_list.values > 0) == [point for point in points if point.value > 0]
+    point_list.clear()
+    assert len(point_list) == 0 and point_list.values.dtype == np.int64 and point_list.stats.count == 0
+    
+    # flags are only stored once a point is flagged
+    point_list.extend([QuadPoint(0.1, 0.1, 1), QuadPoint(0.2, 0.2, 2)])
+    assert point_list._flags is None and np.array_equal(point_list.flags, [0, 0])
+    point_list.insert(1, QuadPoint(0.3, 0.3, 3, QuadPoint.FLAG_TIMEOUT))
+    assert np.array_equal(point_list.flags, [0, QuadPoint.FLAG_TIMEOUT, 0])
+    assert point_list.take([1, 2]) == [QuadPoint(0.3, 0.3, 3, QuadPoint.FLAG_TIMEOUT), QuadPoint(0.2, 0.2, 2)]
+    
+    
+def test_split_boundaries() -> None:
+    """Test that splitting drops boundary points by default, and hands each point to one child with half_open.
+    
+    """
+    points = [QuadPoint(0.5, 0.75, 1.), QuadPoint(0.25, 0.5, 2.), QuadPoint(0.5, 0.5, 3.), QuadPoint(0.2, 0.2, 4.),
+              QuadPoint(0., 1., 5.), QuadPoint(1., 0., 6.), QuadPoint(0.1, 0.3, 7.), QuadPoint(1.5, 0.5, 8.)]
+    
+    my_node = QuadNode(0, 1, 0, 1)
+    my_node.node_points = points
+    my_node.split_node()
+    assert my_node.child_sw.node_points == [points[3], points[6]]
+    assert len(my_node.child_nw.node_points) + len(my_node.child_ne.node_points) + len(my_node.child_se.node_points) == 0
+    
+    my_node = QuadNode(0, 1, 0, 1)
+    my_node.node_points = points
+    my_node.split_node(half_open=True)
+    assert my_node.child_nw.node_points == [points[1], points[4]]
+    assert my_node.child_ne.node_points == [points[0], points[2]]
+    assert my_node.child_sw.node_points == [points[3], points[6]]
+    assert my_node.child_se.node_points == [points[5]]  # points outside the node are still dropped
+    assert my_node.child_ne.get_node_value('mean') == 2.
+    
+    
 if __name__ == "__main__":
-    test_nbody_node()
\ No newline at end of file
+    test_nbody_node()
+    test_node_statistics()
\ No newline at end of file
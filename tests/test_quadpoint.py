@@ -29,6 +29,11 @@ def test_quad_point() -> None:
     assert point.y == y_new
     assert point.val == value_new
     
+    # flag
+    assert point.flag == 0
+    point.flag = QuadPoint.FLAG_TIMEOUT
+    assert point.flag == QuadPoint.FLAG_TIMEOUT
+    
     
     
 if __name__ == "__main__":
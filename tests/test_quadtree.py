@@ -0,0 +1,226 @@
+import pathlib
+import tempfile
+from multiprocessing import shared_memory
+
+import pytest
+import numpy as np
+
+from astroqtpy.quadnode import QuadNode
+from astroqtpy.quadpoint import QuadPoint
+from astroqtpy.quadtree import RandomQuadTree, Chi2QuadTree, NbodyQuadTree, Hist2dQuadTree
+
+
+def vectorized_simulation(par):
+    """Vectorized simulation function for NbodyQuadTree test.
+    
+    """
+    x, y = par  # unpack parameter arrays
+    
+    return x * y
+
+
+def line_model(x, params):
+    """Linear model function for Chi2QuadTree test.
+    
+    """
+    a, b = params  # unpack parameters
+    
+    return a * x + b
+
+
+def test_evaluate_points() -> None:
+    """Test batched point evaluation.
+    
+    """
+    node = QuadNode(0, 1, 2, 3)
+    
+    # random quadtree draws all points at once
+    test_tree = RandomQuadTree(0, 1, 2, 3)
+    assert test_tree._has_evaluate_points()
+    x, y, value = test_tree.evaluate_points(node, 50, rng_seed=42)
+    assert len(x) == len(y) == len(value) == 50
+    assert np.all((x >= 0) & (x <= 1)) and np.all((y >= 2) & (y <= 3))
+    assert set(np.unique(value)) <= {0, 1}
+    
+    # N-body quadtree only batches a vectorized simulation function
+    test_tree = NbodyQuadTree(0, 1, 2, 3, vectorized_simulation, vectorized=True)
+    assert test_tree._has_evaluate_points()
+    x, y, value = test_tree.evaluate_points(node, 10)
+    assert value == pytest.approx(x * y)
+    point = test_tree.evaluate_point(node)
+    assert point.value == pytest.approx(point.x * point.y)
+    assert not NbodyQuadTree(0, 1, 2, 3, vectorized_simulation)._has_evaluate_points()
+    
+    # filling a split node makes one call per leaf
+    calls = []
+    test_tree.simulation_func = lambda par: calls.append(len(par[0])) or par[0] * par[1]
+    test_tree.root.split_node()
+    test_tree.fill(test_tree.root, 5)
+    assert calls == [5, 5, 5, 5]
+    assert len(test_tree.root.child_se.node_points) == 5
+    
+    # samplers pass locations to evaluate_points
+    nbody_tree = NbodyQuadTree(0, 1, 0, 1, vectorized_simulation, vectorized=True, sampler='lhs')
+    nbody_tree.fill(nbody_tree.root, 10)
+    for dim in ('x', 'y'):
+        strata = sorted(int(getattr(point, dim) * 10) for point in nbody_tree.root.node_points)
+        assert strata == list(range(10))
+    
+    
+def test_random_options(tmp_path) -> None:
+    """Test that the random quadtree forwards the same options as the N-body quadtree.
+    
+    """
+    test_tree = RandomQuadTree(0, 1, 0, 1, timeout=10, timeout_value=-1., timeout_resample=True,
+                               cache=str(tmp_path / 'cache.db'), cache_key='random', N_min=5, adaptive_tolerance=0.4,
+                               split_confidence=0.9, split_test='bootstrap', journal=True, half_open=True)
+    assert (test_tree.timeout, test_tree.timeout_value, test_tree.timeout_resample) == (10, -1., True)
+    assert (test_tree.cache, test_tree.cache_key, test_tree.N_min, test_tree.adaptive_tolerance) == \
+           (str(tmp_path / 'cache.db'), 'random', 5, 0.4)
+    assert (test_tree.split_confidence, test_tree.split_test, test_tree.journal, test_tree.half_open) == \
+           (0.9, 'bootstrap', True, True)
+    assert RandomQuadTree(0, 1, 0, 1, checkpoint_file=str(tmp_path / 'tree.npz')).checkpoint_file == str(tmp_path / 'tree.npz')
+    
+    with pytest.raises(ValueError):
+        RandomQuadTree(0, 1, 0, 1, N_min=0)
+    with pytest.raises(ValueError):
+        RandomQuadTree(0, 1, 0, 1, journal=True, checkpoint_file=str(tmp_path / 'tree.npz'))
+    
+    
+def test_chi2_vectorized() -> None:
+    """Test vectorized, chunked chi^2 evaluation against the per-point path.
+    
+    """
+    rng = np.random.default_rng(1)
+    x_data = np.linspace(0, 10, 200)
+    data = np.stack((x_data, line_model(x_data, (1.4, 2.3)) + rng.normal(0, 0.4, 200)))
+    weights = np.full(200, 1 / 0.4**2)
+    node = QuadNode(0.5, 2.5, 0, 5)
+    
+    scalar_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model, weights=weights)
+    vector_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model, weights=weights,
+                               vectorized=True, max_memory=3 * 8 * 200 * 7)  # chunks of 7 samples
+    assert vector_tree._has_evaluate_points() and not scalar_tree._has_evaluate_points()
+    
+    x, y, value = vector_tree.evaluate_points(node, 50, rng_seed=3)
+    for x_i, y_i, value_i in zip(x, y, value):
+        chi2 = np.sum(weights * (data[1] - line_model(x_data, (x_i, y_i)))**2) / 198
+        assert value_i == pytest.approx(min(chi2, 10))
+        
+    point = scalar_tree.evaluate_point(node, rng_seed=5)
+    assert vector_tree.evaluate_point(node, rng_seed=5).value == pytest.approx(point.value)
+    
+    with pytest.raises(ValueError):
+        Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model, max_memory=0)
+    
+    
+def test_chi2_linear() -> None:
+    """Test the closed-form chi^2 of linear models against the brute-force sum.
+    
+    """
+    rng = np.random.default_rng(2)
+    x_data = np.linspace(0, 10, 200)
+    data = np.stack((x_data, line_model(x_data, (1.4, 2.3)) + rng.normal(0, 0.4, 200)))
+    weights = np.full(200, 1 / 0.4**2)
+    node = QuadNode(0.5, 2.5, 0, 5)
+    
+    linear_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model, weights=weights, linear=True)
+    design_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, None, weights=weights,
+                               design_matrix=np.stack((x_data, np.ones_like(x_data))))
+    assert linear_tree._has_evaluate_points() and design_tree._has_evaluate_points()
+    
+    x, y, value = linear_tree.evaluate_points(node, 50, rng_seed=3)
+    assert np.allclose(design_tree.evaluate_points(node, 50, rng_seed=3)[2], value)
+    for x_i, y_i, value_i in zip(x, y, value):
+        chi2 = np.sum(weights * (data[1] - line_model(x_data, (x_i, y_i)))**2) / 198
+        assert value_i == pytest.approx(min(chi2, 10))
+        
+    with pytest.raises(ValueError):
+        Chi2QuadTree(0.5, 2.5, 0, 5, data, None, design_matrix=np.stack((x_data, 2 * x_data)))
+    with pytest.raises(ValueError):
+        Chi2QuadTree(0.5, 2.5, 0, 5, data, lambda x, p: p[0] * p[1] * x + p[0] + p[1], linear=True)
+    with pytest.raises(ValueError):
+        Chi2QuadTree(0.5, 2.5, 0, 5, data, lambda x, p: p[0]**2 * x + p[1], linear=True)
+    with pytest.raises(TypeError):
+        Chi2QuadTree(0.5, 2.5, 0, 5, data, None)
+    
+    
+def test_chi2_shared_memory() -> None:
+    """Test that workers evaluate chi^2 from shared, read-only data.
+    
+    """
+    rng = np.random.default_rng(4)
+    x_data = np.linspace(0, 10, 200)
+    data = np.stack((x_data, line_model(x_data, (1.4, 2.3)) + rng.normal(0, 0.4, 200)))
+    
+    serial_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model)
+    shared_tree = Chi2QuadTree(0.5, 2.5, 0, 5, data, line_model, N_proc=2, shared_memory=True)
+    
+    # workers only receive the name of the shared block
+    worker_tree = shared_tree._detached_copy()
+    assert worker_tree.data is None and worker_tree.weights is None
+    worker_tree._attach_worker()
+    assert np.array_equal(worker_tree.data, data) and not worker_tree.data.flags.writeable
+    worker_tree._shm.close()
+    
+    np.random.seed(6)
+    serial_tree.fill(serial_tree.root, 8)
+    np.random.seed(6)
+    shared_tree.fill(shared_tree.root, 8)
+    for point_a, point_b in zip(serial_tree.root.node_points, shared_tree.root.node_points):
+        assert point_b.value == pytest.approx(point_a.value)
+        
+    # shared block is released with the pool
+    name = shared_tree._shm.name
+    shared_tree.close()
+    assert shared_tree._shm is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+    
+    
+def test_hist2d_add_data() -> None:
+    """Test that bulk histogram construction matches adding the data point by point.
+    
+    """
+    rng = np.random.default_rng(7)
+    x = np.round(rng.uniform(-0.1, 1.1, 3000)**2, 2)  # many points on node boundaries
+    y = np.round(rng.uniform(0, 1, 3000), 3)
+    z = rng.normal(size=3000)
+    
+    with pytest.raises(TypeError):
+        Hist2dQuadTree(0, 1, 0, 1).add_data(list(x), y)
+    with pytest.raises(ValueError):
+        Hist2dQuadTree(0, 1, 0, 1).add_data(x, y, z[:10])
+    
+    for values, half_open in ((None, False), (z, False), (z, True)):
+        trees = []
+        for _ in range(2):
+            trees.append(Hist2dQuadTree(0, 1, 0, 1, node_statistic='count' if values is None else 'median',
+                                        N_points=10, max_depth=7, half_open=half_open))
+        trees[0].root.node_points.extend(QuadPoint(x_i, y_i, np.nan if values is None else values[i])
+                                         for i, (x_i, y_i) in enumerate(zip(x.tolist(), y.tolist())))
+        trees[0].squeeze_node(trees[0].root)
+        trees[1].add_data(x[:5], y[:5], None if values is None else values[:5])
+        trees[1].add_data(x[5:], y[5:], None if values is None else values[5:])
+        
+        nodes = []
+        for tree in trees:
+            stack = [tree.root]
+            nodes.append([])
+            while len(stack) > 0:
+                node = stack.pop()
+                nodes[-1].append((node.x_min, node.y_min, node.depth, repr(node.get_node_value(tree.node_statistic)),
+                                  repr(list(node.node_points))))
+                if node._is_split():
+                    stack.extend((node.child_se, node.child_sw, node.child_ne, node.child_nw))
+        assert trees[0].node_count == trees[1].node_count > 1
+        assert nodes[0] == nodes[1]
+        
+        
+if __name__ == "__main__":
+    test_evaluate_points()
+    test_random_options(pathlib.Path(tempfile.mkdtemp()))
+    test_chi2_vectorized()
+    test_chi2_linear()
+    test_chi2_shared_memory()
+    test_hist2d_add_data()
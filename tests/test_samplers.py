@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from astroqtpy import samplers
+
+
+def cell_counts(points: np.ndarray, N_grid: int) -> np.ndarray:
+    counts = np.zeros((N_grid, N_grid), dtype=int)
+    np.add.at(counts, tuple(np.minimum((points * N_grid).astype(int), N_grid - 1).T), 1)
+    
+    return counts
+
+
+def test_samplers() -> None:
+    """Test that samplers spread points evenly over the unit square.
+    
+    """
+    rng = np.random.default_rng(0)
+    empty = np.empty((0, 2))
+    
+    with pytest.raises(ValueError):
+        samplers.sample('grid', 4, empty, rng)
+        
+    for sampler in samplers.SAMPLERS:
+        points = samplers.sample(sampler, 16, empty, rng)
+        assert points.shape == (16, 2)
+        assert np.all((points >= 0) & (points < 1))
+        
+    # one point per cell (Sobol nets, jittered grid) or per stratum (Latin hypercube)
+    assert np.all(cell_counts(samplers.sample('sobol', 16, empty, rng), 4) == 1)
+    assert np.all(cell_counts(samplers.sample('jitter', 16, empty, rng), 4) == 1)
+    points = samplers.sample('lhs', 16, empty, rng)
+    for dim in range(2):
+        assert np.array_equal(np.sort((points[:, dim] * 16).astype(int)), np.arange(16))
+        
+    # low-discrepancy samples integrate more accurately than uniform ones
+    for sampler in ('sobol', 'halton', 'lhs', 'jitter'):
+        error = [abs(np.mean(samplers.sample(sampler, 16, empty, rng)) - 0.5) for _ in range(200)]
+        uniform_error = [abs(np.mean(samplers.sample('uniform', 16, empty, rng)) - 0.5) for _ in range(200)]
+        assert np.mean(error) < np.mean(uniform_error)
+        
+        
+def test_complete_design() -> None:
+    """Test that new points fill the gaps left by existing points.
+    
+    """
+    rng = np.random.default_rng(1)
+    
+    # points handed down to a child node from a stratified parent
+    for sampler in ('jitter', 'sobol'):
+        parent = samplers.sample(sampler, 16, np.empty((0, 2)), rng)
+        existing = 2 * parent[np.all(parent < 0.5, axis=1)]
+        points = np.concatenate((existing, samplers.sample(sampler, 16 - len(existing), existing, rng)))
+        assert np.all(cell_counts(points, 4) == 1)
+        
+    existing = samplers.sample('lhs', 4, np.empty((0, 2)), rng)
+    points = np.concatenate((existing, samplers.sample('lhs', 12, existing, rng)))
+    assert np.all(cell_counts(points, 16).sum(axis=0) == 1) and np.all(cell_counts(points, 16).sum(axis=1) == 1)
+    
+    
+if __name__ == "__main__":
+    test_samplers()
+    test_complete_design()